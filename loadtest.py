@@ -0,0 +1,164 @@
+"""
+Load test comparing the sync and async read paths.
+
+Both variants are mounted side by side (e.g. /livez/ and /async/livez/),
+so a single server process gives them the same worker count. Start the
+server the same way as in production, for example:
+
+    gunicorn meetmeet.asgi:application -k uvicorn.workers.UvicornWorker -w 2
+
+and run:
+
+    python loadtest.py --url http://127.0.0.1:8000 --meetup 1
+
+Every path pair is hammered for --duration seconds by --concurrency
+keep-alive connections, then requests/sec and latency percentiles are
+printed per path. Uses only the standard library.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from urllib.parse import urlsplit
+
+PATHS = [
+    ("livez", "/livez/", "/async/livez/"),
+    ("list", "/", "/async/"),
+    ("detail", "/meetups/{pk}/", "/async/meetups/{pk}/"),
+]
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, return (status, body size)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(chunk_size + 2)
+            size += chunk_size
+            if chunk_size == 0:
+                return status, size
+    length = int(headers.get("content-length", 0))
+    await reader.readexactly(length)
+    return status, length
+
+
+async def worker(host, port, path, options, deadline, counter, latencies,
+                 errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = path
+            if options.bust_cache:
+                # A unique query string misses the anonymous page cache
+                target += f"?bust={next(counter)}"
+            request = (
+                f"GET {target} HTTP/1.1\r\n"
+                f"Host: {options.host or host}\r\n"
+                f"Cookie: {options.cookie}\r\n"
+                "Connection: keep-alive\r\n\r\n"
+            )
+            started = time.perf_counter()
+            writer.write(request.encode("latin-1"))
+            await writer.drain()
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(host, port, path, options):
+    latencies, errors = [], []
+    counter = itertools.count()
+    # Short warm-up so both variants start with imported modules
+    # and open database connections
+    warmup = time.perf_counter() + 1
+    await asyncio.gather(*(
+        worker(host, port, path, options, warmup, counter, [], [])
+        for _ in range(options.concurrency)
+    ))
+
+    started = time.perf_counter()
+    deadline = started + options.duration
+    await asyncio.gather(*(
+        worker(host, port, path, options, deadline, counter, latencies,
+               errors)
+        for _ in range(options.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name, variant, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{name:<8} {variant:<6} no completed requests")
+        return
+    print(
+        f"{name:<8} {variant:<6} "
+        f"{len(latencies) / elapsed:>9.1f} req/s  "
+        f"p50 {percentile(latencies, 0.50) * 1000:>7.1f} ms  "
+        f"p99 {percentile(latencies, 0.99) * 1000:>7.1f} ms  "
+        f"mean {statistics.mean(latencies) * 1000:>7.1f} ms  "
+        f"errors {len(errors)}"
+    )
+    if errors:
+        print(f"{'':<15} first error status: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--meetup", type=int, default=1,
+                        help="Primary key of the meetup for detail pages.")
+    parser.add_argument("--duration", type=float, default=10,
+                        help="Seconds per path.")
+    parser.add_argument("--concurrency", type=int, default=50,
+                        help="Concurrent keep-alive connections.")
+    parser.add_argument("--host",
+                        help="Host header, if it must match ALLOWED_HOSTS "
+                             "(e.g. 'meetmeet.onrender.com').")
+    parser.add_argument("--cookie", default="",
+                        help="Cookie header, e.g. 'sessionid=...' to test "
+                             "signed-in pages.")
+    parser.add_argument("--bust-cache", action="store_true",
+                        help="Add a unique query string to every request.")
+    parser.add_argument("--only", choices=[name for name, _, _ in PATHS],
+                        action="append",
+                        help="Limit the run to some paths.")
+    options = parser.parse_args()
+
+    url = urlsplit(options.url)
+    host, port = url.hostname, url.port or 80
+    print(f"{options.concurrency} connections, {options.duration:g}s "
+          f"per path against {options.url}")
+    for name, sync_path, async_path in PATHS:
+        if options.only and name not in options.only:
+            continue
+        for variant, path in (("sync", sync_path), ("async", async_path)):
+            path = path.format(pk=options.meetup)
+            results = asyncio.run(run(host, port, path, options))
+            report(name, variant, *results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run natively under ASGI.
+    The stock middleware is sync-only, which makes Django run the whole
+    chain below it, views included, in a worker thread. This variant
+    passes non-static requests straight on to the async chain and only
+    hops to a thread when it actually serves a file.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Finders hit the filesystem, keep them off the event loop
+            static_file = await sync_to_async(self.find_file)(
+                request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
@@ -16,6 +17,9 @@ SECRET_KEY = os.getenv('SECRET_KEY')
 # DEBUG should be False in production
 DEBUG = False
 
+# Running the test suite (manage.py test)
+TESTING = sys.argv[1:2] == ['test']
+
 # Render.com specific host configuration
 ALLOWED_HOSTS = ['.onrender.com'] if not DEBUG else ['*']
 
@@ -44,7 +48,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Must be high in the list
+    'meetmeet.middleware.AsyncWhiteNoiseMiddleware',  # Keep high
+    'meetups.middleware.ReplicaPinMiddleware',
+    'meetups.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,6 +58,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'meetups.middleware.RateLimitMiddleware',
+    'meetups.middleware.QueryBudgetMiddleware',  # Keep last
 ]
 
 ROOT_URLCONF = 'meetmeet.urls'
@@ -83,6 +91,175 @@ DATABASES = {
     )
 }
 
+# SQLite (local development): take the write lock when a transaction starts,
+# so concurrent participation updates queue up instead of failing on lock
+# upgrade, and keep the test database on disk so threaded tests share it
+if DATABASES['default'].get('ENGINE') == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+    }
+    DATABASES['default']['TEST'] = {
+        'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+    }
+
+# Optional read replica: GET/HEAD requests read from it, everything else
+# uses the primary (see meetups.replica). Clients that just wrote are
+# pinned to the primary for REPLICA_PIN_SECONDS, which should exceed the
+# usual replication lag. Locally, a copy of the SQLite file works as a
+# replica that lags until it is copied again. Tests always run against
+# the primary alone: a replica connection would not see the data of their
+# uncommitted test transactions.
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+if DATABASE_REPLICA_URL and not TESTING:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL, conn_max_age=600)
+    if DATABASES['replica'].get('ENGINE') == 'django.db.backends.sqlite3':
+        DATABASES['replica']['OPTIONS'] = {'timeout': 20}
+    DATABASE_ROUTERS = ['meetups.replica.ReplicaRouter']
+
+
+# --- CACHE CONFIGURATION ---
+# Pluggable through CACHE_BACKEND: "locmem" keeps entries per process,
+# "file" shares them between all workers on a host (both work offline),
+# any other value is used as a backend path together with CACHE_LOCATION
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_LOCATION = os.getenv(
+    'CACHE_LOCATION',
+    os.path.join(BASE_DIR, '.cache') if CACHE_BACKEND == 'file' else ''
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': CACHE_LOCATION,
+    },
+}
+# Sessions of SESSION_MODE "cached_db" and rate limit counters get caches
+# of their own, so that culling rendered pages never evicts them
+for alias in ('sessions', 'ratelimit'):
+    CACHES[alias] = {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': (
+            os.path.join(CACHE_LOCATION, alias) if CACHE_BACKEND == 'file'
+            else alias if CACHE_BACKEND == 'locmem'
+            else CACHE_LOCATION
+        ),
+        'KEY_PREFIX': alias,
+    }
+
+# Rate limits count with incr(), which only Redis does atomically across
+# workers: "locmem" counts per worker and "file" loses concurrent
+# increments. Set RATE_LIMIT_REDIS_URL to enforce the limits exactly.
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+if RATE_LIMIT_REDIS_URL:
+    CACHES['ratelimit'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': RATE_LIMIT_REDIS_URL,
+        'KEY_PREFIX': 'ratelimit',
+    }
+
+# Rendered pages are invalidated by version bumps; the timeout only bounds
+# time-based staleness such as the "Past event" badge
+MEETUPS_PAGE_CACHE_TIMEOUT = 60
+
+# iCalendar feeds may be cached (and are polled) for this many seconds
+CALENDAR_FEED_MAX_AGE = int(os.getenv('CALENDAR_FEED_MAX_AGE', '900'))
+
+
+# --- SESSIONS & MESSAGES ---
+# SESSION_MODE picks where sessions live:
+# "db" reads the django_session table on every signed-in request;
+# "cached_db" reads the "sessions" cache and writes through to the table;
+# "signed_cookies" keeps the session in a signed cookie, with no storage,
+# but logging out cannot revoke copies of the cookie.
+# With CACHE_BACKEND "locmem" every worker caches sessions on its own, so a
+# logout is only seen by the worker that served it: use cached_db together
+# with a cache all workers share ("file" on a single host).
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = os.getenv('SESSION_MODE', 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+# Flash messages travel in a cookie, so redirects never touch the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# --- RATE LIMITS ---
+# Write requests per user and per client IP, by URL name (see
+# meetups.ratelimit): "20/m" allows bursts of 20 requests, refilled evenly
+# over a minute. The test suite shares one client IP and reuses user IDs,
+# so only the tests that check limits enable them.
+RATE_LIMITS = {} if TESTING else {
+    'toggle_participation': {'user': '20/m', 'ip': '60/m'},
+    'approve_participation': {'user': '60/m', 'ip': '120/m'},
+    'reject_participation': {'user': '60/m', 'ip': '120/m'},
+    'review_participations': {'user': '30/m', 'ip': '60/m'},
+    'meetup_create': {'user': '10/h', 'ip': '30/h'},
+    'meetup_update': {'user': '60/h', 'ip': '120/h'},
+    'meetup_delete': {'user': '30/h', 'ip': '60/h'},
+}
+RATE_LIMIT_CACHE_ALIAS = 'ratelimit'
+# Number of reverse proxies in front of the app that append the client
+# address to X-Forwarded-For (1 on Render); 0 uses REMOTE_ADDR
+RATE_LIMIT_PROXIES = int(os.getenv('RATE_LIMIT_PROXIES', '0'))
+
+
+# --- BACKGROUND TASKS & EMAIL ---
+# Tasks are queued in the database and run by worker processes
+# (manage.py run_tasks, see meetups.taskqueue), so requests never wait
+# for emails to be sent
+TASKS = {
+    'default': {
+        'BACKEND': 'meetups.taskqueue.DatabaseBackend',
+    },
+}
+# Scheme and host of links in emails, which have no request to build
+# them from
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000').rstrip('/')
+# Organizers get new participation requests in one email per interval
+NOTIFICATION_DIGEST_MINUTES = int(
+    os.getenv('NOTIFICATION_DIGEST_MINUTES', '15'))
+
+# Emails go to the console unless an SMTP server is configured
+EMAIL_HOST = os.getenv('EMAIL_HOST', '')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_BACKEND = (
+    'django.core.mail.backends.smtp.EmailBackend' if EMAIL_HOST
+    else 'django.core.mail.backends.console.EmailBackend'
+)
+DEFAULT_FROM_EMAIL = os.getenv(
+    'DEFAULT_FROM_EMAIL', 'MeetMeet <noreply@meetmeet.invalid>')
+
+
+# --- METRICS ---
+# Worker processes share their metrics through snapshot files in
+# METRICS_DIR; without it /metrics only reports the serving process
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Optional bearer token protecting /metrics
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+
+# --- QUERY BUDGETS ---
+# Every request is checked against its view's budget in development and
+# tests, where exceeding it also raises; production samples a fraction
+QUERY_BUDGET_SAMPLE_RATE = float(os.getenv(
+    'QUERY_BUDGET_SAMPLE_RATE', '1' if DEBUG or TESTING else '0.01'))
+QUERY_BUDGET_RAISE = os.getenv(
+    'QUERY_BUDGET_RAISE', str(DEBUG or TESTING)) == 'True'
+
 
 # --- AUTHENTICATION & ALLAUTH ---
 # allauth uses the Sites framework
@@ -1,6 +1,10 @@
 from django.contrib import admin
-from .models import Meetup, MeetupParticipation
+from .models import (
+    Meetup, MeetupParticipation, QueuedTask, RequestNotification,
+)
 
 # Models registrations
 admin.site.register(Meetup)
 admin.site.register(MeetupParticipation)
+admin.site.register(RequestNotification)
+admin.site.register(QueuedTask)
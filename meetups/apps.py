@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class MeetupsConfig(AppConfig):
     name = 'meetups'
+
+    def ready(self):
+        # Register signal handlers (participation counters, page cache,
+        # query tracking)
+        from . import signals  # noqa: F401
@@ -0,0 +1,32 @@
+"""
+Declarative per-view database query budgets.
+
+Class-based views set a query_budget attribute, function-based views use
+the @query_budget decorator. QueryBudgetMiddleware counts the queries a
+view runs (session and user loading included) and reports, or raises,
+when the budget is exceeded. Budgets are upper bounds that must hold for
+any amount of data, so N+1 patterns fail them as soon as a page shows
+more than a few rows.
+"""
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view runs more queries than its budget allows."""
+
+
+def query_budget(limit):
+    """Set the query budget of a function-based view."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def get_query_budget(view):
+    """Return the budget of a resolved view function, or None."""
+    budget = getattr(view, "query_budget", None)
+    if budget is None:
+        # as_view() functions carry their class
+        budget = getattr(
+            getattr(view, "view_class", None), "query_budget", None)
+    return budget
@@ -0,0 +1,62 @@
+"""
+Versioned cache keys for rendered meetup pages.
+
+Every cached page key embeds a version number for its scope: one global
+scope for the meetup list and one scope per meetup for its detail page.
+Signals bump the versions when meetups or participations change, so stale
+entries are never read again and simply expire from the backend.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+LIST_SCOPE = "list"
+
+
+def meetup_scope(pk):
+    """Cache scope of a single meetup's detail page."""
+    return f"meetup:{pk}"
+
+
+def _version_key(scope):
+    return f"meetups:version:{scope}"
+
+
+def get_version(scope):
+    """Return the current version of a scope, creating it if missing."""
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock, so a version lost on eviction or restart
+        # never repeats one that was handed out before
+        version = time.time_ns()
+        cache.add(key, version, timeout=None)
+        # Another process may have won the race to add it
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(scope):
+    """Invalidate every key of a scope by moving to a new version."""
+    key = _version_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+    cache.set(f"{key}:changed_at", time.time(), timeout=None)
+
+
+def get_changed_at(scope):
+    """
+    Return the UNIX time of the scope's last bump. If it was evicted,
+    "now" is returned, which is never older than a client's copy.
+    """
+    return cache.get(f"{_version_key(scope)}:changed_at") or time.time()
+
+
+def page_cache_key(scope, *parts):
+    """Build a versioned key for a rendered page within a scope."""
+    digest = hashlib.md5(
+        ":".join(str(part) for part in parts).encode()).hexdigest()
+    return f"meetups:page:{scope}:{get_version(scope)}:{digest}"
@@ -0,0 +1,147 @@
+"""
+"Near me" search over meetup coordinates, without a spatial database.
+
+A geohash interleaves longitude and latitude bits into a base32 string,
+so points sharing a prefix lie in the same rectangular cell. Meetups
+store the geohash of their coordinates in an indexed column (see
+Meetup.update_geohash), and a search (MeetupQuerySet.near):
+- covers the circle's bounding box with at most MAX_CELLS cells of one
+  precision,
+- selects candidates with one index range scan per cell, also bounded by
+  the box,
+- keeps those within the exact great-circle distance.
+
+This works the same on SQLite and plain PostgreSQL.
+"""
+import math
+
+from django.db.models import Q
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Stored precision: cells of about 5 x 5 metres
+PRECISION = 9
+
+# Most cells (index range scans) used to cover a search area
+MAX_CELLS = 16
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Return the geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True  # Bits alternate, starting with longitude
+    while len(chars) < precision:
+        interval, coordinate = (
+            (lon_range, longitude) if even else (lat_range, latitude))
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Return the (latitude, longitude) size in degrees of a cell."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** (bits - bits // 2)
+
+
+def prefix_range(prefix):
+    """
+    Return the (lower, upper) bounds of the geohashes starting with
+    prefix, so that lower <= geohash < upper. upper is None when no
+    geohash sorts after the prefix.
+    """
+    chars = prefix
+    while chars:
+        position = BASE32.index(chars[-1])
+        if position < len(BASE32) - 1:
+            return prefix, chars[:-1] + BASE32[position + 1]
+        chars = chars[:-1]
+    return prefix, None
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle (haversine) distance between two points."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(longitude2 - longitude1) / 2
+    a = (math.sin(half_dphi) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return (min_lat, min_lon, max_lat, max_lon) enclosing the circle.
+    Longitudes may extend past +-180 when the circle crosses the
+    antimeridian; near a pole the box spans every longitude.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - dlat, latitude + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    dlon = math.degrees(math.asin(
+        min(1.0, math.sin(radius_km / EARTH_RADIUS_KM)
+            / math.cos(math.radians(latitude)))))
+    if dlon >= 180:
+        return min_lat, -180.0, max_lat, 180.0
+    return min_lat, longitude - dlon, max_lat, longitude + dlon
+
+
+def cover(box, max_cells=MAX_CELLS):
+    """
+    Return the sorted geohash prefixes of the cells covering a box, at
+    the finest precision that needs no more than max_cells of them.
+    """
+    min_lat, min_lon, max_lat, max_lon = box
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(math.floor((min_lat + 90) / height),
+                     math.floor((max_lat + 90) / height) + 1)
+        columns = range(math.floor((min_lon + 180) / width),
+                        math.floor((max_lon + 180) / width) + 1)
+        if len(rows) * len(columns) <= max_cells or precision == 1:
+            break
+    total_rows = round(180 / height)
+    total_columns = round(360 / width)
+    # Encode each cell's centre; columns wrap around the antimeridian
+    return sorted({
+        encode(-90 + (min(row, total_rows - 1) + 0.5) * height,
+               -180 + (column % total_columns + 0.5) * width, precision)
+        for row in rows
+        for column in columns
+    })
+
+
+def box_filter(box):
+    """
+    Q selecting the meetups inside a box: one geohash range per covering
+    cell, so the index prunes candidates, plus the box's own bounds.
+    """
+    cells = Q()
+    for prefix in cover(box):
+        lower, upper = prefix_range(prefix)
+        if upper is None:
+            cells |= Q(geohash__gte=lower)
+        else:
+            cells |= Q(geohash__gte=lower, geohash__lt=upper)
+    min_lat, min_lon, max_lat, max_lon = box
+    condition = cells & Q(latitude__range=(min_lat, max_lat))
+    if -180 <= min_lon and max_lon <= 180:
+        condition &= Q(longitude__range=(min_lon, max_lon))
+    return condition
@@ -0,0 +1,111 @@
+"""
+iCalendar (RFC 5545) feeds of meetups, for calendar app subscriptions.
+
+Feeds are rendered as a stream: events are formatted one by one from a
+queryset iterator and sent in chunks of CHUNK_SIZE events, so memory use
+stays flat however many meetups a feed holds. Personal feeds are
+addressed by a signed token instead of a session, since calendar apps
+subscribe to a bare URL.
+"""
+from datetime import timezone as dt_timezone
+
+from django.core import signing
+
+# Events fetched per database round trip and sent per response chunk
+CHUNK_SIZE = 500
+
+# Content lines longer than this many octets must be folded
+LINE_LIMIT = 75
+
+TOKEN_SALT = "meetups.ical.feed"
+
+
+def feed_token(user):
+    """Signed token identifying a user's personal feed."""
+    return signing.Signer(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def user_id_from_token(token):
+    """Return the user ID of a feed token, or raise signing.BadSignature."""
+    return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+
+
+def escape_text(value):
+    """Escape a TEXT property value."""
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
+    )
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def fold(line):
+    """
+    Terminate a content line with CRLF, folding it into continuation
+    lines of at most LINE_LIMIT octets without splitting UTF-8 characters.
+    """
+    encoded = line.encode()
+    if len(encoded) <= LINE_LIMIT:
+        return line + "\r\n"
+    parts = []
+    # Continuation lines start with a space, which counts to their limit
+    limit = LINE_LIMIT
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = LINE_LIMIT - 1
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_event(meetup, url, domain, status="CONFIRMED"):
+    """Render one meetup as a VEVENT block."""
+    description = meetup.description
+    if meetup.online_link:
+        description += f"\n\nJoin online: {meetup.online_link}"
+    description += f"\n\n{url}"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:meetup-{meetup.pk}@{domain}",
+        f"DTSTAMP:{format_datetime(meetup.updated_at)}",
+        f"LAST-MODIFIED:{format_datetime(meetup.updated_at)}",
+        f"DTSTART:{format_datetime(meetup.start_datetime)}",
+        f"DTEND:{format_datetime(meetup.end_datetime)}",
+        f"SUMMARY:{escape_text(meetup.title)}",
+        f"DESCRIPTION:{escape_text(description)}",
+        f"LOCATION:{escape_text(meetup.location_text)}",
+        f"URL:{url}",
+        f"STATUS:{status}",
+        "END:VEVENT",
+    ]
+    return "".join(fold(line) for line in lines)
+
+
+def stream_calendar(name, events, refresh_minutes):
+    """
+    Yield a VCALENDAR in chunks, from an iterable of rendered VEVENTs.
+    The refresh interval tells clients how often to poll.
+    """
+    yield "".join(fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//MeetMeet//Meetups//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        f"REFRESH-INTERVAL;VALUE=DURATION:PT{refresh_minutes}M",
+        f"X-PUBLISHED-TTL:PT{refresh_minutes}M",
+    ])
+    chunk = []
+    for event in events:
+        chunk.append(event)
+        if len(chunk) >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk.clear()
+    chunk.append(fold("END:VCALENDAR"))
+    yield "".join(chunk)
@@ -1,55 +1,7 @@
-# Creates test users and realistic meetups
-# for local testing & after Render free DB resets
-
-# run:
-# python manage.py shell
-# exec(open('seed_test_data.py', encoding='utf-8').read())
-
-from datetime import timedelta
-from django.contrib.auth.models import User
-from django.utils import timezone
-import random
-
-APP_NAME = "meetups"
-
-try:
-    Meetup = __import__(f"{APP_NAME}.models", fromlist=["Meetup"]).Meetup
-except (ImportError, AttributeError):
-    print("Could not import Meetup model. Check APP_NAME.")
-    raise
-
-now = timezone.now()
-print(f"Current time: {now}")
-
-# Clean previous test data
-User.objects.filter(username__startswith="testuser_").delete()
-print("Previous test data deleted")
-
-users = []
-
-names = ["Noah", "Liam", "Olivia", "Amelia", "Mia",
-         "Sophia", "Charlotte", "Ava", "Emma", "Luna", "Aria"]
-
-# Populating Users
-for i in range(1, 11):
-    username = "testuser_" + names[i]
-    email = username + "@example.invalid"
-
-    user, created = User.objects.get_or_create(
-        username=username,
-        defaults={"email": email, "is_staff": False, "is_superuser": False},
-    )
-    if created or user.password == "":
-        user.set_password(username)
-        user.save()
-        print(f"Created/updated: {username} pass: {username}")
-
-    users.append(user)
-
-organizers = users[1:]
+"""Event templates (title, description, location) used by seed_meetups."""
 
 # Meetup titles and descriptions pool
-base_events = [
+EVENTS = [
     ("Python coders hangout", "Casual evening — bring your laptop or ideas",
      "Code Cafe on Vorbergstraße"),
     ("Morning trail run 8-12 km",
@@ -196,55 +148,19 @@ base_events = [
     ),
 ]
 
-
-created_count = 0
-
-# Populating Meetups
-for _ in range(35):
-    organizer = random.choice(organizers)
-
-    title_base, desc, location = random.choice(base_events)
-
-    variation = random.choice([
-        ".", " vol.2.", " spring '26.", " #3.", " reloaded.",
-        " - bigger edition.", " meetup.", " gathering.", " session.",
-    ])
-
-    if random.random() < 0.70:
-        variation = "."
-    else:
-        # 30% chance to pick one of the "fancy" titles
-        variation = random.choice(
-            [" vol.2.", " #3.", " reloaded.", " meetup."])
-
-    title = f"{title_base}{variation}"
-
-    days_offset = random.triangular(-60, 90, mode=10)
-    hours_offset = random.randint(-12, 36)
-
-    start = now + timedelta(days=days_offset, hours=hours_offset)
-
-    is_open = random.random() < 0.7
-
-    max_part = None
-    if random.random() < 0.6:
-        max_part = random.choice([6, 8, 10, 12, 15, 18, 22, 30, 40, 60])
-
-    duration_minutes = random.choice(
-        [60, 80, 120, 150, 180, 220, 300, 400, 600, 1000])
-
-    Meetup.objects.create(
-        organizer=organizer,
-        title=title,
-        description=desc,
-        location_text=location,
-        duration_minutes=duration_minutes,
-        max_participants=max_part,
-        is_open=is_open,
-        start_datetime=start,
-        # created_at / updated_at = auto
-    )
-    created_count += 1
-
-
-print(f"\nCreated {len(users)} users + {created_count} meetups.")
+TITLE_VARIATIONS = [" vol.2.", " #3.", " reloaded.", " meetup."]
+
+NAMES = ["Noah", "Liam", "Olivia", "Amelia", "Mia", "Sophia", "Charlotte",
+         "Ava", "Emma", "Luna", "Aria"]
+
+# City centres (latitude, longitude) that seeded coordinates cluster around
+CITIES = [
+    (52.5200, 13.4050),   # Berlin
+    (48.1351, 11.5820),   # Munich
+    (53.5511, 9.9937),    # Hamburg
+    (50.9375, 6.9603),    # Cologne
+    (51.5074, -0.1278),   # London
+    (48.8566, 2.3522),    # Paris
+    (40.7128, -74.0060),  # New York
+    (35.6762, 139.6503),  # Tokyo
+]
@@ -0,0 +1,398 @@
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.tasks.signals import task_enqueued
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from meetups.models import (
+    Meetup, MeetupParticipation, QueuedTask, RequestNotification,
+)
+from meetups.pagination import CursorPaginator
+from meetups.taskqueue import DatabaseBackend
+from meetups.views import MeetupsListView
+
+BENCH_PREFIX = "benchmark_"
+SESSION_TABLE = "django_session"
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+
+class Command(BaseCommand):
+    """
+    Measure latency, throughput and query counts of the main request paths
+    in-process, against the data in the database (optionally seeded first
+    with seed_meetups).
+
+    Results are written as JSON. Given a --compare baseline, scenarios
+    whose p50 latency grew beyond --threshold, or whose query count grew
+    at all, are reported as regressions and the command fails.
+
+    Write scenarios commit for real and undo their changes afterwards,
+    so they include commit time; the users they need are created with
+    the "benchmark_" prefix and removed at the end, along with the
+    notification tasks and request notifications the scenarios queued.
+
+    Queries on the session table are also counted on their own, so runs
+    with different --session-mode values show what each mode saves.
+    """
+    help = ("Benchmark the meetup list, detail, near me, toggle and "
+            "approve paths.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=100,
+            help="Measured requests per scenario.")
+        parser.add_argument(
+            "--warmup", type=int, default=5,
+            help="Unmeasured requests per scenario.")
+        parser.add_argument(
+            "--deep-page", type=int, default=200,
+            help="Page number used for the deep list scenarios.")
+        parser.add_argument(
+            "--cache", choices=["on", "off"], default="off",
+            help="Use the configured cache, or disable page caching "
+                 "(default) to measure rendering and queries.")
+        parser.add_argument(
+            "--session-mode", choices=sorted(settings.SESSION_ENGINES),
+            default=settings.SESSION_MODE,
+            help="Session storage to measure with (default: SESSION_MODE).")
+        parser.add_argument(
+            "--only", action="append",
+            help="Run only scenarios whose name starts with this.")
+        parser.add_argument(
+            "--output", default="benchmark.json",
+            help="File the JSON results are written to.")
+        parser.add_argument(
+            "--compare",
+            help="Earlier results file to compare against.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Allowed relative p50 latency growth before a scenario "
+                 "counts as a regression.")
+        parser.add_argument(
+            "--seed-meetups", type=int,
+            help="Seed this many meetups first (replacing earlier seeded "
+                 "data), with one user per 10 meetups.")
+        parser.add_argument(
+            "--seed-participations", type=int, default=10,
+            help="Average participations per meetup when seeding.")
+        parser.add_argument(
+            "--seed-coordinates", type=float, default=0.5,
+            help="Fraction of meetups given coordinates when seeding.")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("--iterations must be at least 2.")
+        if options["seed_meetups"]:
+            call_command(
+                "seed_meetups", clear=True,
+                meetups=options["seed_meetups"],
+                users=max(100, options["seed_meetups"] // 10),
+                participations=options["seed_participations"],
+                coordinates=options["seed_coordinates"],
+                stdout=self.stdout,
+            )
+        if not Meetup.objects.exists():
+            raise CommandError(
+                "No meetups to benchmark, run seed_meetups or pass "
+                "--seed-meetups.")
+
+        self.options = options
+        caches = settings.CACHES
+        if options["cache"] == "off":
+            # Sessions keep their cache, only page caching is disabled
+            caches = {**caches, **DUMMY_CACHES}
+        # Write scenarios repeat one user's requests far beyond any limit
+        with override_settings(
+                CACHES=caches,
+                RATE_LIMITS={},
+                SESSION_ENGINE=settings.SESSION_ENGINES[
+                    options["session_mode"]]):
+            self.create_bench_users()
+            self.queued_tasks = []
+            task_enqueued.connect(self.record_queued_task)
+            try:
+                results = self.run_scenarios()
+            finally:
+                task_enqueued.disconnect(self.record_queued_task)
+                self.clean_up()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "cache": options["cache"],
+                "session_mode": options["session_mode"],
+                "iterations": options["iterations"],
+                "meetups": Meetup.objects.count(),
+                "participations": MeetupParticipation.objects.count(),
+            },
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options["compare"]:
+            self.compare(results, options["compare"], options["threshold"])
+
+    # Setup
+
+    def client(self, user=None):
+        # Any host the deployment accepts, the test "testserver" may not be
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != "*"),
+            "localhost")
+        client = Client(HTTP_HOST="bench" + host if host.startswith(".")
+                        else host)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def create_bench_users(self):
+        User = get_user_model()
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        self.bench_users = User.objects.bulk_create([
+            User(username=f"{BENCH_PREFIX}{i}") for i in range(21)
+        ])
+
+    def record_queued_task(self, sender, task_result, **kwargs):
+        # Only the database backend leaves rows behind
+        if issubclass(sender, DatabaseBackend):
+            self.queued_tasks.append(int(task_result.id))
+
+    def clean_up(self):
+        """Delete the benchmark users and what their requests queued."""
+        for start in range(0, len(self.queued_tasks), 1000):
+            QueuedTask.objects.filter(
+                pk__in=self.queued_tasks[start:start + 1000]).delete()
+        RequestNotification.objects.filter(
+            participation__user__username__startswith=BENCH_PREFIX).delete()
+        get_user_model().objects.filter(
+            username__startswith=BENCH_PREFIX).delete()
+
+    def deep_cursor(self, segments):
+        """Cursor of the --deep-page page, without walking the pages."""
+        paginator = CursorPaginator(segments, MeetupsListView.paginate_by)
+        offset = (self.options["deep_page"] - 1) * paginator.per_page - 1
+        for index, queryset in enumerate(segments):
+            count = queryset.count()
+            if offset < count:
+                return paginator.encode_cursor(index, queryset[offset])
+            offset -= count
+        raise CommandError(
+            f"The dataset has less than {self.options['deep_page']} pages, "
+            "lower --deep-page.")
+
+    def popular_meetup(self):
+        return Meetup.objects.select_related("organizer").order_by(
+            F("going_count") + F("pending_count")).last()
+
+    def free_meetup(self, is_open):
+        """An upcoming meetup with room for all benchmark users."""
+        meetup = Meetup.objects.filter(
+            is_open=is_open,
+            max_participants__isnull=True,
+            start_datetime__gt=timezone.now(),
+        ).order_by("pk").first()
+        if meetup is None:
+            raise CommandError(
+                f"No upcoming {'open' if is_open else 'closed'} meetup "
+                "without a participant limit to benchmark with.")
+        return meetup
+
+    # Scenarios
+
+    def run_scenarios(self):
+        popular = self.popular_meetup()
+        organizer = popular.organizer
+        anonymous = self.client()
+        signed_in = self.client(organizer)
+        list_url = reverse("meetup_list")
+        detail_url = reverse("meetup_detail", kwargs={"pk": popular.pk})
+
+        # The list view builds the organizer's segments for the deep cursor
+        view = MeetupsListView()
+        request = RequestFactory().get(list_url)
+        request.user = organizer
+        view.setup(request)
+        queryset = view.get_queryset()
+
+        scenarios = {
+            "list_anonymous_first": (anonymous, list_url, {}),
+            "list_anonymous_deep": (
+                anonymous, list_url,
+                {"cursor": self.deep_cursor([queryset])}),
+            "list_authenticated_first": (signed_in, list_url, {}),
+            "list_authenticated_deep": (
+                signed_in, list_url,
+                {"cursor": self.deep_cursor(view.get_segments(queryset))}),
+            "detail_popular_anonymous": (anonymous, detail_url, {}),
+            "detail_popular_organizer": (signed_in, detail_url, {}),
+        }
+
+        # "Near me" around a located meetup, when the data has any
+        located = Meetup.objects.filter(
+            latitude__isnull=False).order_by("pk").first()
+        if located is not None:
+            scenarios["near_me_25km"] = (
+                anonymous, reverse("meetup_near"),
+                {"lat": located.latitude, "lon": located.longitude,
+                 "radius": 25})
+        elif self.selected("near_me_25km"):
+            self.stdout.write(
+                "Skipping near_me_25km: no meetup has coordinates, seed "
+                "with --seed-coordinates.")
+
+        results = {}
+        for name, (client, url, data) in scenarios.items():
+            if self.selected(name):
+                results[name] = self.measure(
+                    name, self.get_scenario(client, url, data))
+        for name, scenario in (
+                ("toggle_participation", self.toggle_scenario),
+                ("approve_participation", self.approve_scenario),
+                ("review_participations_20", self.review_scenario)):
+            if self.selected(name):
+                results[name] = self.measure(name, scenario())
+        return results
+
+    def selected(self, name):
+        only = self.options["only"]
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    def get_scenario(self, client, url, data):
+        return lambda: self.timed(lambda: client.get(url, data))
+
+    def timed(self, send):
+        """Send one request, return (seconds, queries, session queries)."""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send()
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise CommandError(
+                f"Request failed with status {response.status_code}.")
+        session_queries = sum(
+            SESSION_TABLE in query["sql"] for query in queries)
+        return elapsed, len(queries), session_queries
+
+    def toggle_scenario(self):
+        """Join and leave an open meetup, each a measured request."""
+        meetup = self.free_meetup(is_open=True)
+        client = self.client(self.bench_users[0])
+        url = reverse("toggle_participation", kwargs={"pk": meetup.pk})
+        return lambda: self.timed(lambda: client.post(url))
+
+    def approve_scenario(self):
+        """Approve one pending request, then withdraw it (not measured)."""
+        meetup = self.free_meetup(is_open=False)
+        client = self.client(meetup.organizer)
+        user = self.bench_users[0]
+
+        def run():
+            participation = MeetupParticipation.objects.create(
+                meetup=meetup, user=user)
+            url = reverse(
+                "approve_participation", kwargs={"pk": participation.pk})
+            try:
+                return self.timed(lambda: client.get(url))
+            finally:
+                # Reload, so the delete releases the status it now has
+                MeetupParticipation.objects.get(pk=participation.pk).delete()
+        return run
+
+    def review_scenario(self):
+        """Bulk approve 20 pending requests, then withdraw them."""
+        meetup = self.free_meetup(is_open=False)
+        client = self.client(meetup.organizer)
+        url = reverse("review_participations", kwargs={"pk": meetup.pk})
+
+        def run():
+            participations = [
+                MeetupParticipation.objects.create(meetup=meetup, user=user)
+                for user in self.bench_users[1:]
+            ]
+            data = {
+                "participation": [p.pk for p in participations],
+                "action": "approve",
+            }
+            try:
+                return self.timed(lambda: client.post(url, data))
+            finally:
+                for participation in MeetupParticipation.objects.filter(
+                        pk__in=data["participation"]):
+                    participation.delete()
+        return run
+
+    # Reporting
+
+    def measure(self, name, run):
+        for _ in range(self.options["warmup"]):
+            run()
+        samples = [run() for _ in range(self.options["iterations"])]
+        latencies = [elapsed for elapsed, _, _ in samples]
+        queries = [count for _, count, _ in samples]
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        result = {
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p95_ms": round(cuts[94] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+            "requests_per_second": round(len(latencies) / sum(latencies), 1),
+            "queries_median": statistics.median(queries),
+            "queries_max": max(queries),
+            "session_queries_median": statistics.median(
+                count for _, _, count in samples),
+        }
+        self.stdout.write(
+            f"{name:<28} p50 {result['p50_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  "
+            f"{result['requests_per_second']:>8.1f} req/s  "
+            f"queries {result['queries_median']:g} "
+            f"(max {result['queries_max']}, "
+            f"session {result['session_queries_median']:g})")
+        return result
+
+    def compare(self, results, baseline_path, threshold):
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read baseline {baseline_path}: {e}")
+
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = result["p50_ms"] / before["p50_ms"] - 1
+            line = (f"{name:<28} p50 {before['p50_ms']:.2f} -> "
+                    f"{result['p50_ms']:.2f} ms ({change:+.0%}), queries "
+                    f"{before['queries_max']} -> {result['queries_max']}")
+            if (change > threshold or
+                    result["queries_max"] > before["queries_max"]):
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
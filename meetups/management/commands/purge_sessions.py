@@ -0,0 +1,59 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Delete expired sessions from the database in batches.
+    Unlike clearsessions, which removes them all in one DELETE, every
+    batch is its own short statement, so a large backlog of expired rows
+    never locks the session table for long. Cached copies of cached_db
+    sessions expire from the cache by themselves.
+    """
+    help = "Delete expired database sessions in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sessions deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, "get_model_class"):
+            self.stdout.write(
+                f"Sessions are not stored in the database "
+                f"(SESSION_ENGINE is {settings.SESSION_ENGINE}), "
+                f"nothing to purge.")
+            return
+
+        expired = store.get_model_class().objects.filter(
+            expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.values_list(
+                "session_key", flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += expired.filter(session_key__in=keys).delete()[0]
+            if len(keys) < batch_size:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired session(s)."))
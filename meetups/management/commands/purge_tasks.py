@@ -0,0 +1,70 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from meetups.models import QueuedTask, RequestNotification
+
+
+class Command(BaseCommand):
+    """
+    Delete finished background tasks and sent request notifications
+    older than --days, in batches like purge_sessions, so a large backlog
+    never locks the tables for long. Tasks still to run, running tasks
+    and notifications awaiting their digest are kept.
+    """
+    help = "Delete old finished tasks and sent notifications in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=7,
+            help="Keep rows finished or sent within this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        tasks = self.purge(
+            QueuedTask.objects.filter(
+                status__in=[QueuedTask.Status.SUCCESSFUL,
+                            QueuedTask.Status.FAILED],
+                finished_at__lt=cutoff,
+            ),
+            options,
+        )
+        notifications = self.purge(
+            RequestNotification.objects.filter(sent_at__lt=cutoff), options)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {tasks} finished task(s) and {notifications} sent "
+            f"notification(s)."))
+
+    def purge(self, rows, options):
+        batch_size = options["batch_size"]
+        # Oldest first, along the primary key
+        rows = rows.order_by("pk")
+        deleted = 0
+        while True:
+            pks = list(rows.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            deleted += rows.filter(pk__in=pks).delete()[0]
+            if len(pks) < batch_size:
+                break
+            time.sleep(options["sleep"])
+        return deleted
@@ -0,0 +1,108 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+from django.tasks import task_backends
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from meetups.taskqueue import DatabaseBackend
+
+logger = logging.getLogger("meetups.taskqueue")
+
+
+class Command(BaseCommand):
+    """
+    Worker running the background tasks queued in the database (see
+    meetups.taskqueue), one at a time, polling for new ones when the
+    queue is empty. Any number of workers can run side by side.
+
+    Like request handling, the worker drops broken or expired database
+    connections before each task, and database errors are logged and
+    retried after --interval rather than ending the process. Whenever
+    the queue is empty, tasks RUNNING for longer than --stale-after
+    (their worker died) are marked FAILED.
+    """
+    help = "Run background tasks queued in the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            default="default",
+            help="Alias of the task backend in TASKS.",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Queue to run tasks from, may be repeated "
+                 "(default: all of the backend's queues).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=600,
+            help="Seconds after which a RUNNING task is considered lost.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no task is due, instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        backend = task_backends[options["backend"]]
+        if not isinstance(backend, DatabaseBackend):
+            raise CommandError(
+                f"Task backend {options['backend']!r} does not queue tasks "
+                f"in the database.")
+        queues = options["queues"]
+        unknown = set(queues or ()) - backend.queues
+        if unknown:
+            raise CommandError(f"Unknown queue(s): {', '.join(unknown)}.")
+
+        worker_id = get_random_string(32)
+        stale_after = timedelta(seconds=options["stale_after"])
+        ran = 0
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    row = backend.claim(worker_id, queues)
+                    if row is None:
+                        failed = backend.fail_stale(
+                            timezone.now() - stale_after)
+                        if failed:
+                            logger.warning(
+                                "Failed %d task(s) left running by a lost "
+                                "worker.", failed)
+                    else:
+                        backend.run(row)
+                except DatabaseError:
+                    # A task caught here stays RUNNING until fail_stale()
+                    logger.exception(
+                        "Database error in task worker %s, retrying in "
+                        "%ss.", worker_id, options["interval"])
+                    time.sleep(options["interval"])
+                    continue
+
+                if row is None:
+                    if options["burst"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                ran += 1
+                if options["verbosity"] > 1:
+                    self.stdout.write(
+                        f"{row.task_path} [{row.pk}]: {row.status}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} task(s)."))
@@ -0,0 +1,272 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from meetups.cache import LIST_SCOPE, bump_version
+from meetups.models import Meetup, MeetupParticipation, RequestNotification
+
+from ._seed_events import CITIES, EVENTS, NAMES, TITLE_VARIATIONS
+
+Status = MeetupParticipation.Status
+
+
+class Command(BaseCommand):
+    """
+    Generate users, meetups and participations for development and
+    performance work, e.g. a 1M meetup / 10M participation dataset.
+
+    Rows are built and inserted batch by batch, so memory stays bounded by
+    --batch-size (plus one integer per seeded user). Users and meetups go
+    through bulk_create; participations, the bulk of the rows, through
+    multi-row INSERTs of plain tuples. Meetup counters are computed while
+    generating and written directly, and the same --seed always produces
+    the same data.
+    """
+    help = "Seed the database with test users, meetups and participations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=10,
+            help="Number of users to create.")
+        parser.add_argument(
+            "--meetups", type=int, default=35,
+            help="Number of meetups to create.")
+        parser.add_argument(
+            "--participations", type=int, default=5,
+            help="Average number of participations per meetup.")
+        parser.add_argument(
+            "--status-mix", default="going=70,pending=20,not_going=10",
+            help="Relative weights of participation statuses, "
+                 "e.g. 'going=70,pending=20,not_going=10'.")
+        parser.add_argument(
+            "--coordinates", type=float, default=0,
+            help="Fraction of meetups given coordinates, scattered within "
+                 "about 30 km of a few city centres.")
+        parser.add_argument(
+            "--seed", type=int, default=42,
+            help="Random seed, the same seed generates the same data.")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Number of meetups generated and inserted per batch.")
+        parser.add_argument(
+            "--prefix", default="testuser_",
+            help="Username prefix of the generated users.")
+        parser.add_argument(
+            "--password", default="password",
+            help="Password of every generated user.")
+        parser.add_argument(
+            "--clear", action="store_true",
+            help="Delete users with the prefix and their data first.")
+
+    def parse_status_mix(self, value):
+        statuses, weights = [], []
+        try:
+            for part in value.split(","):
+                name, weight = part.split("=")
+                statuses.append(Status(name.strip()))
+                weights.append(float(weight))
+        except ValueError:
+            raise CommandError(
+                f"Invalid --status-mix {value!r}, expected e.g. "
+                f"'going=70,pending=20' with statuses from: "
+                f"{', '.join(Status.values)}.")
+        if sum(weights) <= 0:
+            raise CommandError("--status-mix weights must not all be zero.")
+        return statuses, weights
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--users and --batch-size must be positive.")
+        if not 0 <= options["coordinates"] <= 1:
+            raise CommandError("--coordinates must be between 0 and 1.")
+        self.coordinates = options["coordinates"]
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        # Every participation shares the same timestamp, adapt it once
+        self.db_now = connection.ops.adapt_datetimefield_value(self.now)
+        self.statuses, self.weights = self.parse_status_mix(
+            options["status_mix"])
+
+        if options["clear"]:
+            self.clear(options["prefix"])
+        user_ids = self.create_users(options)
+
+        created = participations = 0
+        total = options["meetups"]
+        while created < total:
+            size = min(options["batch_size"], total - created)
+            participations += self.create_batch(
+                user_ids, size, options["participations"])
+            created += size
+            self.stdout.write(f"{created}/{total} meetups")
+
+        # Bulk inserts send no signals, so drop cached list pages here
+        bump_version(LIST_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} users, {created} meetups and "
+            f"{participations} participations."))
+
+    def clear(self, prefix):
+        """
+        Remove earlier seeded users with their meetups, participations
+        and request notifications. Seeded meetups are deleted with raw
+        DELETEs: their rows need no
+        signal handling, and loading millions of objects would not fit.
+        """
+        User = get_user_model()
+        users = User.objects.filter(username__startswith=prefix)
+        with transaction.atomic():
+            meetups = Meetup.objects.filter(organizer__in=users)
+            # Requests of real users to join seeded meetups
+            notifications = RequestNotification.objects.filter(
+                participation__meetup__in=meetups)
+            notifications._raw_delete(notifications.db)
+            participations = MeetupParticipation.objects.filter(
+                meetup__in=meetups)
+            participations._raw_delete(participations.db)
+            meetups._raw_delete(meetups.db)
+            # Regular deletes keep counters of other meetups in sync
+            MeetupParticipation.objects.filter(user__in=users).delete()
+            count, _ = users.delete()
+        self.stdout.write(f"Deleted earlier seeded data ({count} rows).")
+
+    def create_users(self, options):
+        User = get_user_model()
+        # Hashing is slow by design: hash once, share it between users
+        password = make_password(options["password"])
+        user_ids = []
+        for start in range(0, options["users"], options["batch_size"]):
+            stop = min(start + options["batch_size"], options["users"])
+            users = User.objects.bulk_create([
+                User(
+                    username=f"{options['prefix']}{NAMES[i % len(NAMES)]}{i}",
+                    email=f"{options['prefix']}{i}@example.invalid",
+                    password=password,
+                )
+                for i in range(start, stop)
+            ])
+            user_ids.extend(user.pk for user in users)
+        return user_ids
+
+    def create_batch(self, user_ids, size, mean_participations):
+        """Insert one batch of meetups with their participations."""
+        rng = self.rng
+        meetups, batch_participations = [], []
+        for _ in range(size):
+            meetup = self.build_meetup(user_ids)
+            participations = self.build_participations(
+                meetup, user_ids,
+                rng.randint(0, 2 * mean_participations))
+            meetups.append(meetup)
+            batch_participations.append(participations)
+
+        with transaction.atomic():
+            Meetup.objects.bulk_create(meetups)
+            rows = [
+                (user_id, meetup.pk, status, self.db_now,
+                 self.db_now if approved else None)
+                for meetup, participations in zip(
+                    meetups, batch_participations)
+                for user_id, status, approved in participations
+            ]
+            self.insert_participations(rows)
+        return len(rows)
+
+    def insert_participations(self, rows):
+        """
+        Insert (user, meetup, status, requested_at, approved_at) tuples with
+        multi-row INSERTs. bulk_create prepares every value of every model
+        instance, which made up most of the seeding time for these rows.
+        """
+        meta = MeetupParticipation._meta
+        columns = [
+            meta.get_field(name).column for name in
+            ("user", "meetup", "status", "requested_at", "approved_at")
+        ]
+        quote = connection.ops.quote_name
+        per_statement = min(
+            1000, connection.ops.bulk_batch_size(columns, rows) or 1000)
+        row_sql = "({})".format(", ".join(["%s"] * len(columns)))
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), per_statement):
+                chunk = rows[start:start + per_statement]
+                cursor.execute(
+                    "INSERT INTO {} ({}) VALUES {}".format(
+                        quote(meta.db_table),
+                        ", ".join(quote(column) for column in columns),
+                        ", ".join([row_sql] * len(chunk)),
+                    ),
+                    [value for row in chunk for value in row],
+                )
+
+    def build_meetup(self, user_ids):
+        rng = self.rng
+        title, description, location = rng.choice(EVENTS)
+        # 30% chance to pick one of the "fancy" titles
+        variation = (
+            rng.choice(TITLE_VARIATIONS) if rng.random() >= 0.7 else ".")
+        start = self.now + timedelta(
+            days=rng.triangular(-60, 90, 10), hours=rng.randint(-12, 36))
+        latitude = longitude = None
+        # Only draw when asked, so earlier seeds keep generating the same data
+        if self.coordinates and rng.random() < self.coordinates:
+            latitude, longitude = rng.choice(CITIES)
+            # Normally spread, 0.1 degrees of latitude is about 11 km
+            latitude += rng.gauss(0, 0.1)
+            longitude += rng.gauss(0, 0.1) / math.cos(math.radians(latitude))
+        return Meetup(
+            organizer_id=rng.choice(user_ids),
+            title=f"{title}{variation}",
+            description=description,
+            location_text=location,
+            duration_minutes=rng.choice(
+                [60, 80, 120, 150, 180, 220, 300, 400, 600, 1000]),
+            max_participants=(
+                rng.choice([6, 8, 10, 12, 15, 18, 22, 30, 40, 60])
+                if rng.random() < 0.6 else None),
+            is_open=rng.random() < 0.7,
+            start_datetime=start,
+            latitude=latitude,
+            longitude=longitude,
+        )
+
+    def build_participations(self, meetup, user_ids, count):
+        """
+        Draw (user_id, status, approved) participations with the status
+        mix, kept consistent with the meetup: open meetups have no pending
+        requests, only full open meetups have a waitlist, and going beyond
+        capacity becomes pending (or waitlisted, for open meetups). Sets
+        the meetup's counters to match.
+        """
+        rng = self.rng
+        candidates = [
+            user_id for user_id in rng.sample(
+                user_ids, min(count + 1, len(user_ids)))
+            if user_id != meetup.organizer_id
+        ][:count]
+        participations = []
+        for user_id in candidates:
+            status = rng.choices(self.statuses, self.weights)[0]
+            if status == Status.WAITLISTED and not (
+                    meetup.is_open and meetup.is_full()):
+                status = Status.GOING
+            if status == Status.PENDING and meetup.is_open:
+                status = Status.GOING
+            if status == Status.GOING and meetup.is_full():
+                status = (Status.WAITLISTED if meetup.is_open
+                          else Status.PENDING)
+            if status == Status.GOING:
+                meetup.going_count += 1
+            elif status == Status.PENDING:
+                meetup.pending_count += 1
+            approved = status == Status.GOING and not meetup.is_open
+            participations.append((user_id, status.value, approved))
+        if participations:
+            meetup.participations_changed_at = self.now
+        return participations
@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from meetups.models import Meetup, MeetupParticipation
+
+
+class Command(BaseCommand):
+    """
+    Rebuild or verify the denormalized going/pending counters on Meetup.
+    Works through the table in primary key batches to keep locks short.
+    """
+    help = "Rebuild (or with --check, verify) Meetup participation counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatches, exit with an error if any exist.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of meetups processed per transaction.",
+        )
+
+    @staticmethod
+    def count_subquery(status):
+        """Correlated COUNT of a meetup's participations in a status."""
+        counts = (
+            MeetupParticipation.objects
+            .filter(meetup=OuterRef("pk"), status=status)
+            .order_by()
+            .values("meetup")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    def handle(self, *args, **options):
+        check_only = options["check"]
+        batch_size = options["batch_size"]
+        mismatched = 0
+        last_pk = 0
+
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Meetup.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .annotate(
+                        actual_going=Count("participations", filter=Q(
+                            participations__status=(
+                                MeetupParticipation.Status.GOING))),
+                        actual_pending=Count("participations", filter=Q(
+                            participations__status=(
+                                MeetupParticipation.Status.PENDING))),
+                    )
+                    .values("pk", "going_count", "pending_count",
+                            "actual_going", "actual_pending")[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1]["pk"]
+
+                stale = []
+                for row in batch:
+                    if (row["going_count"] == row["actual_going"] and
+                            row["pending_count"] == row["actual_pending"]):
+                        continue
+                    mismatched += 1
+                    self.stdout.write(
+                        f"Meetup {row['pk']}: going {row['going_count']} -> "
+                        f"{row['actual_going']}, pending "
+                        f"{row['pending_count']} -> {row['actual_pending']}"
+                    )
+                    stale.append(row["pk"])
+
+                if stale and not check_only:
+                    # Recount inside the UPDATE itself, so changes made
+                    # since the batch was read are not overwritten
+                    Meetup.objects.filter(pk__in=stale).update(
+                        going_count=self.count_subquery(
+                            MeetupParticipation.Status.GOING),
+                        pending_count=self.count_subquery(
+                            MeetupParticipation.Status.PENDING),
+                    )
+
+        if check_only and mismatched:
+            raise CommandError(f"{mismatched} meetup(s) have stale counters.")
+        action = "Found" if check_only else "Fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {mismatched} meetup(s) with stale counters."))
@@ -0,0 +1,271 @@
+"""
+Per-view request metrics in the Prometheus text format.
+
+Each worker process records into its own in-memory registry. With
+METRICS_DIR set, workers also write a snapshot to <dir>/<pid>-<start>.json
+(at most every METRICS_FLUSH_INTERVAL seconds, and at exit), and the
+/metrics endpoint sums the snapshots of all workers, past and present, so
+counters stay monotonic across the WEB_CONCURRENCY processes and worker
+restarts. Without METRICS_DIR only the serving process is reported.
+
+Snapshots of exited workers are folded into a single retired.json when
+metrics are collected, so the directory holds one file per live worker
+plus one, however often workers restart. Process IDs are only checked
+on the local host, so METRICS_DIR must not be shared between hosts.
+"""
+import atexit
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no file locks, and os.kill() cannot probe a process, so
+    # snapshots of exited workers are kept
+    fcntl = None
+
+RETIRED = "retired.json"
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "meetmeet_http_requests_total": (
+        "counter", "Requests by view, method and status.", None),
+    "meetmeet_http_request_duration_seconds": (
+        "histogram", "Request latency by view.", DURATION_BUCKETS),
+    "meetmeet_http_response_size_bytes": (
+        "histogram", "Response body size by view.", SIZE_BUCKETS),
+    "meetmeet_db_queries_per_request": (
+        "histogram", "Database queries run per request, by view.",
+        QUERY_BUCKETS),
+    "meetmeet_db_query_duration_seconds_total": (
+        "counter", "Time spent in database queries, by view.", None),
+}
+
+
+class Registry:
+    """
+    Thread-safe store of counter and histogram values of one process.
+    Histograms keep per-bucket (non-cumulative) counts, then sum and count.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.flushed_at = 0.0
+        self.filename = f"{os.getpid()}-{time.time_ns()}.json"
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                # One slot per bucket, +Inf, then sum and count
+                series = self.values[key] = [0] * (len(buckets) + 3)
+            series[bisect.bisect_left(buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                [name, [list(pair) for pair in labels], value]
+                for (name, labels), value in self.values.items()
+            ]
+
+    def flush(self, force=False):
+        """Write this process's snapshot to METRICS_DIR, if configured."""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+                not force and
+                now - self.flushed_at < settings.METRICS_FLUSH_INTERVAL):
+            return
+        self.flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        write_json(directory, self.filename, self.snapshot())
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+
+
+def labelset(**labels):
+    """Hashable, ordered label set for Registry keys."""
+    return tuple(sorted(labels.items()))
+
+
+def write_json(directory, filename, data):
+    # Write and rename, so readers never see a partial file
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(path, os.path.join(directory, filename))
+
+
+def read_json(directory, filename):
+    """Return a file's data, or None if it vanished or is unreadable."""
+    try:
+        with open(os.path.join(directory, filename)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_pid(filename):
+    """The process ID in a worker snapshot's name, otherwise None."""
+    pid = filename.split("-", 1)[0]
+    if filename.endswith(".json") and pid.isdigit():
+        return int(pid)
+    return None
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def retire_exited_workers(directory):
+    """
+    Fold the snapshots of exited worker processes into RETIRED and delete
+    them. RETIRED keeps the names of the snapshots it holds, so that
+    collect() skips copies it read before they were deleted.
+    """
+    if fcntl is None:
+        return
+    if all(is_running(pid) for pid in map(snapshot_pid, os.listdir(directory))
+           if pid is not None):
+        return
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        # One process folds at a time, others wait and find nothing left
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        filenames = set(os.listdir(directory))
+        retired = read_json(directory, RETIRED) or {
+            "values": [], "folded": []}
+        # Names of deleted snapshots are no longer needed
+        folded = [name for name in retired["folded"] if name in filenames]
+        snapshots = [retired["values"]]
+        for filename in sorted(filenames - set(folded)):
+            pid = snapshot_pid(filename)
+            if pid is None or is_running(pid):
+                continue
+            snapshot = read_json(directory, filename)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+                folded.append(filename)
+        write_json(directory, RETIRED, {
+            "values": [
+                [name, [list(pair) for pair in labels], value]
+                for (name, labels), value in merge(snapshots).items()
+            ],
+            "folded": folded,
+        })
+        for filename in folded:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+
+
+def collect():
+    """
+    Merge the snapshots of all worker processes, or return this process's
+    values when METRICS_DIR is not configured.
+    """
+    directory = settings.METRICS_DIR
+    if not directory:
+        return merge([registry.snapshot()])
+
+    registry.flush(force=True)
+    retire_exited_workers(directory)
+    snapshots = {}
+    for filename in os.listdir(directory):
+        if filename.endswith(".json") and filename != RETIRED:
+            snapshot = read_json(directory, filename)
+            # Vanished or unreadable files are skipped this round
+            if snapshot is not None:
+                snapshots[filename] = snapshot
+    # Read last: snapshots folded since they were read count only here
+    retired = read_json(directory, RETIRED)
+    if retired is not None:
+        for filename in retired["folded"]:
+            snapshots.pop(filename, None)
+        snapshots[RETIRED] = retired["values"]
+    return merge(snapshots.values())
+
+
+def merge(snapshots):
+    """Sum snapshots into one {(name, labels): value} dict."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot:
+            if name not in METRICS:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(value, list):
+                total = merged.setdefault(key, [0] * len(value))
+                for index, item in enumerate(value):
+                    total[index] += item
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(
+            key, str(value).replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render(values):
+    """Render merged values in the Prometheus text exposition format."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        series = sorted(
+            (labels, value) for (metric, labels), value in values.items()
+            if metric == name)
+        for labels, value in series:
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ("+Inf",), value):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, le=bound)} "
+                    f"{cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-2]}")
+            lines.append(
+                f"{name}_count{_format_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,321 @@
+import logging
+import random
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from .budget import QueryBudgetExceeded, get_query_budget
+from .metrics import labelset, registry
+from .ratelimit import client_ip, parse_rate, take_all
+from .replica import REPLICA, is_primary_only, is_write, read_from_replica
+
+logger = logging.getLogger("meetups.query_budget")
+
+PROJECT_DIR = str(settings.BASE_DIR)
+
+# Anything else is reported as "other", to keep label cardinality fixed
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+PIN_COOKIE = "primary_pin"
+
+
+# The QueryStats of the requests running in this context, which follow
+# them into the threads that async views run their queries in
+_active_stats = ContextVar("active_query_stats", default=())
+
+
+def record_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection, reporting each query
+    to the QueryStats active in the context it runs in.
+    """
+    active = _active_stats.get()
+    if not active:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        stack = None
+        for stats in active:
+            stats.count += 1
+            stats.duration += duration
+            if stats.capture:
+                if stack is None:
+                    stack = traceback.extract_stack()[:-1]
+                stats.queries.append((sql, stack))
+
+
+def install_query_tracking(connection):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class QueryStats:
+    """
+    Counts queries and their total duration on all connections.
+    With capture, also keeps each query's SQL and the stack it ran from.
+    """
+
+    def __init__(self, capture=False):
+        self.count = 0
+        self.duration = 0.0
+        self.capture = capture
+        self.queries = []
+
+    @contextmanager
+    def track(self):
+        """
+        Count the queries run in this context until exit, on whichever
+        thread they run (connections are per thread, see signals).
+        """
+        for connection in connections.all(initialized_only=True):
+            install_query_tracking(connection)
+        token = _active_stats.set(_active_stats.get() + (self,))
+        try:
+            yield self
+        finally:
+            _active_stats.reset(token)
+
+
+class QueryTrackingMiddleware:
+    """
+    Base for middleware that tracks the queries run below it.
+    Works natively in both sync and async mode; subclasses create the
+    QueryStats in start() (or None to skip tracking) and read them in
+    finish().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = self.start(request)
+        if queries is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with queries.track():
+            response = self.get_response(request)
+        return self.finish(
+            request, response, time.perf_counter() - started, queries)
+
+    async def __acall__(self, request):
+        queries = self.start(request)
+        if queries is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with queries.track():
+            response = await self.get_response(request)
+        return self.finish(
+            request, response, time.perf_counter() - started, queries)
+
+    def start(self, request):
+        return QueryStats()
+
+    def finish(self, request, response, duration, queries):
+        return response
+
+
+def view_label(request):
+    match = request.resolver_match
+    if match is None:
+        # Unresolved paths share one label, to keep cardinality fixed
+        return "<unmatched>"
+    return match.view_name if match.url_name else match.route
+
+
+class MetricsMiddleware(QueryTrackingMiddleware):
+    """
+    Record latency, response size, and database query count and time of
+    every request under its URL name (see meetups.metrics).
+    """
+
+    def finish(self, request, response, duration, queries):
+        view = view_label(request)
+        method = (request.method if request.method in KNOWN_METHODS
+                  else "other")
+        registry.inc(
+            "meetmeet_http_requests_total",
+            labelset(view=view, method=method, status=response.status_code))
+        view_labels = labelset(view=view)
+        registry.observe(
+            "meetmeet_http_request_duration_seconds", view_labels, duration)
+        registry.observe(
+            "meetmeet_db_queries_per_request", view_labels, queries.count)
+        registry.inc(
+            "meetmeet_db_query_duration_seconds_total", view_labels,
+            queries.duration)
+        if not response.streaming:
+            registry.observe(
+                "meetmeet_http_response_size_bytes", view_labels,
+                len(response.content))
+        registry.flush()
+        return response
+
+
+class QueryBudgetMiddleware(QueryTrackingMiddleware):
+    """
+    Enforce the per-view query budgets (see meetups.budget).
+
+    A QUERY_BUDGET_SAMPLE_RATE fraction of requests (all of them in
+    development and tests) records its SQL with stack traces. When such a
+    request exceeds its view's budget, every query is logged to the
+    "meetups.query_budget" logger with the project frames that ran it,
+    and with QUERY_BUDGET_RAISE set, QueryBudgetExceeded is raised.
+    Installed last, so only the view's own queries are counted.
+    """
+
+    def start(self, request):
+        rate = settings.QUERY_BUDGET_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        return QueryStats(capture=True)
+
+    def finish(self, request, response, duration, queries):
+        match = request.resolver_match
+        budget = match and get_query_budget(match.func)
+        if budget is None or queries.count <= budget:
+            return response
+
+        message = (f"{view_label(request)} ran {queries.count} queries, "
+                   f"over its budget of {budget} ({request.path})")
+        logger.warning(
+            "%s\n%s", message,
+            "\n".join(self.format_query(number, sql, stack)
+                      for number, (sql, stack)
+                      in enumerate(queries.queries, 1)))
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        return response
+
+    @staticmethod
+    def format_query(number, sql, stack):
+        # Only project code explains where a query comes from
+        frames = [
+            frame for frame in stack
+            if frame.filename.startswith(PROJECT_DIR)
+            and "site-packages" not in frame.filename
+        ]
+        return f"[{number}] {sql}\n" + "".join(
+            traceback.format_list(frames))
+
+
+class ReplicaPinMiddleware:
+    """
+    Send the reads of GET and HEAD requests to the read replica (see
+    meetups.replica), with read-your-writes consistency: requests that
+    write, unsafe methods and @primary_only views, read from the primary
+    and pin their client to it for REPLICA_PIN_SECONDS with a cookie, so
+    the pages it loads next show its change despite replication lag.
+
+    The routing flag is set for every request and never reset: streaming
+    responses run their queries after the middleware has returned.
+    Only installed when a replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self.route(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        self.route(request)
+        return self.pin(request, await self.get_response(request))
+
+    def route(self, request):
+        read_from_replica(
+            request.method in ("GET", "HEAD")
+            and PIN_COOKIE not in request.COOKIES)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if is_primary_only(view_func):
+            read_from_replica(False)
+
+    def pin(self, request, response):
+        match = request.resolver_match
+        if is_write(request, match and match.func):
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """
+    Answer write requests (see meetups.replica.is_write) over their URL
+    name's RATE_LIMITS with 429 Too Many Requests and a Retry-After
+    header, before the view runs (see meetups.ratelimit).
+
+    The IP bucket is checked first and needs no database at all. Users
+    are identified by the user ID in their session, so signed-in requests
+    only load the session, which the view would do anyway, and never the
+    user row. A request is counted in both buckets or in neither, so a
+    user over their own limit does not use up the budget of others
+    behind the same address. Installed after the authentication
+    middleware.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.limits = {
+            name: {scope: parse_rate(rate) for scope, rate in rates.items()}
+            for name, rates in settings.RATE_LIMITS.items()
+        }
+        if not self.limits:
+            raise MiddlewareNotUsed
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.url_name
+        limits = self.limits.get(name)
+        if not limits or not is_write(request, view_func):
+            return None
+        retry_after = take_all(self.buckets(request, name, limits))
+        if not retry_after:
+            return None
+        response = HttpResponse(
+            "Too many requests, please slow down.",
+            status=429, content_type="text/plain")
+        response["Retry-After"] = str(retry_after)
+        return response
+
+    @staticmethod
+    def buckets(request, name, limits):
+        # Lazy, so the session is only read once the IP bucket has room
+        if "ip" in limits:
+            yield (f"{name}:ip:{client_ip(request)}", *limits["ip"])
+        if "user" in limits:
+            user_id = request.session.get(SESSION_KEY)
+            if user_id is not None:
+                yield (f"{name}:user:{user_id}", *limits["user"])
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    Meetup = apps.get_model('meetups', 'Meetup')
+    MeetupParticipation = apps.get_model('meetups', 'MeetupParticipation')
+
+    def count_subquery(status):
+        counts = (
+            MeetupParticipation.objects
+            .filter(meetup=OuterRef('pk'), status=status)
+            .order_by()
+            .values('meetup')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    Meetup.objects.update(
+        going_count=count_subquery('going'),
+        pending_count=count_subquery('pending'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0002_add_meetup_participation'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='meetup',
+            options={'ordering': ['-start_datetime']},
+        ),
+        migrations.AddField(
+            model_name='meetup',
+            name='going_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='meetup',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='meetup',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(help_text='Duration (in minutes)'),
+        ),
+        migrations.AlterField(
+            model_name='meetup',
+            name='is_open',
+            field=models.BooleanField(default=True, help_text='If unchecked, users must request approval to join. Can not be changed in a future.'),
+        ),
+        migrations.AlterField(
+            model_name='meetup',
+            name='max_participants',
+            field=models.PositiveIntegerField(blank=True, help_text='Leave empty for unlimited participants.Can not be changed in a future.', null=True),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0003_add_meetup_participation_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meetup',
+            index=models.Index(fields=['start_datetime', 'id'], name='meetup_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meetup',
+            index=models.Index(fields=['organizer', 'start_datetime', 'id'], name='meetup_org_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meetupparticipation',
+            index=models.Index(fields=['meetup', 'status'], name='mp_meetup_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meetupparticipation',
+            index=models.Index(fields=['user', 'status'], name='mp_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meetupparticipation',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['meetup', 'requested_at'], name='mp_pending_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:05
+
+from django.db import migrations
+
+# The search index is maintained by the database itself, so it also covers
+# bulk inserts and queryset updates. Backends without a native full-text
+# index get nothing here and fall back to icontains matching.
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE meetups_meetup ADD COLUMN search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A') ||
+        setweight(to_tsvector('english', location_text), 'B') ||
+        setweight(to_tsvector('english', description), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX meetup_search_document_idx
+    ON meetups_meetup USING GIN (search_document)
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS meetup_search_document_idx",
+    "ALTER TABLE meetups_meetup DROP COLUMN IF EXISTS search_document",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE meetups_meetup_fts USING fts5(
+        title, description, location_text,
+        content='meetups_meetup', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER meetups_meetup_fts_ai AFTER INSERT ON meetups_meetup
+    BEGIN
+        INSERT INTO meetups_meetup_fts(rowid, title, description,
+                                       location_text)
+        VALUES (new.id, new.title, new.description, new.location_text);
+    END
+    """,
+    """
+    CREATE TRIGGER meetups_meetup_fts_ad AFTER DELETE ON meetups_meetup
+    BEGIN
+        INSERT INTO meetups_meetup_fts(meetups_meetup_fts, rowid, title,
+                                       description, location_text)
+        VALUES ('delete', old.id, old.title, old.description,
+                old.location_text);
+    END
+    """,
+    """
+    CREATE TRIGGER meetups_meetup_fts_au
+    AFTER UPDATE OF title, description, location_text ON meetups_meetup
+    BEGIN
+        INSERT INTO meetups_meetup_fts(meetups_meetup_fts, rowid, title,
+                                       description, location_text)
+        VALUES ('delete', old.id, old.title, old.description,
+                old.location_text);
+        INSERT INTO meetups_meetup_fts(rowid, title, description,
+                                       location_text)
+        VALUES (new.id, new.title, new.description, new.location_text);
+    END
+    """,
+    "INSERT INTO meetups_meetup_fts(meetups_meetup_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS meetups_meetup_fts_ai",
+    "DROP TRIGGER IF EXISTS meetups_meetup_fts_ad",
+    "DROP TRIGGER IF EXISTS meetups_meetup_fts_au",
+    "DROP TABLE IF EXISTS meetups_meetup_fts",
+]
+
+
+def install_index(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_INSTALL,
+        "sqlite": SQLITE_INSTALL,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall_index(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_UNINSTALL,
+        "sqlite": SQLITE_UNINSTALL,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0004_add_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0005_add_meetup_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetup',
+            name='participations_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
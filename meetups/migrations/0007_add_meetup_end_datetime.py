@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:05
+
+from datetime import timedelta
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module('meetups.migrations.0005_add_meetup_search_index')
+
+
+def backfill_end_datetime(apps, schema_editor):
+    Meetup = apps.get_model('meetups', 'Meetup')
+    batch = []
+    meetups = Meetup.objects.only(
+        'start_datetime', 'duration_minutes').order_by('pk')
+    for meetup in meetups.iterator(chunk_size=2000):
+        meetup.end_datetime = meetup.start_datetime + timedelta(
+            minutes=meetup.duration_minutes)
+        batch.append(meetup)
+        if len(batch) == 2000:
+            Meetup.objects.bulk_update(batch, ['end_datetime'])
+            batch = []
+    Meetup.objects.bulk_update(batch, ['end_datetime'])
+
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite changes the column's nullability by rebuilding the table,
+    # which drops the triggers that keep the full-text index in sync
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search_index.SQLITE_INSTALL:
+        if statement.strip().startswith('CREATE TRIGGER'):
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0006_add_meetup_participations_changed_at'),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after the column is nullable again
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='meetup',
+            name='end_datetime',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_end_datetime, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='meetup',
+            name='end_datetime',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='meetup',
+            index=models.Index(fields=['start_datetime', 'end_datetime'], name='meetup_start_end_idx'),
+        ),
+    ]
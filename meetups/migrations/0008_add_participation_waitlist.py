@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0007_add_meetup_end_datetime'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='meetupparticipation',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending approval'), ('going', 'Going'), ('waitlisted', 'Waitlisted'), ('maybe', 'Maybe'), ('not_going', 'Not going')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='meetupparticipation',
+            index=models.Index(condition=models.Q(('status', 'waitlisted')), fields=['meetup', 'requested_at'], name='mp_waitlist_queue_idx'),
+        ),
+    ]
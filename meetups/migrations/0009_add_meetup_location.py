@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:20
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0008_add_participation_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetup',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='meetup',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Optional, lets people find the meetup near them.', null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='meetup',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='meetup',
+            index=models.Index(fields=['geohash'], name='meetup_geohash_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetups', '0009_add_meetup_location'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backend', models.CharField(max_length=64)),
+                ('queue_name', models.CharField(max_length=64)),
+                ('task_path', models.CharField(max_length=255)),
+                ('priority', models.IntegerField(default=0)),
+                ('args', models.JSONField(default=list)),
+                ('kwargs', models.JSONField(default=dict)),
+                ('run_after', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('READY', 'Ready'), ('RUNNING', 'Running'), ('FAILED', 'Failed'), ('SUCCESSFUL', 'Successful')], default='READY', max_length=10)),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_attempted_at', models.DateTimeField(blank=True, null=True)),
+                ('worker_ids', models.JSONField(default=list)),
+                ('errors', models.JSONField(default=list)),
+                ('return_value', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'READY')), fields=['-priority', 'enqueued_at'], name='queuedtask_ready_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('participation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='meetups.meetupparticipation')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['recipient', 'created_at'], name='notification_unsent_idx')],
+            },
+        ),
+    ]
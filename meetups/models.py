@@ -1,8 +1,55 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Now
 from django.conf import settings
 from django.utils import timezone
 from django.urls import reverse
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.tasks.base import TaskResultStatus
+
+from . import geo
+
+
+class MeetupFullError(Exception):
+    """Raised when a participation would exceed the meetup's capacity."""
+
+
+class MeetupQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Store derived fields, which save() would otherwise compute."""
+        objs = list(objs)
+        for meetup in objs:
+            meetup.update_end_datetime()
+            meetup.update_geohash()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def near(self, latitude, longitude, radius_km, limit=50):
+        """
+        Return up to limit (meetup, distance_km) pairs of this queryset
+        within radius_km of a point, nearest first. Candidates are pruned
+        by geohash cell in the database and checked by exact distance
+        here; only the kept meetups are loaded, with their organizers.
+        """
+        # Without the default ordering, which SQLite would rather satisfy
+        # by scanning the start_datetime index than use the geohash index
+        candidates = self.filter(geo.box_filter(
+            geo.bounding_box(latitude, longitude, radius_km))).order_by()
+        matches = []
+        for pk, lat, lon in candidates.values_list(
+                "pk", "latitude", "longitude"):
+            distance = geo.distance_km(latitude, longitude, lat, lon)
+            if distance <= radius_km:
+                matches.append((distance, pk))
+        matches = sorted(matches)[:limit]
+        meetups = self.select_related("organizer").in_bulk(
+            [pk for _, pk in matches])
+        return [
+            (meetups[pk], distance)
+            for distance, pk in matches
+            if pk in meetups
+        ]
 
 
 class Meetup(models.Model):
@@ -38,6 +85,10 @@ class Meetup(models.Model):
         help_text="Duration (in minutes)"
     )
 
+    # Derived from start and duration on save, stored so that overlaps and
+    # "happening now" are indexed range queries
+    end_datetime = models.DateTimeField(editable=False)
+
     location_text = models.CharField(
         max_length=255,
         help_text="Physical location or short description."
@@ -49,11 +100,52 @@ class Meetup(models.Model):
         help_text="Optional link for online meetups."
     )
 
+    # Optional coordinates for "near me" searches. Their geohash is derived
+    # on save and indexed, so searches prune by cell (see meetups.geo)
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+        help_text="Optional, lets people find the meetup near them."
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(
+        max_length=12, null=True, blank=True, editable=False)
+
+    # Denormalized participation counters, maintained with F-expressions
+    # by MeetupParticipation so capacity checks need no COUNT query
+    going_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_count = models.PositiveIntegerField(default=0, editable=False)
+    # Last time any participation of this meetup changed (ETag/Last-Modified)
+    participations_changed_at = models.DateTimeField(
+        null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MeetupQuerySet.as_manager()
+
     class Meta:
         ordering = ["-start_datetime"]  # Show upcoming/recent meetups first
+        indexes = [
+            # Keyset pagination of the main list
+            models.Index(
+                fields=["start_datetime", "id"], name="meetup_start_id_idx"),
+            # "My meetups" segment, walked in the same order
+            models.Index(
+                fields=["organizer", "start_datetime", "id"],
+                name="meetup_org_start_idx"),
+            # Time range lookups: overlaps and "happening now"
+            models.Index(
+                fields=["start_datetime", "end_datetime"],
+                name="meetup_start_end_idx"),
+            # "Near me" searches, one range scan per covering cell
+            models.Index(fields=["geohash"], name="meetup_geohash_idx"),
+        ]
 
     def __str__(self):
         return (f"[{self.pk}] {self.organizer} - {self.title} "
@@ -82,10 +174,57 @@ class Meetup(models.Model):
             errors['max_participants'] = "Max participants must be greater" \
                                          "than 0 or left empty"
 
+        # 4. Location Validation: coordinates only make sense in pairs
+        if (self.latitude is None) != (self.longitude is None):
+            errors['longitude'] = "Give both latitude and longitude, " \
+                                  "or leave both empty"
+
         # If the dictionary isn't empty, raise all errors at once for the form
         if errors:
             raise ValidationError(errors)
 
+    # Stored fields derived from others on save, and their sources
+    DERIVED_FIELDS = {
+        "end_datetime": {"start_datetime", "duration_minutes"},
+        "geohash": {"latitude", "longitude"},
+    }
+
+    def save(self, *args, **kwargs):
+        """Save, keeping the stored end time and geohash in sync."""
+        self.update_end_datetime()
+        self.update_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *(
+                derived for derived, sources in self.DERIVED_FIELDS.items()
+                if sources & set(update_fields))}
+        super().save(*args, **kwargs)
+
+    def update_end_datetime(self):
+        """Derive end_datetime from start_datetime and duration_minutes."""
+        self.end_datetime = self.start_datetime + timezone.timedelta(
+            minutes=self.duration_minutes
+        )
+
+    def update_geohash(self):
+        """Derive geohash from latitude and longitude, if both are set."""
+        if self.latitude is None or self.longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+
+    def overlapping_meetups(self, user):
+        """
+        Other meetups the user is going to whose time overlaps this one,
+        found with a single range query on the stored times.
+        """
+        return Meetup.objects.filter(
+            start_datetime__lt=self.end_datetime,
+            end_datetime__gt=self.start_datetime,
+            participations__user=user,
+            participations__status=MeetupParticipation.Status.GOING,
+        ).exclude(pk=self.pk)
+
     def get_absolute_url(self):
         """ Return the URL for a specific meetup detail page """
         return reverse('meetup_detail', kwargs={'pk': self.pk})
@@ -94,17 +233,120 @@ class Meetup(models.Model):
         """Check if the meetup has reached its capacity."""
         if self.max_participants is None:
             return False
-        # Count only participants who are actually "GOING"
-        return self.participations.filter(
-            status=MeetupParticipation.Status.GOING
-        ).count() >= self.max_participants
+        # Only participants who are actually "GOING" take a seat
+        return self.going_count >= self.max_participants
 
-    @property
-    def end_datetime(self):
-        """Calculate meetup end time by adding duration to start time."""
-        return self.start_datetime + timezone.timedelta(
-            minutes=self.duration_minutes
-        )
+    def review_requests(self, participation_ids, approve=True,
+                        reject_rest=False):
+        """
+        Approve this meetup's pending requests among participation_ids,
+        oldest first, for as many as there are free seats. The remainder
+        is rejected if reject_rest is set, everything when approve is off.
+
+        The meetup row is locked for a single capacity check, then
+        participations and counters change with bulk UPDATEs, so the query
+        count does not depend on the number of IDs. Bulk updates send no
+        signals: callers invalidate cached pages themselves.
+
+        Participants are notified of the decisions by background tasks,
+        queued in the same transaction.
+
+        Returns a dict with the number of approved, rejected, left pending
+        and skipped (unknown or not pending) IDs.
+        """
+        # Imported here, as meetups.tasks imports the models
+        from .tasks import notify_participants
+
+        Status = MeetupParticipation.Status
+        participation_ids = set(participation_ids)
+        with transaction.atomic():
+            meetup = (
+                Meetup.objects.select_for_update()
+                .only("going_count", "max_participants")
+                .get(pk=self.pk)
+            )
+            pending = list(
+                self.participations
+                .filter(pk__in=participation_ids, status=Status.PENDING)
+                .order_by("requested_at", "pk")
+                .values_list("pk", flat=True)
+            )
+            if not approve:
+                seats = 0
+            elif meetup.max_participants is None:
+                seats = len(pending)
+            else:
+                seats = max(meetup.max_participants - meetup.going_count, 0)
+
+            to_approve = pending[:seats]
+            to_reject = pending[seats:] if reject_rest or not approve else []
+            now = timezone.now()
+            # Status is re-checked, in case a request was withdrawn meanwhile
+            approved = rejected = 0
+            if to_approve:
+                approved = MeetupParticipation.objects.filter(
+                    pk__in=to_approve, status=Status.PENDING
+                ).update(status=Status.GOING, approved_at=now)
+            if to_reject:
+                rejected = MeetupParticipation.objects.filter(
+                    pk__in=to_reject, status=Status.PENDING
+                ).update(status=Status.NOT_GOING)
+            if approved or rejected:
+                Meetup.objects.filter(pk=self.pk).update(
+                    going_count=F("going_count") + approved,
+                    pending_count=F("pending_count") - approved - rejected,
+                    participations_changed_at=now,
+                )
+            # One task per decision, whatever the number of participants
+            if approved:
+                notify_participants.enqueue(to_approve, approved=True)
+            if rejected:
+                notify_participants.enqueue(to_reject, approved=False)
+
+        self.going_count = meetup.going_count + approved
+        return {
+            "approved": approved,
+            "rejected": rejected,
+            "left_pending": len(pending) - len(to_approve) - len(to_reject),
+            "skipped": len(participation_ids) - len(pending),
+        }
+
+    def promote_waitlisted(self):
+        """
+        Give free seats to waitlisted participants, first come, first
+        served, and return the IDs of the promoted participations.
+
+        Runs in the transaction that freed the seats. The meetup row is
+        locked for the capacity check, so concurrent leaves promote one
+        after another and never hand out the same seat twice.
+        """
+        Status = MeetupParticipation.Status
+        # No savepoint: every step is undone with the freeing transaction
+        with transaction.atomic(savepoint=False):
+            meetup = (
+                Meetup.objects.select_for_update()
+                .only("going_count", "max_participants")
+                .get(pk=self.pk)
+            )
+            waitlist = MeetupParticipation.objects.filter(
+                meetup_id=self.pk, status=Status.WAITLISTED,
+            ).order_by("requested_at", "pk")
+            if meetup.max_participants is not None:
+                seats = meetup.max_participants - meetup.going_count
+                if seats <= 0:
+                    return []
+                waitlist = waitlist[:seats]
+            promoted = list(waitlist.values_list("pk", flat=True))
+            if not promoted:
+                return []
+            count = MeetupParticipation.objects.filter(
+                pk__in=promoted, status=Status.WAITLISTED,
+            ).update(status=Status.GOING)
+            Meetup.objects.filter(pk=self.pk).update(
+                going_count=F("going_count") + count,
+                participations_changed_at=Now(),
+            )
+        return promoted
 
     @property
     def is_past(self):
@@ -120,6 +362,7 @@ class MeetupParticipation(models.Model):
     class Status(models.TextChoices):
         PENDING = "pending", "Pending approval"
         GOING = "going", "Going"
+        WAITLISTED = "waitlisted", "Waitlisted"
         MAYBE = "maybe", "Maybe"
         NOT_GOING = "not_going", "Not going"
 
@@ -148,22 +391,200 @@ class MeetupParticipation(models.Model):
         # Prevent a user from signing up for the same meetup multiple times
         unique_together = ("user", "meetup")
         ordering = ["-requested_at"]
+        indexes = [
+            # Capacity and per-status lists of a meetup
+            models.Index(
+                fields=["meetup", "status"], name="mp_meetup_status_idx"),
+            # A user's RSVPs by status
+            models.Index(fields=["user", "status"], name="mp_user_status_idx"),
+            # Organizer's queue of requests awaiting approval
+            models.Index(
+                fields=["meetup", "requested_at"],
+                condition=models.Q(status="pending"),
+                name="mp_pending_queue_idx"),
+            # Waitlist of a full meetup, promoted first come, first served
+            models.Index(
+                fields=["meetup", "requested_at"],
+                condition=models.Q(status="waitlisted"),
+                name="mp_waitlist_queue_idx"),
+        ]
+
+    # Statuses mirrored by counter columns on Meetup
+    COUNTER_FIELDS = {
+        Status.GOING: "going_count",
+        Status.PENDING: "pending_count",
+    }
 
     def __str__(self):
         return f"[{self.pk}] {self.user} ({self.status}) {self.meetup}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored status to detect transitions on save."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save and keep Meetup counters in sync in the same transaction.
+        Raises MeetupFullError if a new GOING status has no free seat.
+        """
+        update_fields = kwargs.get("update_fields")
+        old_status = (
+            None if self._state.adding
+            else getattr(self, "_loaded_status", None)
+        )
+        with transaction.atomic():
+            # Reserve the seat first, so nothing is written when full
+            if update_fields is None or "status" in update_fields:
+                self.update_meetup_counts(old_status, self.status)
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status
+
+    def update_meetup_counts(self, old_status, new_status):
+        """
+        Move this participation between Meetup counters atomically and
+        stamp Meetup.participations_changed_at.
+        Uses F-expressions so concurrent updates never lose increments.
+        Taking a GOING seat is a conditional UPDATE that only matches
+        while going_count is below max_participants, so concurrent joins
+        can never overbook; MeetupFullError is raised when it matches
+        nothing.
+        """
+        deltas = {}
+        for status, step in ((old_status, -1), (new_status, 1)):
+            field = self.COUNTER_FIELDS.get(status)
+            if field:
+                deltas[field] = deltas.get(field, 0) + step
+
+        updates = {
+            field: F(field) + delta
+            for field, delta in deltas.items() if delta
+        }
+        # Every participation change is stamped for HTTP validators
+        updates["participations_changed_at"] = Now()
+
+        meetups = Meetup.objects.filter(pk=self.meetup_id)
+        if deltas.get("going_count", 0) > 0:
+            meetups = meetups.filter(
+                Q(max_participants__isnull=True) |
+                Q(going_count__lt=F("max_participants"))
+            )
+            if not meetups.update(**updates):
+                raise MeetupFullError(
+                    "This meetup has reached the participants limit.")
+        else:
+            meetups.update(**updates)
+            if deltas.get("going_count", 0) < 0:
+                # The freed seat goes to the waitlist in this transaction
+                Meetup(pk=self.meetup_id).promote_waitlisted()
+
     def approve(self):
-        """Approve a pending participation request."""
+        """
+        Approve a pending participation request, and queue an email to
+        the participant in the same transaction.
+        """
+        from .tasks import notify_participants
+
         self.status = self.Status.GOING
         self.approved_at = timezone.now()
-        self.save(update_fields=["status", "approved_at"])
+        with transaction.atomic():
+            self.save(update_fields=["status", "approved_at"])
+            notify_participants.enqueue([self.pk], approved=True)
 
     def reject(self):
-        """Reject a participation request."""
+        """
+        Reject a participation request, and queue an email to the
+        participant in the same transaction.
+        """
+        from .tasks import notify_participants
+
         self.status = self.Status.NOT_GOING
-        self.save(update_fields=["status"])
+        with transaction.atomic():
+            self.save(update_fields=["status"])
+            notify_participants.enqueue([self.pk], approved=False)
 
     @property
     def is_approved(self):
         """Helper to check if the user is no longer in 'Pending' status."""
         return self.status != self.Status.PENDING
+
+
+class RequestNotification(models.Model):
+    """
+    A participation request waiting to be included in its organizer's
+    next digest email (see meetups.tasks).
+    """
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="request_notifications"
+    )
+
+    # Withdrawn requests drop out of the digest with their notification
+    participation = models.ForeignKey(
+        MeetupParticipation,
+        on_delete=models.CASCADE,
+        related_name="notifications"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # A recipient's notifications awaiting the next digest
+            models.Index(
+                fields=["recipient", "created_at"],
+                condition=models.Q(sent_at__isnull=True),
+                name="notification_unsent_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.pk}] {self.recipient}: {self.participation_id}"
+
+
+class QueuedTask(models.Model):
+    """
+    A background task enqueued on meetups.taskqueue.DatabaseBackend,
+    and its result once a worker (manage.py run_tasks) has run it.
+    """
+    Status = TaskResultStatus
+
+    backend = models.CharField(max_length=64)
+    queue_name = models.CharField(max_length=64)
+    # Dotted path of the module level Task object
+    task_path = models.CharField(max_length=255)
+    priority = models.IntegerField(default=0)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    # Earliest time to run, or as soon as possible when null
+    run_after = models.DateTimeField(null=True, blank=True)
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.READY
+    )
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_attempted_at = models.DateTimeField(null=True, blank=True)
+    worker_ids = models.JSONField(default=list)
+    # Exception class paths and tracebacks, as {"exception_class_path",
+    # "traceback"} dicts
+    errors = models.JSONField(default=list)
+    return_value = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers' queue: only tasks still to run, by priority
+            models.Index(
+                fields=["-priority", "enqueued_at"],
+                condition=models.Q(status="READY"),
+                name="queuedtask_ready_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.pk}] {self.task_path} ({self.status})"
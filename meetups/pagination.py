@@ -0,0 +1,187 @@
+from datetime import date, datetime
+
+from django.core import signing
+from django.db.models import Q
+from django.http import Http404
+
+CURSOR_SALT = "meetups.pagination.cursor"
+
+
+class CursorPage:
+    """
+    A single page of results produced by CursorPaginator.
+    Mirrors the parts of Django's Page API used by templates.
+    """
+
+    def __init__(self, object_list, has_next, has_previous,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor if has_next else None
+        self.previous_cursor = previous_cursor if has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over one or more ordered querysets ("segments").
+
+    Segments are walked one after another, so a list can show e.g. the
+    user's own meetups before everybody else's. Each page seeks past the
+    last seen ordering key instead of using OFFSET, and no COUNT is run,
+    so every page costs the same regardless of depth.
+    """
+
+    def __init__(self, segments, per_page):
+        self.segments = list(segments)
+        self.per_page = per_page
+        for queryset in self.segments:
+            if not queryset.query.order_by:
+                raise ValueError("Cursor pagination needs ordered querysets.")
+
+    def page(self, cursor=None):
+        """Return the page the given opaque cursor points at."""
+        walk = self._walk(cursor)
+        try:
+            queryset = next(walk)
+            while True:
+                queryset = walk.send(list(queryset))
+        except StopIteration as stop:
+            return stop.value
+
+    async def apage(self, cursor=None):
+        """Async variant of page(), fetching rows with the async ORM."""
+        walk = self._walk(cursor)
+        try:
+            queryset = next(walk)
+            while True:
+                queryset = walk.send([obj async for obj in queryset])
+        except StopIteration as stop:
+            return stop.value
+
+    def _walk(self, cursor):
+        """
+        Generator doing the paging logic without touching the database:
+        it yields each sliced queryset to fetch and is sent back the rows,
+        so page() and apage() only differ in how they run the queries.
+        """
+        if cursor:
+            segment, keys, backwards = self.decode_cursor(cursor)
+        else:
+            segment, keys, backwards = 0, None, False
+
+        if backwards:
+            return (yield from self._page_backwards(segment, keys))
+        return (yield from self._page_forwards(segment, keys))
+
+    def _page_forwards(self, segment, keys):
+        rows = []
+        for index in range(segment, len(self.segments)):
+            queryset = self.segments[index]
+            if index == segment and keys is not None:
+                queryset = queryset.filter(self._seek(queryset, keys))
+            limit = self.per_page + 1 - len(rows)
+            rows.extend((index, obj) for obj in (yield queryset[:limit]))
+            if len(rows) > self.per_page:
+                break
+
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._build_page(
+            rows, has_next=has_next, has_previous=keys is not None)
+
+    def _page_backwards(self, segment, keys):
+        rows = []
+        for index in range(segment, -1, -1):
+            queryset = self.segments[index].reverse()
+            if index == segment:
+                queryset = queryset.filter(
+                    self._seek(self.segments[index], keys, backwards=True))
+            limit = self.per_page + 1 - len(rows)
+            rows.extend((index, obj) for obj in (yield queryset[:limit]))
+            if len(rows) > self.per_page:
+                break
+
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._build_page(rows, has_next=True, has_previous=has_previous)
+
+    def _build_page(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows:
+            next_cursor = self.encode_cursor(*rows[-1])
+            previous_cursor = self.encode_cursor(*rows[0], backwards=True)
+        return CursorPage(
+            [obj for _, obj in rows],
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
+
+    @staticmethod
+    def _seek(queryset, keys, backwards=False):
+        """
+        Build the keyset condition selecting rows after (or before) keys.
+        For ordering (a, -b) this is: a >= ka AND (a > ka OR b < kb).
+        The redundant bound on the leading column lets the database turn
+        the seek into an index range scan.
+        """
+        condition = Q()
+        equal = {}
+        bound = None
+        for field, key in zip(queryset.query.order_by, keys):
+            name = field.lstrip("-")
+            ascending = not field.startswith("-")
+            lookup = "gt" if ascending != backwards else "lt"
+            if bound is None:
+                bound = Q(**{f"{name}__{lookup}e": key})
+            condition |= Q(**equal, **{f"{name}__{lookup}": key})
+            equal[name] = key
+        return bound & condition
+
+    def encode_cursor(self, segment, obj, backwards=False):
+        """Serialize the ordering key of obj into an opaque token."""
+        keys = []
+        for field in self.segments[segment].query.order_by:
+            # Orderings may follow relations, e.g. "-meetup__start_datetime"
+            value = obj
+            for attribute in field.lstrip("-").split("__"):
+                value = getattr(value, attribute)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            keys.append(value)
+        return signing.dumps(
+            {"s": segment, "k": keys, "b": backwards},
+            salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        """Validate a token and return (segment, keys, backwards)."""
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            segment, keys = data["s"], data["k"]
+            backwards = bool(data["b"])
+        except (signing.BadSignature, KeyError, TypeError):
+            raise Http404("Invalid page.")
+
+        if (not isinstance(segment, int) or not isinstance(keys, list)
+                or not 0 <= segment < len(self.segments)
+                or len(keys) != len(self.segments[segment].query.order_by)):
+            raise Http404("Invalid page.")
+        return segment, keys, backwards
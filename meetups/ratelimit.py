@@ -0,0 +1,101 @@
+"""
+Rate limits of write requests, per user and per client IP.
+
+RATE_LIMITS maps URL names to rates such as {"user": "20/m", "ip":
+"60/m"}: each user and each IP address gets a bucket of 20 (or 60)
+requests that refills evenly over a minute. RateLimitMiddleware checks
+them before the view runs, so rejected requests cost a few cache
+operations and no database work.
+
+Buckets are kept as sliding window counters in the RATE_LIMIT_CACHE_ALIAS
+cache: an atomic incr() counts requests of the current fixed window, and
+the previous window's count is weighted by how much of it the sliding
+window still overlaps. This approximates a token bucket with the same
+burst size and refill rate, with nothing to read-modify-write.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Parse "<count>/<period>" (period s, m, h or d) into (count, seconds)."""
+    try:
+        count, period = rate.split("/")
+        return int(count), PERIODS[period[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ValueError(
+            f"Invalid rate {rate!r}, expected e.g. '20/m' "
+            f"with a period of {', '.join(PERIODS)}.")
+
+
+def client_ip(request):
+    """
+    The client's address: REMOTE_ADDR, or with RATE_LIMIT_PROXIES
+    trusted proxies in front, the address the outermost one saw.
+    """
+    proxies = settings.RATE_LIMIT_PROXIES
+    if proxies:
+        forwarded = [
+            address.strip() for address in
+            request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def take(bucket, limit, period):
+    """
+    Take one request from a bucket. Return 0 when allowed, otherwise
+    the seconds until the bucket has room again.
+    """
+    return take_all([(bucket, limit, period)])
+
+
+def take_all(buckets):
+    """
+    Take one request from every (bucket, limit, period) in turn, or from
+    none of them: when one is full, those already taken from get their
+    request back, and the rest are not consulted (buckets may be a lazy
+    iterable). Return 0 when allowed, otherwise the seconds until the
+    full bucket has room again.
+    """
+    cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+    taken = []
+    for bucket, limit, period in buckets:
+        key, retry_after = _take(cache, bucket, limit, period)
+        taken.append(key)
+        if retry_after:
+            # Rejected requests take nothing
+            for key in taken:
+                try:
+                    cache.decr(key)
+                except ValueError:
+                    pass
+            return retry_after
+    return 0
+
+
+def _take(cache, bucket, limit, period):
+    """Count a request in a bucket's current window."""
+    now = time.time()
+    window, elapsed = divmod(now, period)
+    key = f"{bucket}:{int(window)}"
+    # Counts live for two windows: their own, then as the previous one
+    cache.add(key, 0, timeout=2 * period)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=2 * period)
+        count = 1
+    previous = cache.get(f"{bucket}:{int(window) - 1}", 0)
+    if previous * (1 - elapsed / period) + count <= limit:
+        return key, 0
+    return key, math.ceil(period - elapsed)
@@ -0,0 +1,56 @@
+"""
+Read-replica routing.
+
+With DATABASE_REPLICA_URL set, the "replica" database serves the reads of
+GET and HEAD requests; everything else (writes, reads of unsafe requests
+and of @primary_only views, management commands) uses "default", the
+primary. ReplicaPinMiddleware decides per request by setting a context
+variable, so the choice follows the request into threads and async
+tasks, and streaming responses keep it while they are iterated.
+"""
+from contextvars import ContextVar
+
+REPLICA = "replica"
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def read_from_replica(enabled=True):
+    """Send this context's reads to the replica (or back to the primary)."""
+    _read_from_replica.set(enabled)
+
+
+def primary_only(view):
+    """Mark a view that writes on GET, so it reads from the primary."""
+    view.primary_only = True
+    return view
+
+
+def is_primary_only(view):
+    # as_view() functions carry their class
+    return getattr(view, "primary_only", False) or getattr(
+        getattr(view, "view_class", None), "primary_only", False)
+
+
+def is_write(request, view):
+    """Whether a request writes: an unsafe method or a @primary_only view."""
+    return (request.method not in ("GET", "HEAD", "OPTIONS")
+            or is_primary_only(view))
+
+
+class ReplicaRouter:
+    """Route reads to the replica where enabled, writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return REPLICA if _read_from_replica.get() else "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema from the primary by replication
+        return db == "default"
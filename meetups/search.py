@@ -0,0 +1,133 @@
+"""
+Full-text search over meetup title, description and location.
+
+The index lives in the database and is maintained by it on every write
+(see migration 0005_add_meetup_search_index):
+- PostgreSQL: a generated, weighted tsvector column with a GIN index.
+- SQLite: an FTS5 external-content table kept in sync by triggers.
+Other backends fall back to (slow) icontains matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Meetup
+
+# Control characters mark highlighted terms in database snippets, so they
+# survive HTML escaping and cannot be forged by meetup text
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+POSTGRES_CONFIG = "english"
+
+
+class SearchResult:
+    """A ranked meetup match with an HTML-safe highlighted snippet."""
+
+    def __init__(self, meetup, rank, snippet):
+        self.meetup = meetup
+        self.rank = rank
+        self.snippet = highlight(snippet)
+
+
+def highlight(snippet):
+    """Escape a database snippet and turn term markers into <mark>."""
+    html = escape(snippet or "")
+    html = html.replace(HIGHLIGHT_START, "<mark>")
+    html = html.replace(HIGHLIGHT_STOP, "</mark>")
+    return mark_safe(html)
+
+
+def _postgres_matches(query, limit, offset):
+    options = (f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+               "MaxFragments=2, MaxWords=25, MinWords=10")
+    # Rank and limit first, so headlines are only built for shown rows
+    sql = f"""
+        SELECT hits.id, hits.rank,
+               ts_headline('{POSTGRES_CONFIG}', m.description, hits.q, %s)
+        FROM (
+            SELECT id, q, ts_rank(search_document, q) AS rank
+            FROM meetups_meetup,
+                 websearch_to_tsquery('{POSTGRES_CONFIG}', %s) AS q
+            WHERE search_document @@ q
+            ORDER BY rank DESC, id DESC
+            LIMIT %s OFFSET %s
+        ) AS hits
+        JOIN meetups_meetup m ON m.id = hits.id
+        ORDER BY hits.rank DESC, hits.id DESC
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [options, query, limit, offset])
+        return cursor.fetchall()
+
+
+def _fts5_query(query):
+    """
+    Turn free user input into a safe FTS5 expression: every word is
+    quoted (so operators and punctuation are literal) and the last one
+    matches as a prefix for search-as-you-type.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    quoted = ['"{}"'.format(term) for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _sqlite_matches(query, limit, offset):
+    expression = _fts5_query(query)
+    if expression is None:
+        return []
+    # bm25 weights follow column order: title, description, location
+    sql = """
+        SELECT rowid, bm25(meetups_meetup_fts, 10.0, 1.0, 5.0) AS rank,
+               snippet(meetups_meetup_fts, -1, %s, %s, '...', 24)
+        FROM meetups_meetup_fts
+        WHERE meetups_meetup_fts MATCH %s
+        ORDER BY rank, rowid DESC
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [HIGHLIGHT_START, HIGHLIGHT_STOP, expression,
+                             limit, offset])
+        # bm25 is lower for better matches, flip it to "higher is better"
+        return [(pk, -rank, snippet)
+                for pk, rank, snippet in cursor.fetchall()]
+
+
+def _fallback_matches(query, limit, offset):
+    matches = Meetup.objects.filter(
+        Q(title__icontains=query) |
+        Q(description__icontains=query) |
+        Q(location_text__icontains=query)
+    ).order_by("-start_datetime", "-id")[offset:offset + limit]
+    return [(meetup.pk, 0.0, meetup.description[:200]) for meetup in matches]
+
+
+def search_meetups(query, limit=12, offset=0):
+    """
+    Return ranked SearchResult objects for a free-text query.
+    Uses the database's full-text index, then loads the matched meetups
+    (with organizers) in a single query.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    backend = {
+        "postgresql": _postgres_matches,
+        "sqlite": _sqlite_matches,
+    }.get(connection.vendor, _fallback_matches)
+    matches = backend(query, limit, offset)
+
+    meetups = Meetup.objects.select_related("organizer").in_bulk(
+        [pk for pk, _, _ in matches])
+    return [
+        SearchResult(meetups[pk], rank, snippet)
+        for pk, rank, snippet in matches
+        if pk in meetups
+    ]
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import LIST_SCOPE, bump_version, meetup_scope
+from .middleware import install_query_tracking
+from .models import Meetup, MeetupParticipation
+
+
+@receiver(post_delete, sender=MeetupParticipation)
+def release_participation_counts(sender, instance, origin=None, **kwargs):
+    """
+    Decrement Meetup counters when a participation is deleted.
+    Runs inside the deletion transaction, so direct deletes and cascades
+    from a deleted user stay consistent. Skipped when the meetup itself
+    is being deleted, as there is nothing left to keep in sync.
+    """
+    if isinstance(origin, Meetup) or getattr(origin, "model", None) is Meetup:
+        return
+    status = getattr(instance, "_loaded_status", instance.status)
+    instance.update_meetup_counts(status, None)
+
+
+def invalidate_pages(*scopes):
+    """
+    Bump cache versions now, so the rest of this transaction reads fresh
+    pages, and again after commit, so pages re-cached by other requests
+    from not yet committed data are dropped as well.
+    """
+    def bump():
+        for scope in scopes:
+            bump_version(scope)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+@receiver([post_save, post_delete], sender=Meetup)
+def invalidate_meetup_pages(sender, instance, **kwargs):
+    """Drop cached list and detail pages showing a changed meetup."""
+    invalidate_pages(LIST_SCOPE, meetup_scope(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=MeetupParticipation)
+def invalidate_participation_pages(sender, instance, **kwargs):
+    """Drop cached pages showing counts or fullness of the meetup."""
+    invalidate_pages(LIST_SCOPE, meetup_scope(instance.meetup_id))
+
+
+@receiver(connection_created)
+def track_connection_queries(sender, connection, **kwargs):
+    # Each thread opens its own connections: count queries on all of them
+    install_query_tracking(connection)
@@ -0,0 +1,202 @@
+"""
+A django.tasks backend that keeps its queue in the database.
+
+Django ships backends that run tasks immediately or not at all; this one
+stores each enqueued task as a QueuedTask row and leaves running it to
+worker processes (manage.py run_tasks), so the request that enqueued it
+only pays for an INSERT. As the row is written on the request's own
+connection, a task enqueued inside a transaction commits or rolls back
+with the changes it is about, and a worker never picks up a task for data
+it cannot see yet.
+
+Workers claim tasks with a conditional UPDATE from READY to RUNNING, so
+any number of them can share a queue on SQLite and PostgreSQL alike.
+Tasks run once: a failure is recorded on the row, not retried. Tasks
+left RUNNING by a worker that died are failed after a timeout.
+"""
+from traceback import format_exception
+
+from django.db.models import Q
+from django.tasks.backends.base import BaseTaskBackend
+from django.tasks.base import (
+    Task, TaskContext, TaskError, TaskResult, TaskResultStatus,
+)
+from django.tasks.exceptions import TaskResultDoesNotExist
+from django.tasks.signals import task_enqueued, task_finished, task_started
+from django.utils import timezone
+from django.utils.json import normalize_json
+from django.utils.module_loading import import_string
+
+# Claim attempts per poll, when other workers take the first candidates
+CLAIM_CANDIDATES = 10
+
+
+class WorkerLost(Exception):
+    """Recorded on tasks whose worker stopped before finishing them."""
+
+
+class DatabaseBackend(BaseTaskBackend):
+    supports_defer = True
+    supports_get_result = True
+    supports_priority = True
+
+    def enqueue(self, task, args, kwargs):
+        # The models module enqueues tasks itself
+        from .models import QueuedTask
+
+        self.validate_task(task)
+        row = QueuedTask.objects.create(
+            backend=self.alias,
+            queue_name=task.queue_name,
+            task_path=task.module_path,
+            priority=task.priority,
+            args=normalize_json(args),
+            kwargs=normalize_json(kwargs),
+            run_after=task.run_after,
+        )
+        task_result = self.to_result(row, task)
+        task_enqueued.send(type(self), task_result=task_result)
+        return task_result
+
+    def get_result(self, result_id):
+        from .models import QueuedTask
+
+        try:
+            row = QueuedTask.objects.get(pk=int(result_id),
+                                         backend=self.alias)
+        except (ValueError, QueuedTask.DoesNotExist):
+            raise TaskResultDoesNotExist(result_id)
+        return self.to_result(row, self.load_task(row))
+
+    def load_task(self, row):
+        """Return the Task a row was enqueued with."""
+        task = import_string(row.task_path)
+        if not isinstance(task, Task):
+            raise TypeError(f"{row.task_path} is not a task.")
+        return task.using(
+            priority=row.priority,
+            queue_name=row.queue_name,
+            run_after=row.run_after,
+            backend=self.alias,
+        )
+
+    def to_result(self, row, task):
+        task_result = TaskResult(
+            task=task,
+            id=str(row.pk),
+            status=TaskResultStatus(row.status),
+            enqueued_at=row.enqueued_at,
+            started_at=row.started_at,
+            finished_at=row.finished_at,
+            last_attempted_at=row.last_attempted_at,
+            args=row.args,
+            kwargs=row.kwargs,
+            backend=self.alias,
+            errors=[TaskError(**error) for error in row.errors],
+            worker_ids=row.worker_ids,
+        )
+        object.__setattr__(task_result, "_return_value", row.return_value)
+        return task_result
+
+    def claim(self, worker_id, queues=None):
+        """
+        Mark the next task due on queues (all of this backend's by
+        default) as running on worker_id and return its row, or None
+        when nothing is due.
+        """
+        from .models import QueuedTask
+
+        now = timezone.now()
+        due = (
+            QueuedTask.objects
+            .filter(backend=self.alias,
+                    queue_name__in=queues or self.queues,
+                    status=TaskResultStatus.READY)
+            .filter(Q(run_after__isnull=True) | Q(run_after__lte=now))
+            .order_by("-priority", "enqueued_at", "pk")
+        )
+        for pk in due.values_list("pk", flat=True)[:CLAIM_CANDIDATES]:
+            # Only one worker's UPDATE still finds the task READY
+            claimed = QueuedTask.objects.filter(
+                pk=pk, status=TaskResultStatus.READY
+            ).update(
+                status=TaskResultStatus.RUNNING,
+                started_at=now,
+                last_attempted_at=now,
+            )
+            if claimed:
+                row = QueuedTask.objects.get(pk=pk)
+                row.worker_ids.append(worker_id)
+                row.save(update_fields=["worker_ids"])
+                return row
+        return None
+
+    def fail_stale(self, started_before):
+        """
+        Fail the tasks RUNNING since before started_before, whose worker
+        must have died, and return how many. They are not run again, as
+        they may have done part of their work.
+        """
+        from .models import QueuedTask
+
+        failed = 0
+        stale = QueuedTask.objects.filter(
+            backend=self.alias,
+            status=TaskResultStatus.RUNNING,
+            started_at__lt=started_before,
+        )
+        for row in stale:
+            self.record_failure(row, WorkerLost(
+                f"Running since {row.started_at.isoformat()} on worker "
+                f"{row.worker_ids[-1] if row.worker_ids else '(unknown)'}."))
+            # Unless its worker finished it meanwhile
+            failed += QueuedTask.objects.filter(
+                pk=row.pk, status=TaskResultStatus.RUNNING
+            ).update(status=row.status, finished_at=row.finished_at,
+                     errors=row.errors)
+        return failed
+
+    def run(self, row):
+        """Run a claimed task and store its outcome on the row."""
+        try:
+            task = self.load_task(row)
+        except Exception as e:
+            # Removed or renamed since it was enqueued: there is no Task
+            # to report through the signals
+            self.record_failure(row, e)
+            row.save()
+            return None
+
+        task_result = self.to_result(row, task)
+        task_started.send(type(self), task_result=task_result)
+        try:
+            if task.takes_context:
+                return_value = task.call(
+                    TaskContext(task_result=task_result),
+                    *row.args, **row.kwargs)
+            else:
+                return_value = task.call(*row.args, **row.kwargs)
+            row.return_value = normalize_json(return_value)
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:
+            self.record_failure(row, e)
+        else:
+            row.status = TaskResultStatus.SUCCESSFUL
+            row.finished_at = timezone.now()
+        row.save()
+        task_result = self.to_result(row, task)
+        task_finished.send(type(self), task_result=task_result)
+        return task_result
+
+    @staticmethod
+    def record_failure(row, exception):
+        exception_type = type(exception)
+        row.errors.append({
+            "exception_class_path": (
+                f"{exception_type.__module__}.{exception_type.__qualname__}"
+            ),
+            "traceback": "".join(format_exception(exception)),
+        })
+        row.status = TaskResultStatus.FAILED
+        row.finished_at = timezone.now()
@@ -0,0 +1,130 @@
+"""
+Notification emails, sent by background tasks (see meetups.taskqueue).
+
+Requests only enqueue tasks, in the transaction of the change they
+report, and never wait on the mail server:
+- participants hear about the organizer's decision on their request
+  (notify_participants, queued by MeetupParticipation.approve(),
+  reject() and Meetup.review_requests()),
+- organizers get their new requests in digests: every request adds a
+  RequestNotification, and the first one since the last digest schedules
+  send_request_digest NOTIFICATION_DIGEST_MINUTES later, which sends
+  everything collected meanwhile in a single email.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail, send_mass_mail
+from django.db import transaction
+from django.tasks import task
+from django.utils import timezone
+
+from .models import MeetupParticipation, RequestNotification
+
+
+def absolute_url(path):
+    return f"{settings.SITE_URL}{path}"
+
+
+def notify_organizer(participation):
+    """
+    Add a new pending request to its organizer's next digest, scheduling
+    the digest unless one is due already.
+    """
+    organizer_id = participation.meetup.organizer_id
+    interval = timedelta(minutes=settings.NOTIFICATION_DIGEST_MINUTES)
+    now = timezone.now()
+    # Unsent notifications of the last interval have their digest coming;
+    # older ones were missed by a failed digest and go in a new one
+    due = RequestNotification.objects.filter(
+        recipient_id=organizer_id,
+        sent_at__isnull=True,
+        created_at__gt=now - interval,
+    ).exists()
+    RequestNotification.objects.create(
+        recipient_id=organizer_id, participation=participation)
+    if not due:
+        send_request_digest.using(run_after=now + interval).enqueue(
+            organizer_id)
+
+
+@task
+def send_request_digest(recipient_id):
+    """
+    Email an organizer the requests to join their meetups collected since
+    the last digest. Returns the number of requests listed.
+    """
+    with transaction.atomic():
+        # Locked, so concurrent digests never send a notification twice;
+        # rolled back as unsent if the email fails
+        notifications = list(
+            RequestNotification.objects
+            .select_for_update(of=("self",))
+            .filter(recipient_id=recipient_id, sent_at__isnull=True)
+            .select_related(
+                "recipient", "participation__user", "participation__meetup")
+            .order_by("created_at")
+        )
+        if not notifications:
+            return 0
+        RequestNotification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]
+        ).update(sent_at=timezone.now())
+
+        # Requests decided meanwhile need no attention
+        requests = [
+            notification.participation for notification in notifications
+            if notification.participation.status
+            == MeetupParticipation.Status.PENDING
+        ]
+        recipient = notifications[0].recipient
+        if not requests or not recipient.email:
+            return 0
+
+        by_meetup = {}
+        for participation in requests:
+            by_meetup.setdefault(participation.meetup, []).append(
+                participation.user.username)
+        sections = [
+            f"{meetup.title} ({absolute_url(meetup.get_absolute_url())}):\n"
+            + "\n".join(f"- {username}" for username in usernames)
+            for meetup, usernames in by_meetup.items()
+        ]
+        send_mail(
+            f"{len(requests)} new request(s) to join your meetups",
+            f"Hi {recipient.username},\n\n"
+            "People asked to join your meetups:\n\n"
+            + "\n\n".join(sections)
+            + "\n\nApprove or reject them on the meetup pages.\n",
+            None,
+            [recipient.email],
+        )
+    return len(requests)
+
+
+@task
+def notify_participants(participation_ids, approved):
+    """
+    Email participants that their requests were approved (or rejected).
+    Requests whose status changed again since are skipped. Returns the
+    number of emails sent.
+    """
+    status = (MeetupParticipation.Status.GOING if approved
+              else MeetupParticipation.Status.NOT_GOING)
+    participations = MeetupParticipation.objects.filter(
+        pk__in=participation_ids, status=status,
+    ).exclude(user__email="").select_related("user", "meetup")
+    decision = "approved" if approved else "declined"
+    return send_mass_mail([
+        (
+            f"Your request to join {participation.meetup.title} "
+            f"was {decision}",
+            f"Hi {participation.user.username},\n\n"
+            f"The organizer {decision} your request to join "
+            f"{participation.meetup.title}:\n"
+            f"{absolute_url(participation.meetup.get_absolute_url())}\n",
+            None,
+            [participation.user.email],
+        )
+        for participation in participations
+    ])
@@ -1,10 +1,50 @@
-from django.test import TestCase, Client
-from django.core.exceptions import ValidationError
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import F, Q
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core import mail
+from django.db import transaction
+from django.test import (
+    TestCase, TransactionTestCase, Client, RequestFactory,
+)
+from django.test.utils import CaptureQueriesContext
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.http import HttpResponse
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.contrib.sessions.models import Session
+from django.urls import resolve, reverse
 from django.utils import timezone
-from datetime import timedelta
-from meetups.models import Meetup, MeetupParticipation
+from datetime import timedelta, timezone as dt_timezone
+from meetups import geo, urls as meetups_urls
+from meetups.budget import QueryBudgetExceeded, get_query_budget
+from meetups.ical import feed_token
+from meetups.metrics import collect, registry
+from meetups.middleware import PIN_COOKIE, ReplicaPinMiddleware
+from meetups.models import (
+    Meetup, MeetupFullError, MeetupParticipation, QueuedTask,
+    RequestNotification,
+)
+from meetups.ratelimit import client_ip, parse_rate, take
+from meetups.replica import REPLICA, ReplicaRouter, read_from_replica
+from meetups.search import search_meetups
+from meetups.taskqueue import DatabaseBackend
+from meetups.tasks import (
+    notify_organizer, notify_participants, send_request_digest,
+)
+from meetups.views import MeetupDetailView, MeetupsListView
 
 User = get_user_model()
 
@@ -68,6 +108,63 @@ class ParticipationModelTest(TestCase):
         self.assertEqual(participation.status, "going")
         self.assertIsNotNone(participation.approved_at)
 
+    def assertCounts(self, going, pending):
+        self.meetup.refresh_from_db()
+        self.assertEqual(self.meetup.going_count, going)
+        self.assertEqual(self.meetup.pending_count, pending)
+
+    def test_counters_follow_status_changes(self):
+        """Test going/pending counters on create, approve, reject, delete."""
+        participation = MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="pending"
+        )
+        self.assertCounts(going=0, pending=1)
+        participation.approve()
+        self.assertCounts(going=1, pending=0)
+        participation.reject()
+        self.assertCounts(going=0, pending=0)
+        participation.status = "going"
+        participation.save()
+        self.assertCounts(going=1, pending=0)
+        participation.delete()
+        self.assertCounts(going=0, pending=0)
+
+    def test_counters_follow_cascade_delete(self):
+        """Test counters are released when a participant is deleted."""
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="going"
+        )
+        self.assertCounts(going=1, pending=0)
+        self.guest.delete()
+        self.assertCounts(going=0, pending=0)
+
+    def test_is_full_uses_stored_counter(self):
+        """Test that is_full() runs no COUNT query."""
+        self.meetup.max_participants = 1
+        self.meetup.save()
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="going"
+        )
+        self.meetup.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertTrue(self.meetup.is_full())
+
+    def test_sync_participation_counts_command(self):
+        """Test the command detects and rebuilds stale counters."""
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="going"
+        )
+        Meetup.objects.filter(pk=self.meetup.pk).update(
+            going_count=5, pending_count=2)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "sync_participation_counts", "--check", stdout=StringIO())
+        call_command("sync_participation_counts", stdout=StringIO())
+        self.assertCounts(going=1, pending=0)
+        call_command(
+            "sync_participation_counts", "--check", stdout=StringIO())
+
 
 User = get_user_model()
 
@@ -125,3 +222,2294 @@ class MeetupViewTests(TestCase):
         self.assertEqual(participation.status, "going")
         self.assertRedirects(response, reverse(
             'meetup_detail', kwargs={'pk': self.meetup.pk}))
+
+
+class MeetupListViewTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user1 = User.objects.create_user(
+            username="user1", password="password")
+        self.user2 = User.objects.create_user(
+            username="user2", password="password")
+        now = timezone.now()
+        # Other users' meetups start earlier, so they would be listed first
+        # without the "my meetups first" ordering
+        for i in range(20):
+            Meetup.objects.create(
+                organizer=self.user2,
+                title=f"Other Event {i}",
+                start_datetime=now + timedelta(days=i + 1),
+                duration_minutes=60,
+            )
+        for i in range(3):
+            Meetup.objects.create(
+                organizer=self.user1,
+                title=f"My Event {i}",
+                start_datetime=now + timedelta(days=30 + i),
+                duration_minutes=60,
+            )
+
+    def test_own_meetups_listed_first(self):
+        """Test that the organizer's meetups open the first page."""
+        self.client.login(username="user1", password="password")
+        response = self.client.get(reverse('meetup_list'))
+        meetups = list(response.context['meetups'])
+        self.assertEqual(len(meetups), 12)
+        self.assertTrue(all(m.organizer == self.user1 for m in meetups[:3]))
+        self.assertTrue(all(m.organizer == self.user2 for m in meetups[3:]))
+
+    def test_list_query_count_is_fixed(self):
+        """Test that only the requested page is loaded from the database."""
+        self.client.login(username="user1", password="password")
+        # Session, user, own meetups and other meetups (no COUNT)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('meetup_list'))
+
+        for i in range(20):
+            Meetup.objects.create(
+                organizer=self.user2,
+                title=f"More Event {i}",
+                start_datetime=timezone.now() + timedelta(days=40 + i),
+                duration_minutes=60,
+            )
+        with self.assertNumQueries(4):
+            self.client.get(reverse('meetup_list'))
+
+    def test_cursor_pages_cover_list_in_order(self):
+        """Test walking next cursors returns every meetup exactly once."""
+        self.client.login(username="user1", password="password")
+        seen, cursor = [], None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            response = self.client.get(reverse('meetup_list'), params)
+            page = response.context['page_obj']
+            seen.extend(m.pk for m in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        mine = Meetup.objects.filter(
+            organizer=self.user1).order_by('-start_datetime', '-id')
+        others = Meetup.objects.filter(
+            organizer=self.user2).order_by('-start_datetime', '-id')
+        self.assertEqual(
+            seen, [m.pk for m in mine] + [m.pk for m in others])
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Test that the previous cursor leads back to the same page."""
+        first = self.client.get(reverse('meetup_list')).context['page_obj']
+        second = self.client.get(
+            reverse('meetup_list'), {'cursor': first.next_cursor}
+        ).context['page_obj']
+        back = self.client.get(
+            reverse('meetup_list'), {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_returns_404(self):
+        """Test that a tampered cursor token is rejected."""
+        response = self.client.get(
+            reverse('meetup_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_json_list_includes_cursors(self):
+        """Test the JSON output exposes opaque next/previous tokens."""
+        response = self.client.get(reverse('meetup_list_json'))
+        data = response.json()
+        self.assertEqual(len(data['results']), 12)
+        self.assertIsNone(data['previous'])
+        self.assertIsNotNone(data['next'])
+
+        response = self.client.get(
+            reverse('meetup_list_json'), {'cursor': data['next']})
+        data = response.json()
+        self.assertEqual(len(data['results']), 11)
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+
+class MyMeetupsViewTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="member", password="password")
+        self.other = User.objects.create_user(
+            username="other", password="password")
+        self.client.login(username="member", password="password")
+        self.url = reverse('my_meetups')
+        self.days = 0
+        self.add_events(2)
+
+    def create_meetup(self, organizer, **kwargs):
+        self.days += 1
+        return Meetup.objects.create(
+            organizer=organizer,
+            title=f"Event {self.days}",
+            start_datetime=timezone.now() + timedelta(days=self.days),
+            duration_minutes=60,
+            **kwargs,
+        )
+
+    def add_events(self, count):
+        """Add count events to every section, and some that don't belong."""
+        Status = MeetupParticipation.Status
+        for _ in range(count):
+            organized = self.create_meetup(self.user)
+            MeetupParticipation.objects.create(
+                meetup=organized, user=self.other, status=Status.GOING)
+            for status in (Status.GOING, Status.PENDING, Status.WAITLISTED,
+                           Status.NOT_GOING):
+                MeetupParticipation.objects.create(
+                    meetup=self.create_meetup(self.other),
+                    user=self.user, status=status)
+            self.create_meetup(self.other)
+
+    def test_sections(self):
+        """Test each section lists only the user's events of its kind."""
+        response = self.client.get(self.url)
+        organizing = list(response.context['organizing']['page'])
+        self.assertEqual(
+            organizing,
+            list(Meetup.objects.filter(organizer=self.user)
+                 .order_by('-start_datetime')))
+        self.assertEqual([m.going_count for m in organizing], [1, 1])
+        self.assertEqual(
+            {p.status for p in response.context['going']['page']},
+            {MeetupParticipation.Status.GOING})
+        self.assertEqual(
+            {p.status for p in response.context['requests']['page']},
+            {MeetupParticipation.Status.PENDING,
+             MeetupParticipation.Status.WAITLISTED})
+        self.assertEqual(len(response.context['requests']['page']), 4)
+        self.assertContains(response, "Waitlisted")
+
+    def test_query_count_is_fixed(self):
+        """Test the query count does not grow with the user's events."""
+        # Session, user, and one query per section
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+        self.add_events(10)
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertTrue(response.context['going']['page'].has_next())
+
+    def test_sections_paginate_independently(self):
+        """Test a section's pages keep the other sections' positions."""
+        self.add_events(10)
+        first = self.client.get(self.url).context
+        response = self.client.get(first['going']['next_url'])
+        going_page = list(response.context['going']['page'])
+        self.assertEqual(len(going_page), 6)
+        self.assertNotIn(going_page[0], first['going']['page'])
+        self.assertFalse(response.context['going']['next_url'])
+
+        # Following another section's link keeps the going page
+        response = self.client.get(
+            response.context['requests']['next_url'])
+        self.assertEqual(
+            list(response.context['going']['page']), going_page)
+        self.assertTrue(response.context['requests']['page'].has_previous())
+
+    def test_login_required(self):
+        """Test anonymous visitors are sent to log in."""
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('account_login'), response.url)
+
+
+class CapacityTests(TestCase):
+    def setUp(self):
+        self.org = User.objects.create_user(username="org", password="pass")
+        self.guest = User.objects.create_user(
+            username="guest", password="pass")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Capped Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            max_participants=1,
+            is_open=False,
+        )
+        other = User.objects.create_user(username="other", password="pass")
+        MeetupParticipation.objects.create(
+            user=other, meetup=self.meetup, status="going")
+
+    def test_approve_beyond_capacity_raises(self):
+        """Test that approving into a full meetup writes nothing."""
+        participation = MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="pending")
+        with self.assertRaises(MeetupFullError):
+            participation.approve()
+        participation.refresh_from_db()
+        self.meetup.refresh_from_db()
+        self.assertEqual(participation.status, "pending")
+        self.assertEqual(self.meetup.going_count, 1)
+
+    def test_stale_capacity_check_cannot_overbook(self):
+        """Test the seat is re-checked at write time, not read time."""
+        stale = Meetup.objects.get(pk=self.meetup.pk)
+        stale.going_count = 0  # Looks free to the caller
+        self.assertFalse(stale.is_full())
+        with self.assertRaises(MeetupFullError):
+            MeetupParticipation.objects.create(
+                user=self.guest, meetup=stale, status="going")
+        self.assertFalse(MeetupParticipation.objects.filter(
+            user=self.guest).exists())
+
+
+class ConcurrentJoinTests(TransactionTestCase):
+    def test_simultaneous_joins_never_exceed_capacity(self):
+        """Test many users hitting Join at once fill exactly the seats."""
+        organizer = User.objects.create_user(username="org", password="pass")
+        meetup = Meetup.objects.create(
+            organizer=organizer,
+            title="Popular Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            max_participants=5,
+            is_open=True,
+        )
+        url = reverse('toggle_participation', kwargs={'pk': meetup.pk})
+        clients = []
+        for i in range(20):
+            client = Client()
+            client.force_login(User.objects.create_user(
+                username=f"guest{i}", password="pass"))
+            clients.append(client)
+
+        barrier = threading.Barrier(len(clients))
+        errors = []
+
+        def join(client):
+            try:
+                barrier.wait()
+                client.post(url)
+            except Exception as exc:  # Surface failures from threads
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=join, args=(client,))
+                   for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        meetup.refresh_from_db()
+        self.assertEqual(meetup.going_count, 5)
+        self.assertEqual(meetup.participations.filter(
+            status=MeetupParticipation.Status.GOING).count(), 5)
+
+
+class IndexUsageTests(TestCase):
+    """EXPLAIN-based checks that hot queries are served by indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create(
+            [User(username=f"user{i}") for i in range(50)])
+        now = timezone.now()
+        Meetup.objects.bulk_create([
+            Meetup(
+                organizer=cls.users[i % 50],
+                title=f"Event {i}",
+                description="Description",
+                start_datetime=now + timedelta(hours=i),
+                duration_minutes=60,
+                location_text="Remote",
+            )
+            for i in range(3000)
+        ])
+        cls.meetup = Meetup.objects.order_by('pk').first()
+        statuses = ["going", "pending", "not_going"]
+        MeetupParticipation.objects.bulk_create([
+            MeetupParticipation(
+                user=cls.users[j], meetup=meetup, status=statuses[j % 3])
+            for meetup in Meetup.objects.order_by('pk')[:200]
+            for j in range(10)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_list_ordering_uses_index(self):
+        """Test first and deep list pages use (start_datetime, id)."""
+        queryset = Meetup.objects.order_by('-start_datetime', '-id')
+        self.assertUsesIndex(queryset[:13], "meetup_start_id_idx")
+        last = queryset[1500]
+        deeper = queryset.filter(
+            Q(start_datetime__lte=last.start_datetime),
+            Q(start_datetime__lt=last.start_datetime) |
+            Q(start_datetime=last.start_datetime, id__lt=last.id))
+        self.assertUsesIndex(deeper[:13], "meetup_start_id_idx")
+
+    def test_my_meetups_uses_index(self):
+        """Test the organizer's own meetups use (organizer, start)."""
+        queryset = Meetup.objects.filter(
+            organizer=self.users[0]).order_by('-start_datetime', '-id')
+        self.assertUsesIndex(queryset[:13], "meetup_org_start_idx")
+
+    def test_participation_lookups_use_indexes(self):
+        """Test capacity and RSVP lookups use the status indexes."""
+        self.assertUsesIndex(
+            MeetupParticipation.objects.filter(
+                meetup=self.meetup, status="going"),
+            "mp_meetup_status_idx")
+        self.assertUsesIndex(
+            MeetupParticipation.objects.filter(
+                user=self.users[1], status="going"),
+            "mp_user_status_idx")
+        self.assertUsesIndex(
+            MeetupParticipation.objects.filter(
+                meetup=self.meetup, status="pending"
+            ).order_by('requested_at'),
+            "mp_pending_queue_idx")
+
+    def test_time_range_uses_index(self):
+        """Test "happening now" range lookups use (start, end)."""
+        now = timezone.now() + timedelta(hours=1500)
+        self.assertUsesIndex(
+            Meetup.objects.filter(
+                start_datetime__lte=now, end_datetime__gt=now),
+            "meetup_start_end_idx")
+
+    def test_near_me_uses_index(self):
+        """Test "near me" candidates come from geohash range scans."""
+        box = geo.bounding_box(52.52, 13.405, 10)
+        self.assertUsesIndex(
+            Meetup.objects.filter(
+                geo.box_filter(box), end_datetime__gt=timezone.now(),
+            ).order_by(),
+            "meetup_geohash_idx")
+
+
+class GeohashTests(TestCase):
+    def test_encode(self):
+        """Test geohashes match the reference encoding."""
+        self.assertEqual(geo.encode(57.64911, 10.40744), "u4pruydqq")
+        self.assertEqual(geo.encode(57.64911, 10.40744, 5), "u4pru")
+        self.assertEqual(geo.encode(-90, -180), "000000000")
+
+    def test_prefix_range(self):
+        """Test prefix ranges carry past the last base32 digit."""
+        self.assertEqual(geo.prefix_range("u4p"), ("u4p", "u4q"))
+        self.assertEqual(geo.prefix_range("u4z"), ("u4z", "u5"))
+        self.assertEqual(geo.prefix_range("zz"), ("zz", None))
+
+    def test_distance(self):
+        """Test the great-circle distance of known city pairs."""
+        self.assertAlmostEqual(
+            geo.distance_km(52.5200, 13.4050, 48.1351, 11.5820), 504, 0)
+        self.assertEqual(geo.distance_km(10, 20, 10, 20), 0)
+
+    def test_cover_contains_the_whole_box(self):
+        """Test every point of a box lies in one of its covering cells."""
+        for latitude, longitude, radius in [
+                (52.52, 13.405, 5), (0, 179.99, 20), (89.9, 0, 50)]:
+            box = geo.bounding_box(latitude, longitude, radius)
+            cells = geo.cover(box)
+            self.assertLessEqual(len(cells), geo.MAX_CELLS)
+            min_lat, min_lon, max_lat, max_lon = box
+            for lat in (min_lat, latitude, max_lat):
+                for lon in (min_lon, longitude, max_lon):
+                    lon = (lon + 180) % 360 - 180
+                    point = geo.encode(min(lat, 90), lon)
+                    self.assertTrue(
+                        any(point.startswith(cell) for cell in cells),
+                        (latitude, longitude, lat, lon))
+
+
+class NearMeSearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.start = timezone.now() + timedelta(days=1)
+        self.center = (52.52, 13.405)
+        # North of the centre, 0.01 degrees of latitude is about 1.1 km
+        self.meetups = [
+            self.create_meetup(f"{km} km", 52.52 + km / 111.2, 13.405)
+            for km in (0.5, 3, 8)
+        ]
+        self.far = self.create_meetup("Far away", 48.1351, 11.5820)
+        self.create_meetup("No coordinates", None, None)
+
+    def create_meetup(self, title, latitude, longitude, **kwargs):
+        return Meetup.objects.create(
+            organizer=self.org,
+            title=title,
+            start_datetime=kwargs.pop('start_datetime', self.start),
+            duration_minutes=60,
+            latitude=latitude,
+            longitude=longitude,
+            **kwargs,
+        )
+
+    def test_near_returns_nearest_first_within_radius(self):
+        """Test results are exact-distance filtered and sorted."""
+        results = Meetup.objects.near(*self.center, radius_km=5)
+        self.assertEqual([m for m, _ in results], self.meetups[:2])
+        self.assertAlmostEqual(results[1][1], 3, 1)
+        self.assertEqual(
+            len(Meetup.objects.near(*self.center, radius_km=10, limit=2)), 2)
+
+    def test_box_corners_outside_radius_are_dropped(self):
+        """Test candidates in the box but beyond the radius are left out."""
+        box = geo.bounding_box(*self.center, 5)
+        corner = self.create_meetup("Corner", box[2] - 0.001, box[3] - 0.001)
+        self.assertIn(
+            corner, Meetup.objects.filter(geo.box_filter(box)))
+        results = Meetup.objects.near(*self.center, radius_km=5)
+        self.assertNotIn(corner, [m for m, _ in results])
+
+    def test_across_the_antimeridian(self):
+        """Test searches find meetups on the other side of 180 degrees."""
+        east = self.create_meetup("East", 0, 179.95)
+        west = self.create_meetup("West", 0, -179.95)
+        results = Meetup.objects.near(0, 179.99, radius_km=20)
+        self.assertEqual({m for m, _ in results}, {east, west})
+
+    def test_geohash_follows_coordinates(self):
+        """Test the geohash is kept in sync on save and update_fields."""
+        meetup = self.meetups[0]
+        self.assertEqual(
+            meetup.geohash, geo.encode(meetup.latitude, meetup.longitude))
+        meetup.latitude, meetup.longitude = 48.1351, 11.5820
+        meetup.save(update_fields=['latitude', 'longitude'])
+        meetup.refresh_from_db()
+        self.assertEqual(meetup.geohash, geo.encode(48.1351, 11.5820))
+        meetup.latitude = meetup.longitude = None
+        meetup.save()
+        meetup.refresh_from_db()
+        self.assertIsNone(meetup.geohash)
+
+    def test_coordinates_come_in_pairs(self):
+        """Test a latitude without a longitude is rejected."""
+        meetup = Meetup(
+            organizer=self.org, title="Half", description="Description",
+            start_datetime=self.start, duration_minutes=60,
+            location_text="Somewhere", latitude=52.5)
+        with self.assertRaises(ValidationError) as error:
+            meetup.full_clean()
+        self.assertIn('longitude', error.exception.message_dict)
+
+    def test_near_page(self):
+        """Test the page lists upcoming nearby meetups with distances."""
+        self.create_meetup(
+            "Ended", 52.52, 13.405,
+            start_datetime=timezone.now() - timedelta(days=1))
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('meetup_near'), {
+                'lat': self.center[0], 'lon': self.center[1], 'radius': 5})
+        self.assertEqual(
+            [m for m, _ in response.context['results']], self.meetups[:2])
+        self.assertContains(response, "3.0 km away")
+        self.assertNotContains(response, "Ended")
+
+        response = self.client.get(reverse('meetup_near'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['results'], [])
+
+    def test_json_endpoint(self):
+        """Test the JSON results and the errors of a missing point."""
+        response = self.client.get(reverse('meetup_near_json'), {
+            'lat': self.center[0], 'lon': self.center[1]})
+        data = response.json()
+        self.assertEqual([r['id'] for r in data['results']],
+                         [m.pk for m in self.meetups])
+        self.assertAlmostEqual(data['results'][0]['distance_km'], 0.5, 2)
+
+        response = self.client.get(
+            reverse('meetup_near_json'), {'lat': 100})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'lat', 'lon'})
+
+
+class MeetupDetailViewTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.guest = User.objects.create_user(
+            username="guest", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Detail Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            max_participants=50,
+        )
+        self.url = reverse('meetup_detail', kwargs={'pk': self.meetup.pk})
+
+    def add_participants(self, count):
+        users = User.objects.bulk_create([
+            User(username=f"p{self.meetup.participations.count()}_{i}")
+            for i in range(count)
+        ])
+        for i, user in enumerate(users):
+            MeetupParticipation.objects.create(
+                user=user, meetup=self.meetup,
+                status="going" if i % 2 else "pending")
+
+    def assertConstantQueries(self, expected):
+        self.add_participants(2)
+        with self.assertNumQueries(expected):
+            self.client.get(self.url)
+        self.add_participants(20)
+        with self.assertNumQueries(expected):
+            response = self.client.get(self.url)
+        return response
+
+    def test_organizer_query_count_is_constant(self):
+        """Test the organizer dashboard does not query per participant."""
+        self.client.login(username="org", password="password")
+        # Session, user, meetup with organizer, participations with users
+        response = self.assertConstantQueries(4)
+        self.assertEqual(len(response.context['participations']), 22)
+        self.assertContains(response, "11 Going / 11 Pending / 22 Total")
+
+    def test_guest_query_count_is_constant(self):
+        """Test a participant only loads their own participation."""
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="going")
+        self.client.login(username="guest", password="password")
+        # Session, user, meetup with organizer, own participation
+        response = self.assertConstantQueries(4)
+        self.assertEqual(
+            response.context['user_participation'].user, self.guest)
+        self.assertNotIn('participations', response.context)
+
+    def test_anonymous_query_count_is_constant(self):
+        """Test anonymous visitors only load the meetup itself."""
+        self.assertConstantQueries(1)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.guest = User.objects.create_user(
+            username="guest", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Cached Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.detail_url = reverse(
+            'meetup_detail', kwargs={'pk': self.meetup.pk})
+
+    def test_anonymous_list_served_from_cache(self):
+        """Test a repeated anonymous list hit runs no queries."""
+        self.client.get(reverse('meetup_list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('meetup_list'))
+        self.assertContains(response, "Cached Meetup")
+
+    def test_meetup_change_invalidates_list(self):
+        """Test saving a meetup bumps the list version."""
+        self.client.get(reverse('meetup_list'))
+        self.meetup.title = "Renamed Meetup"
+        self.meetup.save()
+        response = self.client.get(reverse('meetup_list'))
+        self.assertContains(response, "Renamed Meetup")
+
+    def test_anonymous_detail_served_from_cache(self):
+        """Test a repeated anonymous detail hit runs no queries."""
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+        self.assertContains(response, "Cached Meetup")
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+
+    def test_participation_change_invalidates_detail(self):
+        """Test a participation change bumps the meetup version."""
+        self.client.get(self.detail_url)
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="going")
+        with self.assertNumQueries(1):
+            self.client.get(self.detail_url)
+
+    def test_other_meetups_stay_cached(self):
+        """Test a change to one meetup keeps other detail pages cached."""
+        self.client.get(self.detail_url)
+        other = Meetup.objects.create(
+            organizer=self.org,
+            title="Other Meetup",
+            start_datetime=timezone.now() + timedelta(days=2),
+            duration_minutes=60,
+        )
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=other, status="going")
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url)
+
+    def test_authenticated_pages_are_not_shared(self):
+        """Test signed-in users get pages rendered for them."""
+        self.client.get(self.detail_url)
+        self.client.login(username="guest", password="password")
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, "csrfmiddlewaretoken")
+        self.assertContains(response, "guest")
+
+
+class MeetupSearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="org", password="password")
+        start = timezone.now() + timedelta(days=1)
+        self.python = Meetup.objects.create(
+            organizer=self.user,
+            title="Python coders hangout",
+            description="Casual evening, bring your laptop",
+            location_text="Code Cafe",
+            start_datetime=start,
+            duration_minutes=60,
+        )
+        self.run = Meetup.objects.create(
+            organizer=self.user,
+            title="Morning trail run",
+            description="Coffee after, some of us write Python at work",
+            location_text="Treptower Park",
+            start_datetime=start,
+            duration_minutes=60,
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        """Test results are ranked with title matches above description."""
+        results = search_meetups("python")
+        self.assertEqual(
+            [r.meetup for r in results], [self.python, self.run])
+
+    def test_search_covers_location(self):
+        """Test that location text is searchable."""
+        results = search_meetups("treptower")
+        self.assertEqual([r.meetup for r in results], [self.run])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Test snippets mark matched terms and escape meetup text."""
+        self.run.description = "<b>Python</b> & coffee"
+        self.run.save()
+        snippet = search_meetups("coffee")[0].snippet
+        self.assertIn("<mark>coffee</mark>", snippet)
+        self.assertIn("&lt;b&gt;", snippet)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test the index is updated incrementally on save and delete."""
+        self.python.title = "Rust coders hangout"
+        self.python.save()
+        self.assertEqual(
+            [r.meetup for r in search_meetups("rust")], [self.python])
+        self.python.delete()
+        self.assertEqual(search_meetups("rust"), [])
+
+    def test_search_input_is_not_query_syntax(self):
+        """Test operators and quotes in user input cannot break the query."""
+        for query in ['"python', 'python AND', 'NEAR(', '*', '-']:
+            search_meetups(query)
+
+    def test_search_view(self):
+        """Test the search page renders highlighted results."""
+        response = self.client.get(reverse('meetup_search'), {'q': 'trail'})
+        self.assertContains(response, "Morning trail run")
+        self.assertContains(response, "<mark>")
+        self.assertNotContains(response, "Python coders hangout")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.guest = User.objects.create_user(
+            username="guest", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Conditional Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.detail_url = reverse(
+            'meetup_detail', kwargs={'pk': self.meetup.pk})
+
+    def test_detail_returns_304_without_rendering(self):
+        """Test a matching ETag is answered with 304 and no queries."""
+        response = self.client.get(self.detail_url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.detail_url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response['ETag'], etag)
+
+    def test_detail_if_modified_since(self):
+        """Test Last-Modified revalidation of the detail page."""
+        response = self.client.get(self.detail_url)
+        response = self.client.get(
+            self.detail_url,
+            headers={'if-modified-since': response['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_validators_expire_with_the_page(self):
+        """Test a worker that missed a version bump stops 304s in time."""
+        etag = self.client.get(self.detail_url)['ETag']
+        # Changed without signals, as seen from another worker's cache
+        Meetup.objects.filter(pk=self.meetup.pk).update(
+            updated_at=timezone.now() + timedelta(seconds=1))
+        with mock.patch('django.core.cache.backends.locmem.time') as clock:
+            clock.time.return_value = (
+                time.time() + settings.MEETUPS_PAGE_CACHE_TIMEOUT + 1)
+            response = self.client.get(
+                self.detail_url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_participation_change_updates_detail_etag(self):
+        """Test participation changes produce a new ETag."""
+        etag = self.client.get(self.detail_url)['ETag']
+        MeetupParticipation.objects.create(
+            user=self.guest, meetup=self.meetup, status="going")
+        response = self.client.get(
+            self.detail_url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_viewer(self):
+        """Test another viewer never gets a 304 for someone else's page."""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.login(username="guest", password="password")
+        response = self.client.get(
+            self.detail_url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_authenticated_detail_revalidates(self):
+        """Test signed-in users also get 304 when nothing changed."""
+        self.client.login(username="guest", password="password")
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.get(
+            self.detail_url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_returns_304_until_meetup_changes(self):
+        """Test list revalidation follows meetup changes."""
+        url = reverse('meetup_list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.meetup.title = "Renamed"
+        self.meetup.save()
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Renamed")
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.guest = User.objects.create_user(
+            username="guest", password="password")
+        now = timezone.now()
+        self.meetups = [
+            Meetup.objects.create(
+                organizer=self.guest if i == 0 else self.org,
+                title=f"Async Meetup {i}",
+                start_datetime=now + timedelta(days=i + 1),
+                duration_minutes=60,
+                max_participants=10,
+            )
+            for i in range(15)
+        ]
+        self.meetup = self.meetups[-1]
+        for user in User.objects.bulk_create(
+                [User(username=f"async{i}") for i in range(6)]):
+            MeetupParticipation.objects.create(
+                user=user, meetup=self.meetup, status="going")
+        self.detail_url = reverse(
+            'meetup_detail_async', kwargs={'pk': self.meetup.pk})
+
+    async def test_livez(self):
+        """Test the async liveness probe."""
+        response = await self.async_client.get(reverse('livez_probe_async'))
+        self.assertEqual(response.content, b"OK")
+
+    async def test_list_matches_sync_view(self):
+        """Test the async list pages like the sync one, own meetups first."""
+        await self.async_client.alogin(username="guest", password="password")
+        response = await self.async_client.get(reverse('meetup_list_async'))
+        sync_response = await self.async_client.get(reverse('meetup_list'))
+        self.assertEqual(
+            [m.pk for m in response.context['meetups']],
+            [m.pk for m in sync_response.context['meetups']],
+        )
+        self.assertEqual(response.context['meetups'][0], self.meetups[0])
+
+        cursor = response.context['page_obj'].next_cursor
+        response = await self.async_client.get(
+            reverse('meetup_list_async'), {'cursor': cursor})
+        self.assertEqual(len(response.context['meetups']), 3)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_detail_query_count(self):
+        """Test the async organizer dashboard keeps a fixed query count."""
+        self.client.login(username="org", password="password")
+        # Session, user, meetup with organizer, participations with users
+        with self.assertNumQueries(4):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(len(response.context['participations']), 6)
+        self.assertContains(response, "6 Going / 0 Pending / 6 Total")
+
+    async def test_detail_own_participation(self):
+        """Test other signed-in users only get their own participation."""
+        await self.async_client.alogin(username="guest", password="password")
+        response = await self.async_client.get(self.detail_url)
+        self.assertIsNone(response.context['user_participation'])
+        self.assertNotIn('participations', response.context)
+
+    def test_detail_cached_and_revalidated(self):
+        """Test anonymous detail pages come from the cache, then 304."""
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, "Async Meetup 14")
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.detail_url)
+            revalidated = self.client.get(
+                self.detail_url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_missing_meetup(self):
+        """Test an unknown meetup is a 404."""
+        response = await self.async_client.get(
+            reverse('meetup_detail_async', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkReviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Popular Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            is_open=False,
+            max_participants=3,
+        )
+        self.url = reverse(
+            'review_participations', kwargs={'pk': self.meetup.pk})
+
+    def add_requests(self, count, status="pending", meetup=None):
+        users = User.objects.bulk_create([
+            User(username=f"r{User.objects.count()}_{i}")
+            for i in range(count)
+        ])
+        return [
+            MeetupParticipation.objects.create(
+                user=user, meetup=meetup or self.meetup, status=status).pk
+            for user in users
+        ]
+
+    def statuses(self, pks):
+        return list(
+            MeetupParticipation.objects.filter(pk__in=pks)
+            .order_by('requested_at', 'pk').values_list('status', flat=True))
+
+    def test_approves_oldest_requests_up_to_capacity(self):
+        """Test only free seats are filled, in request order."""
+        self.add_requests(1, status="going")
+        pending = self.add_requests(4)
+        self.client.login(username="org", password="password")
+        response = self.client.post(
+            self.url, {'participation': pending, 'action': 'approve'},
+            follow=True)
+
+        self.assertEqual(self.statuses(pending),
+                         ["going", "going", "pending", "pending"])
+        self.meetup.refresh_from_db()
+        self.assertEqual(self.meetup.going_count, 3)
+        self.assertEqual(self.meetup.pending_count, 2)
+        self.assertContains(response, "2 approved, 2 left pending")
+
+    def test_rejects_overflow_when_asked(self):
+        """Test requests that do not fit are rejected with reject_rest."""
+        pending = self.add_requests(5)
+        outcome = self.meetup.review_requests(pending, reject_rest=True)
+        self.assertEqual(outcome, {
+            'approved': 3, 'rejected': 2, 'left_pending': 0, 'skipped': 0})
+        self.assertEqual(self.statuses(pending), ["going"] * 3 +
+                         ["not_going"] * 2)
+        call_command('sync_participation_counts', check=True,
+                     stdout=StringIO())
+
+    def test_bulk_reject(self):
+        """Test rejecting the selection takes no seats."""
+        pending = self.add_requests(3)
+        outcome = self.meetup.review_requests(pending, approve=False)
+        self.assertEqual(outcome['rejected'], 3)
+        self.meetup.refresh_from_db()
+        self.assertEqual(self.meetup.going_count, 0)
+        self.assertEqual(self.meetup.pending_count, 0)
+
+    def test_skips_foreign_and_reviewed_ids(self):
+        """Test IDs of other meetups or non-pending ones are left alone."""
+        other = Meetup.objects.create(
+            organizer=self.org, title="Other",
+            start_datetime=timezone.now() + timedelta(days=2),
+            duration_minutes=60)
+        foreign = self.add_requests(1, meetup=other)
+        going = self.add_requests(1, status="going")
+        outcome = self.meetup.review_requests(
+            foreign + going, approve=False)
+        self.assertEqual(outcome['skipped'], 2)
+        self.assertEqual(self.statuses(foreign + going), ["pending", "going"])
+
+    def test_query_count_does_not_grow_with_ids(self):
+        """Test reviewing 2 or 30 requests runs the same queries."""
+        self.meetup.max_participants = None
+        self.meetup.save()
+        few = self.add_requests(2)
+        many = self.add_requests(30)
+        # Savepoint, locked meetup, pending IDs, two updates, the
+        # participants' notification task, release
+        with self.assertNumQueries(7):
+            self.meetup.review_requests(few, reject_rest=True)
+        with self.assertNumQueries(7):
+            self.meetup.review_requests(many, reject_rest=True)
+        self.assertEqual(self.statuses(many), ["going"] * 30)
+
+    def test_only_organizer_can_review(self):
+        """Test other users cannot review requests."""
+        pending = self.add_requests(1)
+        User.objects.create_user(username="intruder", password="password")
+        self.client.login(username="intruder", password="password")
+        self.client.post(self.url, {'participation': pending})
+        self.assertEqual(self.statuses(pending), ["pending"])
+
+    def test_review_drops_cached_pages(self):
+        """Test bulk updates invalidate the cached list page."""
+        self.add_requests(2, status="going")
+        pending = self.add_requests(1)
+        full_badge = ">Full</span>"
+        self.assertNotContains(self.client.get(reverse('meetup_list')),
+                               full_badge)
+        self.client.login(username="org", password="password")
+        self.client.post(self.url, {'participation': pending})
+        self.client.logout()
+        self.assertContains(self.client.get(reverse('meetup_list')),
+                            full_badge)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.values.clear()
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        Meetup.objects.create(
+            organizer=self.org,
+            title="Measured Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+
+    def test_records_per_view_metrics(self):
+        """Test requests are reported under their URL name."""
+        self.client.get(reverse('meetup_list'))
+        self.client.get(reverse('meetup_list'))
+        self.client.get('/no-such-page/')
+        body = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn(
+            'meetmeet_http_requests_total{method="GET",status="200",'
+            'view="meetup_list"} 2', body)
+        self.assertIn(
+            'meetmeet_http_requests_total{method="GET",status="404",'
+            'view="<unmatched>"} 1', body)
+        self.assertIn(
+            'meetmeet_http_request_duration_seconds_count'
+            '{view="meetup_list"} 2', body)
+        self.assertIn(
+            'meetmeet_http_response_size_bytes_bucket'
+            '{view="meetup_list",le="+Inf"} 2', body)
+
+    def test_counts_database_queries(self):
+        """Test per-request query counts land in the right bucket."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('meetup_list'))
+        values = collect()
+        series = values[(
+            'meetmeet_db_queries_per_request', (('view', 'meetup_list'),))]
+        self.assertEqual(series[-1], 1)
+        self.assertEqual(series[-2], len(queries))
+
+    async def test_counts_queries_under_asgi(self):
+        """Test queries run off the event loop thread are recorded."""
+        meetup = await Meetup.objects.aget(title="Measured Meetup")
+        for url in (reverse('meetup_detail', kwargs={'pk': meetup.pk}),
+                    reverse('meetup_detail_async',
+                            kwargs={'pk': meetup.pk})):
+            await sync_to_async(cache.clear)()
+            self.assertEqual(
+                (await self.async_client.get(url)).status_code, 200)
+        for view in ('meetup_detail', 'meetup_detail_async'):
+            labels = (('view', view),)
+            series = collect()[('meetmeet_db_queries_per_request', labels)]
+            self.assertEqual(series[-1], 1)
+            self.assertGreater(series[-2], 0)
+            self.assertGreater(collect()[(
+                'meetmeet_db_query_duration_seconds_total', labels)], 0)
+
+    def test_aggregates_worker_snapshots(self):
+        """Test snapshots of other worker processes are summed in."""
+        labels = [['method', 'GET'], ['status', 200], ['view', 'livez_probe']]
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1-1.json"), "w") as f:
+                json.dump([['meetmeet_http_requests_total', labels, 5]], f)
+            with self.settings(METRICS_DIR=directory):
+                self.client.get(reverse('livez_probe'))
+                body = self.client.get(reverse('metrics')).content.decode()
+                # This worker wrote its own snapshot next to the other one
+                self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertIn(
+            'meetmeet_http_requests_total{method="GET",status="200",'
+            'view="livez_probe"} 6', body)
+
+    def test_folds_snapshots_of_exited_workers(self):
+        """Test exited workers' snapshots are merged into one file."""
+        labels = [['method', 'GET'], ['status', 200], ['view', 'livez_probe']]
+        exited = subprocess.Popen([sys.executable, "-c", ""])
+        exited.wait()
+        key = ('meetmeet_http_requests_total',
+               tuple(tuple(pair) for pair in labels))
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(METRICS_DIR=directory):
+                for start in (1, 2):
+                    with open(os.path.join(
+                            directory, f"{exited.pid}-{start}.json"),
+                            "w") as f:
+                        json.dump(
+                            [['meetmeet_http_requests_total', labels, 5]], f)
+                    self.assertEqual(collect()[key], 5 * start)
+                snapshots = sorted(
+                    name for name in os.listdir(directory)
+                    if name.endswith(".json"))
+        # This worker's own snapshot, and the exited ones folded in one
+        self.assertEqual(snapshots, [registry.filename, "retired.json"])
+
+    def test_token_protects_endpoint(self):
+        """Test a configured token is required to scrape metrics."""
+        with self.settings(METRICS_TOKEN="secret"):
+            self.assertEqual(
+                self.client.get(reverse('metrics')).status_code, 401)
+            response = self.client.get(
+                reverse('metrics'),
+                headers={'authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+
+class SeedMeetupsCommandTests(TestCase):
+    def seed(self, **options):
+        options.setdefault('users', 15)
+        options.setdefault('meetups', 40)
+        options.setdefault('participations', 6)
+        options.setdefault('batch_size', 7)
+        call_command('seed_meetups', stdout=StringIO(), **options)
+
+    def snapshot(self):
+        return list(
+            Meetup.objects.order_by('pk').values_list(
+                'title', 'is_open', 'max_participants', 'going_count',
+                'pending_count', 'organizer__username'))
+
+    def test_creates_consistent_data(self):
+        """Test seeded counters, capacity and statuses are consistent."""
+        self.seed()
+        self.assertEqual(
+            User.objects.filter(username__startswith="testuser_").count(), 15)
+        self.assertEqual(Meetup.objects.count(), 40)
+        self.assertTrue(MeetupParticipation.objects.exists())
+        # Raises if any stored counter differs from the real counts
+        call_command('sync_participation_counts', check=True,
+                     stdout=StringIO())
+        for meetup in Meetup.objects.exclude(max_participants=None):
+            self.assertLessEqual(meetup.going_count, meetup.max_participants)
+        self.assertFalse(MeetupParticipation.objects.filter(
+            meetup__is_open=True, status="pending").exists())
+        self.assertFalse(MeetupParticipation.objects.filter(
+            meetup__organizer=F('user')).exists())
+
+    def test_same_seed_same_data(self):
+        """Test a seed reproduces the data and --clear replaces it."""
+        self.seed(seed=7)
+        first = self.snapshot()
+        self.seed(seed=7, clear=True)
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(Meetup.objects.count(), 40)
+        self.seed(seed=8, clear=True)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_clear_with_requests_from_real_users(self):
+        """Test --clear removes notifications of requests to join."""
+        self.seed()
+        user = User.objects.create_user(username="real", password="x")
+        meetup = Meetup.objects.filter(is_open=False).first()
+        notify_organizer(MeetupParticipation.objects.create(
+            user=user, meetup=meetup, status="pending"))
+        self.seed(clear=True)
+        self.assertFalse(RequestNotification.objects.exists())
+        # Raises if a row still points at a deleted participation
+        connection.check_constraints()
+
+    def test_status_mix(self):
+        """Test the status mix is honoured and validated."""
+        self.seed(status_mix="not_going=1")
+        self.assertEqual(
+            set(MeetupParticipation.objects.values_list(
+                'status', flat=True)),
+            {"not_going"})
+        with self.assertRaises(CommandError):
+            self.seed(status_mix="attending=5")
+
+    def test_coordinates(self):
+        """Test the requested share of meetups gets coordinates."""
+        self.seed(meetups=200, coordinates=0.5)
+        located = Meetup.objects.exclude(latitude=None)
+        self.assertTrue(80 < located.count() < 120)
+        self.assertFalse(located.filter(geohash=None).exists())
+        self.assertFalse(
+            Meetup.objects.filter(latitude=None).exclude(
+                geohash=None).exists())
+        with self.assertRaises(CommandError):
+            self.seed(coordinates=2)
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        call_command('seed_meetups', users=30, meetups=40, participations=4,
+                     coordinates=0.5, stdout=StringIO())
+        Meetup.objects.filter(pk__in=Meetup.objects.order_by('pk')[:2]
+                              .values('pk')).update(
+            start_datetime=timezone.now() + timedelta(days=3),
+            max_participants=None)
+        first, second = Meetup.objects.order_by('pk')[:2]
+        Meetup.objects.filter(pk=first.pk).update(is_open=True)
+        Meetup.objects.filter(pk=second.pk).update(is_open=False)
+        self.output = tempfile.NamedTemporaryFile(suffix=".json")
+        self.addCleanup(self.output.close)
+
+    def benchmark(self, **options):
+        call_command('benchmark', iterations=2, warmup=0, deep_page=2,
+                     output=self.output.name, stdout=StringIO(), **options)
+        with open(self.output.name) as f:
+            return json.load(f)
+
+    def test_writes_results_for_every_scenario(self):
+        """Test all paths are measured and cleaned up after."""
+        report = self.benchmark()
+        self.assertEqual(set(report['results']), {
+            'list_anonymous_first', 'list_anonymous_deep',
+            'list_authenticated_first', 'list_authenticated_deep',
+            'detail_popular_anonymous', 'detail_popular_organizer',
+            'near_me_25km', 'toggle_participation', 'approve_participation',
+            'review_participations_20',
+        })
+        result = report['results']['detail_popular_organizer']
+        self.assertEqual(result['queries_max'], 4)
+        self.assertGreater(result['requests_per_second'], 0)
+        self.assertFalse(
+            User.objects.filter(username__startswith="benchmark_").exists())
+        self.assertFalse(QueuedTask.objects.exists())
+        self.assertFalse(RequestNotification.objects.exists())
+        call_command('sync_participation_counts', check=True,
+                     stdout=StringIO())
+
+    def test_compare_flags_regressions(self):
+        """Test more queries than the baseline fail the comparison."""
+        report = self.benchmark(only=['detail'])
+        baseline = self.output.name + ".baseline"
+        self.addCleanup(os.remove, baseline)
+        # A much slower baseline, so timing noise cannot fail the run
+        for result in report['results'].values():
+            result['p50_ms'] *= 100
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        self.benchmark(only=['detail'], compare=baseline)
+
+        report['results']['detail_popular_organizer']['queries_max'] = 1
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(
+                CommandError, "detail_popular_organizer"):
+            self.benchmark(only=['detail'], compare=baseline)
+
+    def test_session_queries_per_mode(self):
+        """Test cached sessions remove the session query from reports."""
+        queries = {}
+        for mode in ('db', 'cached_db'):
+            result = self.benchmark(
+                only=['detail_popular_organizer'], session_mode=mode)
+            self.assertEqual(result['meta']['session_mode'], mode)
+            queries[mode] = result['results']['detail_popular_organizer']
+        self.assertEqual(queries['db']['session_queries_median'], 1)
+        self.assertEqual(queries['cached_db']['session_queries_median'], 0)
+        self.assertEqual(queries['cached_db']['queries_max'],
+                         queries['db']['queries_max'] - 1)
+
+
+class SessionModeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="member", password="password")
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Session Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.requests = {
+            'list': lambda client: client.get(reverse('meetup_list')),
+            'detail': lambda client: client.get(
+                reverse('meetup_detail', kwargs={'pk': self.meetup.pk})),
+            'toggle': lambda client: client.post(
+                reverse('toggle_participation',
+                        kwargs={'pk': self.meetup.pk})),
+        }
+
+    def session_queries(self, mode, send):
+        """Queries on the session table of one signed-in request."""
+        with self.settings(SESSION_ENGINE=settings.SESSION_ENGINES[mode]):
+            client = Client()
+            client.force_login(self.user)
+            with CaptureQueriesContext(connection) as queries:
+                response = send(client)
+        self.assertLess(response.status_code, 400)
+        return sum('django_session' in query['sql'] for query in queries)
+
+    def test_cached_and_cookie_sessions_skip_the_table(self):
+        """Test only the db mode queries sessions on each request."""
+        for name, send in self.requests.items():
+            with self.subTest(name):
+                self.assertEqual(self.session_queries('db', send), 1)
+                self.assertEqual(self.session_queries('cached_db', send), 0)
+                self.assertEqual(
+                    self.session_queries('signed_cookies', send), 0)
+                MeetupParticipation.objects.all().delete()
+
+    def test_messages_travel_in_a_cookie(self):
+        """Test flash messages reach the next page without the session."""
+        with self.settings(
+                SESSION_ENGINE=settings.SESSION_ENGINES['signed_cookies']):
+            client = Client()
+            client.force_login(self.user)
+            response = self.requests['toggle'](client)
+            self.assertIn('messages', response.cookies)
+            response = client.get(response.url)
+        self.assertContains(response, "You&#x27;ve joined this meetup.")
+
+
+class PurgeSessionsCommandTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for number in range(7):
+            Session.objects.create(
+                session_key=f"session{number}",
+                session_data="",
+                expire_date=now + timedelta(days=1 if number < 2 else -1),
+            )
+
+    def test_purges_expired_sessions_in_batches(self):
+        """Test every expired session is deleted, a few at a time."""
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_sessions', batch_size=2, stdout=out)
+        self.assertIn("Deleted 5 expired session(s).", out.getvalue())
+        self.assertEqual(
+            sorted(Session.objects.values_list('session_key', flat=True)),
+            ['session0', 'session1'])
+        deletes = [query for query in queries
+                   if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+
+    def test_nothing_to_purge_with_cookie_sessions(self):
+        """Test cookie sessions leave the table alone."""
+        out = StringIO()
+        with self.settings(
+                SESSION_ENGINE=settings.SESSION_ENGINES['signed_cookies']):
+            call_command('purge_sessions', stdout=out)
+        self.assertIn("nothing to purge", out.getvalue())
+        self.assertEqual(Session.objects.count(), 7)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        caches['ratelimit'].clear()
+        self.user = User.objects.create_user(
+            username="member", password="password")
+        self.other = User.objects.create_user(
+            username="other", password="password")
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Hot Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.toggle_url = reverse(
+            'toggle_participation', kwargs={'pk': self.meetup.pk})
+        limits = self.settings(RATE_LIMITS={
+            'toggle_participation': {'user': '3/m', 'ip': '5/m'},
+            'meetup_create': {'user': '1/h'},
+        })
+        limits.enable()
+        self.addCleanup(limits.disable)
+
+    def client_for(self, user, **defaults):
+        client = Client(**defaults)
+        client.force_login(user)
+        return client
+
+    def test_user_limit(self):
+        """Test a user over the limit gets a 429 without ORM work."""
+        client = self.client_for(self.user)
+        for _ in range(3):
+            self.assertEqual(client.post(self.toggle_url).status_code, 302)
+        joined = MeetupParticipation.objects.filter(
+            user=self.user).exists()
+        # Only the session is loaded, the view never runs
+        with self.assertNumQueries(1):
+            response = client.post(self.toggle_url)
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 60)
+        self.assertEqual(
+            MeetupParticipation.objects.filter(user=self.user).exists(),
+            joined)
+        # Other users have buckets of their own
+        client = self.client_for(self.other)
+        self.assertEqual(client.post(self.toggle_url).status_code, 302)
+
+    def test_ip_limit(self):
+        """Test users behind one address share its bucket."""
+        for _ in range(2):
+            for user in (self.user, self.other):
+                self.client_for(user).post(self.toggle_url)
+        client = self.client_for(self.org)
+        self.assertEqual(client.post(self.toggle_url).status_code, 302)
+        # Rejected by address before the session is even read
+        with self.assertNumQueries(0):
+            response = client.post(self.toggle_url)
+        self.assertEqual(response.status_code, 429)
+        other_address = self.client_for(self.org, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(
+            other_address.post(self.toggle_url).status_code, 302)
+
+    def test_rejected_requests_charge_no_bucket(self):
+        """Test requests over the user limit leave the IP budget alone."""
+        client = self.client_for(self.user)
+        statuses = [client.post(self.toggle_url).status_code
+                    for _ in range(6)]
+        self.assertEqual(statuses, [302] * 3 + [429] * 3)
+        # Only the 3 allowed requests count against the address's 5
+        client = self.client_for(self.other)
+        statuses = [client.post(self.toggle_url).status_code
+                    for _ in range(3)]
+        self.assertEqual(statuses, [302, 302, 429])
+
+    def test_only_writes_are_limited(self):
+        """Test form pages stay reachable while their POSTs are limited."""
+        client = self.client_for(self.user)
+        data = {
+            'title': "New", 'description': "Description",
+            'start_datetime': (timezone.now() + timedelta(days=2)
+                               ).strftime('%Y-%m-%dT%H:%M'),
+            'duration_minutes': 60, 'location_text': "Remote",
+            'is_open': True,
+        }
+        self.assertEqual(
+            client.post(reverse('meetup_create'), data).status_code, 302)
+        self.assertEqual(
+            client.post(reverse('meetup_create'), data).status_code, 429)
+        for _ in range(3):
+            self.assertEqual(
+                client.get(reverse('meetup_create')).status_code, 200)
+
+    def test_client_ip_behind_proxies(self):
+        """Test the address is taken from the trusted proxy's hop."""
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR="10.0.0.1",
+            HTTP_X_FORWARDED_FOR="6.6.6.6, 1.2.3.4")
+        self.assertEqual(client_ip(request), "10.0.0.1")
+        with self.settings(RATE_LIMIT_PROXIES=1):
+            self.assertEqual(client_ip(request), "1.2.3.4")
+        with self.settings(RATE_LIMIT_PROXIES=2):
+            self.assertEqual(client_ip(request), "6.6.6.6")
+
+    def test_sliding_window(self):
+        """Test the previous window's requests fade out as time passes."""
+        with mock.patch('meetups.ratelimit.time.time') as now:
+            now.return_value = 6000 + 10
+            self.assertEqual(take("bucket", 2, 60), 0)
+            self.assertEqual(take("bucket", 2, 60), 0)
+            self.assertEqual(take("bucket", 2, 60), 50)
+            # 50 seconds into the next window, 5/6 of the previous one
+            # has slid out: 2 * 1/6 + 1 <= 2
+            now.return_value = 6000 + 60 + 10
+            self.assertEqual(take("bucket", 2, 60), 50)
+            now.return_value = 6000 + 60 + 50
+            self.assertEqual(take("bucket", 2, 60), 0)
+
+    def test_invalid_rate(self):
+        """Test malformed rates are reported."""
+        self.assertEqual(parse_rate("20/m"), (20, 60))
+        self.assertEqual(parse_rate("5/hour"), (5, 3600))
+        for rate in ("20", "x/m", "20/w"):
+            with self.assertRaises(ValueError):
+                parse_rate(rate)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        Meetup.objects.create(
+            organizer=self.org,
+            title="Budgeted Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.url = reverse('meetup_list')
+
+    def test_every_view_has_a_budget(self):
+        """Test all meetups URLs declare a query budget."""
+        for pattern in meetups_urls.urlpatterns:
+            self.assertIsNotNone(
+                get_query_budget(pattern.callback), pattern.name)
+
+    def test_exceeding_budget_logs_and_raises(self):
+        """Test an exceeded budget logs the SQL with its origin and raises."""
+        with mock.patch.object(MeetupsListView, 'query_budget', 0), \
+                self.assertLogs('meetups.query_budget', 'WARNING') as logs, \
+                self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.url)
+        output = "\n".join(logs.output)
+        self.assertIn("meetup_list ran 1 queries, over its budget of 0",
+                      output)
+        self.assertIn('FROM "meetups_meetup"', output)
+        self.assertIn("meetups/pagination.py", output)
+
+    async def test_exceeding_budget_under_asgi(self):
+        """Test budgets hold when queries run off the event loop thread."""
+        meetup = await Meetup.objects.aget(title="Budgeted Meetup")
+        for name in ('meetup_detail', 'meetup_detail_async'):
+            await sync_to_async(cache.clear)()
+            url = reverse(name, kwargs={'pk': meetup.pk})
+            with mock.patch.object(MeetupDetailView, 'query_budget', 0), \
+                    self.assertLogs('meetups.query_budget') as logs, \
+                    self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.get(url)
+            self.assertIn('FROM "meetups_meetup"', "\n".join(logs.output))
+
+    def test_report_only_and_sampling(self):
+        """Test raising is optional and unsampled requests are skipped."""
+        with mock.patch.object(MeetupsListView, 'query_budget', 0):
+            with self.settings(QUERY_BUDGET_RAISE=False), \
+                    self.assertLogs('meetups.query_budget', 'WARNING'):
+                self.assertEqual(self.client.get(self.url).status_code, 200)
+            with self.settings(QUERY_BUDGET_SAMPLE_RATE=0), \
+                    self.assertNoLogs('meetups.query_budget'):
+                self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.user = User.objects.create_user(
+            username="user", password="password")
+        self.upcoming = Meetup.objects.create(
+            organizer=self.org,
+            title="Board games, snacks; fun",
+            description="Bring a game.\nOr two.",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=90,
+            location_text="Café " * 30,
+        )
+        self.pending = Meetup.objects.create(
+            organizer=self.org,
+            title="Closed Meetup",
+            start_datetime=timezone.now() + timedelta(days=2),
+            duration_minutes=60,
+            is_open=False,
+        )
+        self.past = Meetup.objects.create(
+            organizer=self.org,
+            title="Past Meetup",
+            start_datetime=timezone.now() - timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.upcoming_url = reverse('calendar_upcoming')
+
+    def feed_url(self, user):
+        return reverse('calendar_participations',
+                       kwargs={'token': feed_token(user)})
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'text/calendar; charset=utf-8')
+        return b"".join(response.streaming_content).decode()
+
+    def test_upcoming_feed(self):
+        """Test the feed lists upcoming meetups as valid iCalendar."""
+        body = self.read(self.client.get(self.upcoming_url))
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertTrue(body.endswith("END:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 2)
+        self.assertNotIn("Past Meetup", body)
+        self.assertIn(
+            "DTSTART:" + self.upcoming.start_datetime.astimezone(
+                dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ"), body)
+        self.assertIn("SUMMARY:Board games\\, snacks\\; fun", body)
+        self.assertIn("DESCRIPTION:Bring a game.\\nOr two.", body)
+        self.assertIn(f"URL:http://testserver/meetups/{self.upcoming.pk}/",
+                      body)
+        # Long lines are folded at 75 octets, without splitting characters
+        for line in body.split("\r\n"):
+            self.assertLessEqual(len(line.encode()), 75)
+        self.assertIn("LOCATION:" + "Café " * 30,
+                      body.replace("\r\n ", "").replace("\\,", ","))
+
+    def test_feed_streams_in_chunks(self):
+        """Test events are fetched and sent in chunks, not all at once."""
+        with mock.patch('meetups.ical.CHUNK_SIZE', 1), \
+                mock.patch('meetups.views.CHUNK_SIZE', 1):
+            response = self.client.get(self.upcoming_url)
+            chunks = list(response.streaming_content)
+        # Header, one chunk per event, then the footer
+        self.assertEqual(len(chunks), 4)
+
+    def test_personal_feed(self):
+        """Test the token feed lists going and pending meetups only."""
+        MeetupParticipation.objects.create(
+            user=self.user, meetup=self.upcoming,
+            status=MeetupParticipation.Status.GOING)
+        MeetupParticipation.objects.create(
+            user=self.user, meetup=self.pending)
+        MeetupParticipation.objects.create(
+            user=self.user, meetup=self.past,
+            status=MeetupParticipation.Status.NOT_GOING)
+
+        response = self.client.get(self.feed_url(self.user))
+        body = self.read(response)
+        self.assertIn("private", response['Cache-Control'])
+        self.assertEqual(body.count("BEGIN:VEVENT"), 2)
+        self.assertIn("STATUS:CONFIRMED", body)
+        self.assertIn("STATUS:TENTATIVE", body)
+        self.assertNotIn("Past Meetup", body)
+        # Someone else's feed is empty
+        body = self.read(self.client.get(self.feed_url(self.org)))
+        self.assertNotIn("BEGIN:VEVENT", body)
+
+    def test_invalid_token(self):
+        """Test a tampered feed token is not found."""
+        token = feed_token(self.user)
+        url = reverse('calendar_participations',
+                      kwargs={'token': f"{self.org.pk}{token[1:]}"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_conditional_get_and_cache_headers(self):
+        """Test polls of an unchanged feed get a 304 without queries."""
+        response = self.client.get(self.upcoming_url)
+        self.assertIn("public", response['Cache-Control'])
+        self.assertIn("max-age=900", response['Cache-Control'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.upcoming_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("max-age=900", response['Cache-Control'])
+
+        # Any meetup change produces a new version of the feed
+        self.upcoming.title = "Renamed"
+        self.upcoming.save()
+        response = self.client.get(self.upcoming_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertIn("SUMMARY:Renamed", self.read(response))
+
+    def test_list_links_personal_feed(self):
+        """Test signed-in users find their feed link on the list page."""
+        self.assertNotContains(
+            self.client.get(reverse('meetup_list')), "my meetups</a>")
+        self.client.force_login(self.user)
+        self.assertContains(
+            self.client.get(reverse('meetup_list')),
+            f'href="http://testserver{self.feed_url(self.user)}"')
+
+
+class ParticipationExportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Exported Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            is_open=False,
+        )
+        self.users = [
+            User.objects.create_user(username=name, password="password")
+            for name in ("alice", "bob", "-carol")
+        ]
+        for user in self.users:
+            MeetupParticipation.objects.create(user=user, meetup=self.meetup)
+        self.going = self.meetup.participations.get(user=self.users[0])
+        self.going.approve()
+        self.url = reverse(
+            'export_participations', kwargs={'pk': self.meetup.pk})
+
+    def test_organizer_export(self):
+        """Test the organizer downloads every participant as CSV."""
+        self.client.force_login(self.org)
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn("attachment", response['Content-Disposition'])
+        rows = list(csv.reader(
+            b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(
+            rows[0], ["username", "status", "requested_at", "approved_at"])
+        self.assertEqual(
+            [row[:2] for row in rows[1:]],
+            [["alice", "going"], ["bob", "pending"], ["'-carol", "pending"]])
+        self.assertEqual(rows[1][3], self.going.approved_at.isoformat())
+        self.assertEqual(rows[2][3], "")
+
+    def test_rows_are_streamed_in_one_query(self):
+        """Test rows are fetched with their users in a single query."""
+        self.client.force_login(self.org)
+        response = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            lines = list(response.streaming_content)
+        # Header, then one chunk per participant
+        self.assertEqual(len(lines), 4)
+
+    def test_only_organizer_can_export(self):
+        """Test other users are redirected without any rows."""
+        self.client.force_login(self.users[1])
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse('meetup_detail', kwargs={'pk': self.meetup.pk}))
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class ScheduleOverlapTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.user = User.objects.create_user(
+            username="user", password="password")
+        start = timezone.now() + timedelta(days=1)
+        self.meetup = self.create("Evening Talk", start, 120)
+        self.overlapping = self.create(
+            "Dinner", start + timedelta(minutes=90), 60)
+        self.adjacent = self.create(
+            "Late Show", start + timedelta(minutes=120), 60)
+        for meetup in (self.overlapping, self.adjacent):
+            MeetupParticipation.objects.create(
+                user=self.user, meetup=meetup,
+                status=MeetupParticipation.Status.GOING)
+
+    def create(self, title, start, duration):
+        return Meetup.objects.create(
+            organizer=self.org, title=title, start_datetime=start,
+            duration_minutes=duration)
+
+    def test_end_datetime_is_stored(self):
+        """Test the end time follows start and duration on every save."""
+        self.meetup.refresh_from_db()
+        self.assertEqual(
+            self.meetup.end_datetime,
+            self.meetup.start_datetime + timedelta(minutes=120))
+        self.meetup.duration_minutes = 30
+        self.meetup.save(update_fields=["duration_minutes"])
+        self.meetup.refresh_from_db()
+        self.assertEqual(
+            self.meetup.end_datetime,
+            self.meetup.start_datetime + timedelta(minutes=30))
+        # bulk_create skips save(), the queryset fills it in
+        meetup, = Meetup.objects.bulk_create([Meetup(
+            organizer=self.org, title="Bulk",
+            start_datetime=self.meetup.start_datetime, duration_minutes=45)])
+        self.assertEqual(
+            Meetup.objects.get(pk=meetup.pk).end_datetime,
+            self.meetup.start_datetime + timedelta(minutes=45))
+
+    def test_overlapping_meetups(self):
+        """Test only overlapping GOING meetups are found, in one query."""
+        with self.assertNumQueries(1):
+            titles = list(self.meetup.overlapping_meetups(
+                self.user).values_list('title', flat=True))
+        self.assertEqual(titles, ["Dinner"])
+        MeetupParticipation.objects.filter(meetup=self.overlapping).update(
+            status=MeetupParticipation.Status.NOT_GOING)
+        self.assertFalse(self.meetup.overlapping_meetups(self.user).exists())
+
+    def test_join_warns_about_overlaps(self):
+        """Test joining an overlapping meetup warns, but still joins."""
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('toggle_participation', kwargs={'pk': self.meetup.pk}),
+            follow=True)
+        self.assertContains(response, "overlaps with meetups you are going "
+                                      "to: Dinner.")
+        self.assertTrue(MeetupParticipation.objects.filter(
+            user=self.user, meetup=self.meetup, status="going").exists())
+
+        # Leaving does not warn
+        response = self.client.post(
+            reverse('toggle_participation', kwargs={'pk': self.meetup.pk}),
+            follow=True)
+        self.assertNotContains(response, "overlaps")
+
+    def test_happening_now_filter(self):
+        """Test the list can be narrowed to meetups in progress."""
+        now = timezone.now()
+        running = self.create(
+            "Running Now", now - timedelta(minutes=30), 60)
+        self.create("Finished", now - timedelta(minutes=90), 60)
+        response = self.client.get(
+            reverse('meetup_list'), {'happening': 'now'})
+        self.assertEqual(list(response.context['meetups']), [running])
+
+
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Tiny Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            max_participants=1,
+        )
+        self.going = User.objects.create_user(
+            username="going", password="password")
+        self.first = User.objects.create_user(
+            username="first", password="password")
+        self.second = User.objects.create_user(
+            username="second", password="password")
+        self.url = reverse(
+            'toggle_participation', kwargs={'pk': self.meetup.pk})
+        for user in (self.going, self.first, self.second):
+            self.toggle(user)
+
+    def toggle(self, user):
+        self.client.force_login(user)
+        return self.client.post(self.url, follow=True)
+
+    def statuses(self):
+        return dict(self.meetup.participations.values_list(
+            'user__username', 'status'))
+
+    def test_full_meetup_joins_waitlist(self):
+        """Test joining a full open meetup queues instead of failing."""
+        self.assertEqual(self.statuses(), {
+            "going": "going", "first": "waitlisted", "second": "waitlisted"})
+        self.meetup.refresh_from_db()
+        self.assertEqual(self.meetup.going_count, 1)
+        self.client.force_login(self.first)
+        response = self.client.get(
+            reverse('meetup_detail', kwargs={'pk': self.meetup.pk}))
+        self.assertContains(response, "Leave Waitlist")
+
+    def test_leaving_promotes_first_in_line(self):
+        """Test a freed seat goes to the earliest waitlisted user."""
+        response = self.toggle(self.going)
+        self.assertContains(response, "Your attendance has been cancelled.")
+        self.assertEqual(self.statuses(), {
+            "first": "going", "second": "waitlisted"})
+        self.meetup.refresh_from_db()
+        self.assertEqual(self.meetup.going_count, 1)
+
+        # Leaving the waitlist frees no seat
+        self.toggle(self.second)
+        self.assertEqual(self.statuses(), {"first": "going"})
+
+    def test_removal_by_organizer_promotes(self):
+        """Test rejecting a going participant also frees their seat."""
+        self.meetup.participations.get(user=self.going).reject()
+        self.assertEqual(self.statuses(), {
+            "going": "not_going", "first": "going", "second": "waitlisted"})
+
+    def test_lost_race_for_last_seat_waitlists(self):
+        """Test a join that loses the last seat at write time is queued."""
+        self.meetup.participations.all().delete()
+        self.meetup.refresh_from_db()
+        late = User.objects.create_user(username="late", password="password")
+        with mock.patch.object(Meetup, 'is_full', return_value=False):
+            MeetupParticipation.objects.create(
+                user=self.going, meetup=self.meetup, status="going")
+            response = self.toggle(late)
+        self.assertContains(response, "you are on the waitlist")
+        self.assertEqual(self.statuses(), {
+            "going": "going", "late": "waitlisted"})
+
+
+class ConcurrentPromotionTests(TransactionTestCase):
+    def test_simultaneous_leaves_promote_in_order(self):
+        """Test concurrent leaves each promote the next user, once."""
+        organizer = User.objects.create_user(username="org", password="pass")
+        meetup = Meetup.objects.create(
+            organizer=organizer,
+            title="Popular Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            max_participants=5,
+        )
+        url = reverse('toggle_participation', kwargs={'pk': meetup.pk})
+        clients = []
+        for i in range(15):
+            client = Client()
+            client.force_login(User.objects.create_user(
+                username=f"guest{i}", password="pass"))
+            client.post(url)
+            clients.append(client)
+        # guest0-4 are going, guest5-14 wait in this order
+        leaving = clients[:5]
+
+        barrier = threading.Barrier(len(leaving))
+        errors = []
+
+        def leave(client):
+            try:
+                barrier.wait()
+                client.post(url)
+            except Exception as exc:  # Surface failures from threads
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=leave, args=(client,))
+                   for client in leaving]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        meetup.refresh_from_db()
+        self.assertEqual(meetup.going_count, 5)
+        going = meetup.participations.filter(
+            status=MeetupParticipation.Status.GOING)
+        self.assertEqual(
+            sorted(going.values_list('user__username', flat=True)),
+            [f"guest{i}" for i in range(5, 10)])
+        self.assertEqual(meetup.participations.filter(
+            status=MeetupParticipation.Status.WAITLISTED).count(), 5)
+
+
+class ReplicaRoutingTests(TestCase):
+    """Routing decisions, with a replica configured in settings only."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        patcher = mock.patch.dict(
+            settings.DATABASES, {REPLICA: settings.DATABASES['default']})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(read_from_replica, False)
+
+    def middleware(self):
+        """Middleware whose view records the database reads would use."""
+        self.routed = []
+
+        def view(request):
+            self.routed.append(self.router.db_for_read(Meetup))
+            return HttpResponse()
+        return ReplicaPinMiddleware(view)
+
+    def test_router(self):
+        """Test reads follow the routing flag and writes the primary."""
+        self.assertEqual(self.router.db_for_read(Meetup), "default")
+        read_from_replica(True)
+        self.assertEqual(self.router.db_for_read(Meetup), REPLICA)
+        self.assertEqual(self.router.db_for_write(Meetup), "default")
+        self.assertFalse(
+            self.router.allow_migrate(REPLICA, "meetups"))
+
+    def test_reads_and_writes_with_pinning(self):
+        """Test GETs read the replica until the client writes."""
+        middleware = self.middleware()
+        response = middleware(self.factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = middleware(self.factory.post('/'))
+        pin = response.cookies[PIN_COOKIE]
+        self.assertEqual(pin['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertTrue(pin['httponly'])
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = pin.value
+        middleware(request)
+        self.assertEqual(self.routed, [REPLICA, "default", "default"])
+
+    def test_primary_only_views(self):
+        """Test GET views that write read the primary and pin."""
+        participation_url = reverse(
+            'approve_participation', kwargs={'pk': 1})
+        request = self.factory.get(participation_url)
+        request.resolver_match = resolve(participation_url)
+        middleware = self.middleware()
+        middleware.route(request)
+        middleware.process_view(
+            request, request.resolver_match.func, (), {})
+        self.assertEqual(self.router.db_for_read(Meetup), "default")
+        response = middleware.pin(request, HttpResponse())
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    async def test_async_requests(self):
+        """Test the flag reaches async views and their threads."""
+        routed = []
+
+        async def view(request):
+            routed.append(self.router.db_for_read(Meetup))
+            routed.append(await sync_to_async(
+                self.router.db_for_read)(Meetup))
+            return HttpResponse()
+        await ReplicaPinMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(routed, [REPLICA, REPLICA])
+
+    def test_not_installed_without_replica(self):
+        """Test the middleware drops out when no replica is configured."""
+        with mock.patch.dict(settings.DATABASES):
+            del settings.DATABASES[REPLICA]
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaPinMiddleware(lambda request: HttpResponse())
+
+
+def keep_test_connection(test):
+    """
+    Keep the worker from closing the connection holding the test's
+    transaction, as the test client does for request handling.
+    """
+    patcher = mock.patch(
+        'meetups.management.commands.run_tasks.close_old_connections')
+    test.addCleanup(patcher.stop)
+    return patcher.start()
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        self.close_old_connections = keep_test_connection(self)
+        self.org = User.objects.create_user(
+            username="org", password="password")
+        self.user = User.objects.create_user(
+            username="user", email="user@example.com", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Queued Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+        )
+        self.participation = MeetupParticipation.objects.create(
+            user=self.user, meetup=self.meetup)
+
+    def run_tasks(self):
+        out = StringIO()
+        call_command('run_tasks', burst=True, stdout=out)
+        return out.getvalue()
+
+    def test_tasks_wait_in_the_database_for_a_worker(self):
+        """Test enqueuing stores the task, which a worker runs later."""
+        MeetupParticipation.objects.filter(
+            pk=self.participation.pk).update(status="going")
+        result = notify_participants.enqueue(
+            [self.participation.pk], approved=True)
+        self.assertEqual(result.status, "READY")
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertIn("Ran 1 task(s).", self.run_tasks())
+        result.refresh()
+        self.assertEqual(result.status, "SUCCESSFUL")
+        self.assertEqual(result.return_value, 1)
+        self.assertEqual(len(result.worker_ids), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Ran 0 task(s).", self.run_tasks())
+
+    def test_deferred_tasks_run_when_due(self):
+        """Test tasks enqueued with run_after wait until then."""
+        result = send_request_digest.using(
+            run_after=timezone.now() + timedelta(minutes=5)
+        ).enqueue(self.org.pk)
+        self.assertIn("Ran 0 task(s).", self.run_tasks())
+        QueuedTask.objects.update(run_after=timezone.now())
+        self.assertIn("Ran 1 task(s).", self.run_tasks())
+        result.refresh()
+        self.assertEqual(result.status, "SUCCESSFUL")
+
+    def test_failures_are_recorded(self):
+        """Test a failing task keeps its error, and the worker goes on."""
+        MeetupParticipation.objects.filter(
+            pk=self.participation.pk).update(status="going")
+        failing = notify_participants.enqueue(
+            [self.participation.pk], approved=True)
+        following = send_request_digest.enqueue(self.org.pk)
+        with mock.patch('meetups.tasks.send_mass_mail',
+                        side_effect=OSError("Mail server down")):
+            self.assertIn("Ran 2 task(s).", self.run_tasks())
+        failing.refresh()
+        self.assertEqual(failing.status, "FAILED")
+        self.assertEqual(
+            failing.errors[0].exception_class_path, "builtins.OSError")
+        self.assertIn("Mail server down", failing.errors[0].traceback)
+        following.refresh()
+        self.assertEqual(following.status, "SUCCESSFUL")
+
+    def test_enqueue_rolls_back_with_its_transaction(self):
+        """Test a task is not queued for changes that were rolled back."""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.participation.approve()
+                raise RuntimeError
+        self.assertFalse(QueuedTask.objects.exists())
+
+    def test_worker_survives_a_lost_connection(self):
+        """Test a database error is logged and the worker carries on."""
+        result = send_request_digest.enqueue(self.org.pk)
+        claim = DatabaseBackend.claim
+        calls = []
+
+        def flaky_claim(backend, *args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection")
+            return claim(backend, *args)
+
+        with mock.patch.object(DatabaseBackend, 'claim', autospec=True,
+                               side_effect=flaky_claim):
+            with self.assertLogs('meetups.taskqueue', 'ERROR') as logs:
+                out = StringIO()
+                call_command('run_tasks', burst=True, interval=0,
+                             stdout=out)
+        self.assertIn("server closed the connection", logs.output[0])
+        self.assertIn("Ran 1 task(s).", out.getvalue())
+        result.refresh()
+        self.assertEqual(result.status, "SUCCESSFUL")
+        # Stale connections are dropped before every claim
+        self.assertEqual(self.close_old_connections.call_count, len(calls))
+
+    def test_stale_running_tasks_fail(self):
+        """Test tasks left running by a dead worker end up FAILED."""
+        lost = send_request_digest.enqueue(self.org.pk)
+        running = send_request_digest.enqueue(self.user.pk)
+        now = timezone.now()
+        QueuedTask.objects.filter(pk=lost.id).update(
+            status="RUNNING", started_at=now - timedelta(hours=1),
+            worker_ids=["gone"])
+        QueuedTask.objects.filter(pk=running.id).update(
+            status="RUNNING", started_at=now)
+        with self.assertLogs('meetups.taskqueue', 'WARNING'):
+            self.run_tasks()
+        lost.refresh()
+        self.assertEqual(lost.status, "FAILED")
+        self.assertEqual(lost.errors[0].exception_class_path,
+                         "meetups.taskqueue.WorkerLost")
+        self.assertIn("gone", lost.errors[0].traceback)
+        running.refresh()
+        self.assertEqual(running.status, "RUNNING")
+
+    def test_purge_old_tasks_and_notifications(self):
+        """Test purge_tasks only deletes old finished or sent rows."""
+        now = timezone.now()
+        ids = [send_request_digest.enqueue(self.org.pk).id
+               for _ in range(5)]
+        QueuedTask.objects.filter(pk__in=ids[:3]).update(
+            status="SUCCESSFUL", finished_at=now - timedelta(days=8))
+        QueuedTask.objects.filter(pk=ids[3]).update(
+            status="FAILED", finished_at=now - timedelta(days=1))
+        RequestNotification.objects.create(
+            recipient=self.org, participation=self.participation,
+            sent_at=now - timedelta(days=8))
+        unsent = RequestNotification.objects.create(
+            recipient=self.org, participation=self.participation)
+        RequestNotification.objects.filter(pk=unsent.pk).update(
+            created_at=now - timedelta(days=8))
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_tasks', days=7, batch_size=2, stdout=out)
+        self.assertIn("Deleted 3 finished task(s) and 1 sent "
+                      "notification(s).", out.getvalue())
+        self.assertEqual(
+            sorted(QueuedTask.objects.values_list('status', flat=True)),
+            ["FAILED", "READY"])
+        self.assertEqual(
+            list(RequestNotification.objects.values_list('pk', flat=True)),
+            [unsent.pk])
+        deletes = [query for query in queries
+                   if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+
+    def test_unknown_queue(self):
+        """Test the worker refuses queues the backend does not have."""
+        with self.assertRaises(CommandError):
+            call_command('run_tasks', burst=True, queues=['nope'])
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        keep_test_connection(self)
+        self.client = Client()
+        self.org = User.objects.create_user(
+            username="org", email="org@example.com", password="password")
+        self.meetup = Meetup.objects.create(
+            organizer=self.org,
+            title="Closed Meetup",
+            start_datetime=timezone.now() + timedelta(days=1),
+            duration_minutes=60,
+            is_open=False,
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f"user{number}",
+                email=f"user{number}@example.com",
+                password="password")
+            for number in range(3)
+        ]
+
+    def request_to_join(self, user):
+        self.client.force_login(user)
+        self.client.post(reverse(
+            'toggle_participation', kwargs={'pk': self.meetup.pk}))
+
+    def run_due_tasks(self):
+        QueuedTask.objects.filter(status="READY").update(
+            run_after=timezone.now())
+        call_command('run_tasks', burst=True, stdout=StringIO())
+
+    def digests(self):
+        return QueuedTask.objects.filter(
+            task_path='meetups.tasks.send_request_digest')
+
+    def test_requests_are_batched_in_one_digest(self):
+        """Test an organizer gets one email for requests in an interval."""
+        for user in self.users:
+            self.request_to_join(user)
+        self.assertEqual(RequestNotification.objects.count(), 3)
+        digest = self.digests().get()
+        self.assertEqual(digest.args, [self.org.pk])
+        self.assertAlmostEqual(
+            digest.run_after - digest.enqueued_at,
+            timedelta(minutes=settings.NOTIFICATION_DIGEST_MINUTES),
+            delta=timedelta(seconds=5))
+
+        call_command('run_tasks', burst=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        self.run_due_tasks()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["org@example.com"])
+        for user in self.users:
+            self.assertIn(f"- {user.username}", mail.outbox[0].body)
+        self.assertIn(
+            f"http://localhost:8000{self.meetup.get_absolute_url()}",
+            mail.outbox[0].body)
+        self.assertFalse(RequestNotification.objects.filter(
+            sent_at__isnull=True).exists())
+
+    def test_request_after_a_digest_schedules_the_next(self):
+        """Test requests after a digest go in a new one."""
+        self.request_to_join(self.users[0])
+        self.run_due_tasks()
+        self.request_to_join(self.users[1])
+        self.assertEqual(self.digests().count(), 2)
+        self.run_due_tasks()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertNotIn("user0", mail.outbox[1].body)
+        self.assertIn("user1", mail.outbox[1].body)
+
+    def test_decided_or_withdrawn_requests_are_left_out(self):
+        """Test the digest only lists requests still pending."""
+        for user in self.users[:2]:
+            self.request_to_join(user)
+        self.request_to_join(self.users[0])  # Withdrawn
+        self.assertEqual(RequestNotification.objects.count(), 1)
+        MeetupParticipation.objects.get(user=self.users[1]).reject()
+        mail.outbox.clear()
+        send_request_digest.call(self.org.pk)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_approve_and_reject_notify_participants(self):
+        """Test participants hear about the organizer's decision."""
+        for user in self.users[:2]:
+            self.request_to_join(user)
+        approved, rejected = (
+            MeetupParticipation.objects.get(user=user)
+            for user in self.users[:2])
+        self.client.force_login(self.org)
+        self.client.get(reverse(
+            'approve_participation', kwargs={'pk': approved.pk}))
+        self.client.get(reverse(
+            'reject_participation', kwargs={'pk': rejected.pk}))
+        with self.settings(SITE_URL="https://meetmeet.example"):
+            self.run_due_tasks()
+        decisions = {
+            message.to[0]: message.subject for message in mail.outbox
+            if message.to != ["org@example.com"]
+        }
+        self.assertEqual(decisions, {
+            "user0@example.com":
+                "Your request to join Closed Meetup was approved",
+            "user1@example.com":
+                "Your request to join Closed Meetup was declined",
+        })
+        self.assertIn(
+            f"https://meetmeet.example{self.meetup.get_absolute_url()}",
+            mail.outbox[-1].body)
+
+    def test_bulk_review_queues_one_task(self):
+        """Test reviewing many requests notifies them from one task."""
+        for user in self.users:
+            self.request_to_join(user)
+        ids = list(self.meetup.participations.values_list('pk', flat=True))
+        self.meetup.review_requests(ids)
+        self.assertEqual(QueuedTask.objects.filter(
+            task_path='meetups.tasks.notify_participants').count(), 1)
+        # Leaving before the email goes out cancels it
+        self.request_to_join(self.users[0])
+        QueuedTask.objects.filter(
+            task_path='meetups.tasks.send_request_digest').delete()
+        self.run_due_tasks()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["user1@example.com", "user2@example.com"])
@@ -1,15 +1,27 @@
 from . import views
+from .budget import query_budget
 from django.urls import path
 from django.views.generic import TemplateView
 
 urlpatterns = [
     # Used by UptimeRobot to prevent Render Free Tier from sleeping
     path('livez/', views.livez, name='livez_probe'),
+    # Prometheus scrape target
+    path('metrics', views.metrics, name='metrics'),
 
     # General List and Detail
     path('', views.MeetupsListView.as_view(), name='meetup_list'),
+    path('meetups.json',
+         views.MeetupsListJsonView.as_view(), name='meetup_list_json'),
+    path('meetups/search/',
+         views.MeetupSearchView.as_view(), name='meetup_search'),
     path('meetups/<int:pk>/',
          views.MeetupDetailView.as_view(), name="meetup_detail"),
+    path('meetups/near/',
+         views.MeetupsNearView.as_view(), name='meetup_near'),
+    path('meetups/near.json',
+         views.MeetupsNearJsonView.as_view(), name='meetup_near_json'),
+    path('meetups/mine/', views.MyMeetupsView.as_view(), name='my_meetups'),
 
     # Meetup Management (CRUD)
     path('meetups/create/',
@@ -26,8 +38,27 @@ urlpatterns = [
          views.approve_participation, name='approve_participation'),
     path('participation/<int:pk>/reject/',
          views.reject_participation, name='reject_participation'),
+    path('meetups/<int:pk>/participations/review/',
+         views.review_participations, name='review_participations'),
+    path('meetups/<int:pk>/participations.csv',
+         views.export_participations, name='export_participations'),
+
+    # iCalendar subscriptions
+    path('calendar/upcoming.ics',
+         views.UpcomingCalendarFeedView.as_view(), name='calendar_upcoming'),
+    path('calendar/<str:token>/meetups.ics',
+         views.ParticipationCalendarFeedView.as_view(),
+         name='calendar_participations'),
+
+    # Async twins of the read paths, for ASGI deployments and load tests
+    path('async/livez/', views.livez_async, name='livez_probe_async'),
+    path('async/', views.AsyncMeetupsListView.as_view(),
+         name='meetup_list_async'),
+    path('async/meetups/<int:pk>/',
+         views.AsyncMeetupDetailView.as_view(), name='meetup_detail_async'),
 
     # Static Pages
-    path('about/', TemplateView.as_view(template_name='about.html'),
+    path('about/',
+         query_budget(2)(TemplateView.as_view(template_name='about.html')),
          name='about'),
 ]
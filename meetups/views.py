@@ -1,16 +1,46 @@
+import csv
+import hashlib
+import time
+
 from django import forms
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.core.cache import cache
+from django.core.signing import BadSignature
+from django.db import transaction
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse,
+)
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, quote_etag
+from django.shortcuts import get_object_or_404, redirect, render
 from django.views import View
-from django.views.generic import DetailView, ListView, DeleteView
+from django.views.decorators.http import require_POST
+from django.views.generic import DetailView, ListView, DeleteView, TemplateView
 from django.views.generic.edit import CreateView, UpdateView
-from django.urls import reverse_lazy
-from .models import Meetup, MeetupParticipation
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from .budget import query_budget
+from .cache import (
+    LIST_SCOPE, get_changed_at, get_version, meetup_scope, page_cache_key,
+)
+from .ical import (
+    CHUNK_SIZE, feed_token, format_event, stream_calendar, user_id_from_token,
+)
+from .metrics import collect, render as render_metrics
+from .models import Meetup, MeetupFullError, MeetupParticipation
+from .pagination import CursorPaginator
+from .replica import primary_only
+from .search import search_meetups
+from .signals import invalidate_pages
+from .tasks import notify_organizer
 
 
+@query_budget(0)
 def livez(request):
     """
     Liveness probe for monitoring services (UptimeRobot, Render, etc.).
@@ -20,48 +50,554 @@ def livez(request):
     return HttpResponse("OK", content_type="text/plain")
 
 
-class MeetupsListView(ListView):
+@query_budget(0)
+async def livez_async(request):
+    """Async twin of livez, answered without leaving the event loop."""
+    return HttpResponse("OK", content_type="text/plain")
+
+
+@query_budget(0)
+def metrics(request):
+    """
+    Prometheus scrape endpoint with per-view latency, response size and
+    database metrics, summed over all worker processes.
+    Requires "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+            request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        render_metrics(collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def has_pending_messages(request):
+    """Check for flash messages that the next rendered page must show."""
+    return bool(len(messages.get_messages(request)))
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET with 304 Not Modified, without rendering the template,
+    when the client's copy is still current.
+    Subclasses return (etag_parts, last_modified timestamp) from
+    get_validators(); the ETag also covers the signed-in viewer and their
+    CSRF secret, since their pages are personalized and embed a token.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        pending_messages = has_pending_messages(request)
+        validators = None if pending_messages else self.get_validators()
+        if validators is not None:
+            response = get_conditional_response(
+                request, **self.build_validators(*validators))
+            if response is not None:
+                return self.add_validator_headers(response, validators)
+
+        response = super().get(request, *args, **kwargs)
+        if validators is None and not pending_messages:
+            # Rendering may have loaded what the validators are built from
+            validators = self.get_validators()
+        if validators is not None and response.status_code == 200:
+            self.add_validator_headers(response, validators)
+        return response
+
+    def build_validators(self, parts, last_modified):
+        viewer = csrf = ''
+        if self.request.user.is_authenticated:
+            viewer = self.request.user.pk
+            # Secret behind the CSRF token embedded in signed-in pages
+            # (get_token() creates it if this request has none yet)
+            get_token(self.request)
+            csrf = self.request.META['CSRF_COOKIE']
+        etag = hashlib.md5(repr((*parts, viewer, csrf)).encode()).hexdigest()
+        return {
+            'etag': quote_etag(etag),
+            # HTTP dates have whole-second precision
+            'last_modified': int(last_modified),
+        }
+
+    def add_validator_headers(self, response, validators):
+        headers = self.build_validators(*validators)
+        response.headers['ETag'] = headers['etag']
+        response.headers['Last-Modified'] = http_date(
+            headers['last_modified'])
+        # Let browsers keep the page but revalidate it on every visit
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AnonymousPageCacheMixin:
+    """
+    Serve rendered pages to anonymous visitors straight from the cache.
+    Keys carry the version of the view's cache scope, which signals bump
+    whenever the underlying meetups or participations change.
+    """
+    cache_scope = None
+
+    def get_cache_scope(self):
+        return self.cache_scope
+
+    def get(self, request, *args, **kwargs):
+        # Pending flash messages must be rendered (and consumed) for real
+        if request.user.is_authenticated or has_pending_messages(request):
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_page_cache_key()
+        response = self.get_cached_page(key)
+        if response is not None:
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(
+                lambda response: self.cache_page(key, response))
+        else:
+            self.cache_page(key, response)
+        return response
+
+    def get_page_cache_key(self):
+        return page_cache_key(
+            self.get_cache_scope(), self.request.get_full_path())
+
+    def get_cached_page(self, key):
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+    def cache_page(self, key, response):
+        if response.status_code == 200:
+            cache.set(
+                key,
+                (response.content, response['Content-Type']),
+                settings.MEETUPS_PAGE_CACHE_TIMEOUT,
+            )
+
+
+class AsyncReadViewMixin:
+    """
+    Native async GET for the read-only views, for the ASGI deployment.
+    Serves the same cached pages, 304s and templates as the sync views,
+    but only reaches the database through the async ORM, via
+    aget_context_data(). Cache calls stay synchronous: the configured
+    backends are in-process memory or local files, where the async cache
+    API would only add a thread hop.
+    """
+
+    async def aget_context_data(self):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        # Resolve the user (and load the session) with the async ORM, so
+        # nothing below, templates included, queries it synchronously
+        request.user = await request.auser()
+        pending_messages = has_pending_messages(request)
+        validators = None if pending_messages else self.get_validators()
+        if validators is not None:
+            response = get_conditional_response(
+                request, **self.build_validators(*validators))
+            if response is not None:
+                return self.add_validator_headers(response, validators)
+
+        key = response = None
+        if not request.user.is_authenticated and not pending_messages:
+            key = self.get_page_cache_key()
+            response = self.get_cached_page(key)
+        if response is None:
+            context = await self.aget_context_data()
+            # Render here: a lazy TemplateResponse would be rendered by the
+            # handler in a worker thread
+            response = render(request, self.get_template_names(), context)
+            if key is not None:
+                self.cache_page(key, response)
+
+        if validators is None and not pending_messages:
+            validators = self.get_validators()
+        if validators is not None and response.status_code == 200:
+            self.add_validator_headers(response, validators)
+        return response
+
+
+class MeetupsListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                      ListView):
     """
     List view for all meetups.
     Authenticated users see their own meetups at the top of the list.
+    Uses keyset (cursor) pagination, so deep pages cost the same as the first.
     """
     template_name = "meetups/meetup_list.html"
     context_object_name = 'meetups'
     paginate_by = 12
+    # Session, user, and one query per list segment on the page
+    query_budget = 4
+    cache_scope = LIST_SCOPE
+
+    def get_validators(self):
+        """
+        Any meetup or participation change bumps the list version, so the
+        version stands in for the latest updated_at / participation change
+        without aggregating over the whole table. Time buckets expire the
+        "Past event" badges.
+        """
+        bucket = int(time.time() // settings.MEETUPS_PAGE_CACHE_TIMEOUT)
+        return (
+            (get_version(LIST_SCOPE), self.request.get_full_path(), bucket),
+            get_changed_at(LIST_SCOPE),
+        )
 
     def get_queryset(self):
-        queryset = Meetup.objects.all()
+        # Organizer is rendered on every card, so join it in the same query
+        queryset = Meetup.objects.select_related('organizer').order_by(
+            '-start_datetime', '-id')
+        if self.request.GET.get('happening') == 'now':
+            # Range scan of the (start_datetime, end_datetime) index
+            now = timezone.now()
+            queryset = queryset.filter(
+                start_datetime__lte=now, end_datetime__gt=now)
+        return queryset
+
+    def get_segments(self, queryset):
+        """
+        Split the list into the user's organized events followed by
+        everybody else's, each walked with its own index-backed seek.
+        """
         if self.request.user.is_authenticated:
-            # Manually sort to show user's organized events first
-            my_meetups = queryset.filter(organizer=self.request.user)
-            other_meetups = queryset.exclude(organizer=self.request.user)
-            return list(my_meetups) + list(other_meetups)
+            return [
+                queryset.filter(organizer=self.request.user),
+                queryset.exclude(organizer=self.request.user),
+            ]
+        return [queryset]
+
+    def get_calendar_feed_url(self):
+        """Subscription URL of the signed-in user's personal feed."""
+        if not self.request.user.is_authenticated:
+            return None
+        return self.request.build_absolute_uri(reverse(
+            'calendar_participations',
+            kwargs={'token': feed_token(self.request.user)}))
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(self.get_segments(queryset), page_size)
+        page = paginator.page(self.request.GET.get('cursor'))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class MeetupsListJsonView(MeetupsListView):
+    """JSON representation of the meetup list with opaque page cursors."""
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page_obj']
+        return JsonResponse({
+            'results': [
+                {
+                    'id': meetup.pk,
+                    'title': meetup.title,
+                    'organizer': meetup.organizer.username,
+                    'start_datetime': meetup.start_datetime,
+                    'end_datetime': meetup.end_datetime,
+                    'location_text': meetup.location_text,
+                    'is_open': meetup.is_open,
+                    'max_participants': meetup.max_participants,
+                    'url': meetup.get_absolute_url(),
+                }
+                for meetup in context['meetups']
+            ],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+
+class AsyncMeetupsListView(AsyncReadViewMixin, MeetupsListView):
+    """Async twin of MeetupsListView, paginating with the async ORM."""
+
+    async def aget_context_data(self):
+        paginator = CursorPaginator(
+            self.get_segments(self.get_queryset()), self.paginate_by)
+        page = await paginator.apage(self.request.GET.get('cursor'))
+        self.object_list = page.object_list
+        return {
+            'view': self,
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'meetups': page.object_list,
+        }
+
+
+class MeetupSearchView(TemplateView):
+    """
+    Ranked full-text search over title, description and location.
+    Backed by the database's full-text index (see meetups.search).
+    """
+    template_name = "meetups/meetup_search.html"
+    paginate_by = 12
+    # Session, user, index search, matched meetups with organizers
+    query_budget = 4
+    max_page = 50  # Ranked results are only useful near the top
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()[:200]
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+        page = min(max(page, 1), self.max_page)
+
+        # Fetch one extra result to know whether a next page exists
+        results = search_meetups(
+            query,
+            limit=self.paginate_by + 1,
+            offset=(page - 1) * self.paginate_by,
+        )
+        context.update({
+            'query': query,
+            'page': page,
+            'results': results[:self.paginate_by],
+            'has_previous': page > 1,
+            'has_next': (len(results) > self.paginate_by and
+                         page < self.max_page),
+        })
+        return context
+
+
+class NearMeForm(forms.Form):
+    """Point and radius (in km) of a "near me" search."""
+    lat = forms.FloatField(min_value=-90, max_value=90)
+    lon = forms.FloatField(min_value=-180, max_value=180)
+    radius = forms.FloatField(min_value=0.1, max_value=200, required=False)
+
+
+class MeetupsNearView(TemplateView):
+    """
+    Meetups that have not ended within a radius of a point, nearest
+    first, from ?lat=&lon=&radius= (see MeetupQuerySet.near). Without a
+    point, the page offers to ask the browser for the visitor's location.
+    """
+    template_name = "meetups/meetup_near.html"
+    default_radius = 10
+    limit = 48
+    # Session, user, geohash candidates, kept meetups with organizers
+    query_budget = 4
+
+    def get_form(self):
+        return NearMeForm(self.request.GET or None)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = self.get_form()
+        results = []
+        if form.is_valid():
+            results = Meetup.objects.filter(
+                end_datetime__gt=timezone.now(),
+            ).near(
+                form.cleaned_data['lat'],
+                form.cleaned_data['lon'],
+                form.cleaned_data['radius'] or self.default_radius,
+                limit=self.limit,
+            )
+        context.update({'form': form, 'results': results})
+        return context
+
+
+class MeetupsNearJsonView(MeetupsNearView):
+    """JSON representation of a "near me" search."""
+
+    def get_form(self):
+        # A point is required here, report its absence like any error
+        return NearMeForm(self.request.GET)
+
+    def render_to_response(self, context, **response_kwargs):
+        form = context['form']
+        if form.errors:
+            return JsonResponse(
+                {'errors': form.errors.get_json_data()}, status=400)
+        return JsonResponse({
+            'results': [
+                {
+                    'id': meetup.pk,
+                    'title': meetup.title,
+                    'organizer': meetup.organizer.username,
+                    'start_datetime': meetup.start_datetime,
+                    'end_datetime': meetup.end_datetime,
+                    'location_text': meetup.location_text,
+                    'latitude': meetup.latitude,
+                    'longitude': meetup.longitude,
+                    'distance_km': round(distance, 3),
+                    'url': meetup.get_absolute_url(),
+                }
+                for meetup, distance in context['results']
+            ],
+        })
 
-        return queryset
 
+class MyMeetupsView(LoginRequiredMixin, TemplateView):
+    """
+    Dashboard of the signed-in user's own meetups: the ones they organize,
+    the ones they are going to, and their requests still waiting for an
+    approval or a free seat. Each section is cursor-paginated on its own
+    (?organizing=, ?going=, ?requests=), so the page runs one query per
+    section however many events the user has.
+    """
+    template_name = "meetups/my_meetups.html"
+    paginate_by = 6
+    # Session, user, and one query per section
+    query_budget = 5
+
+    def get_sections(self):
+        user = self.request.user
+        Status = MeetupParticipation.Status
+        participations = user.meetup_participations.select_related(
+            'meetup__organizer')
+        return {
+            # Going and pending counts are the meetups' counter columns,
+            # and the related manager fills in the organizer
+            'organizing': user.organized_meetups.order_by(
+                '-start_datetime', '-id'),
+            'going': participations.filter(status=Status.GOING).order_by(
+                '-meetup__start_datetime', '-id'),
+            'requests': participations.filter(
+                status__in=[Status.PENDING, Status.WAITLISTED],
+            ).order_by('-requested_at', '-id'),
+        }
 
-class MeetupDetailView(DetailView):
+    def page_url(self, section, cursor):
+        """Link to another page of one section, keeping the others."""
+        query = self.request.GET.copy()
+        query[section] = cursor
+        return f"{self.request.path}?{query.urlencode()}"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for section, queryset in self.get_sections().items():
+            page = CursorPaginator([queryset], self.paginate_by).page(
+                self.request.GET.get(section))
+            context[section] = {
+                'page': page,
+                'next_url': page.has_next() and self.page_url(
+                    section, page.next_cursor),
+                'previous_url': page.has_previous() and self.page_url(
+                    section, page.previous_cursor),
+            }
+        return context
+
+
+class MeetupDetailView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                       DetailView):
     """
     Detailed view for a single meetup.
-    Optimized with prefetch_related and includes participation context.
+    Runs a fixed number of queries regardless of participant count:
+    counts and fullness come from the stored counters, the organizer gets
+    the participant list in one joined query, and other users only load
+    their own participation.
     """
     model = Meetup
     template_name = "meetups/meetup_detail.html"
     context_object_name = "meetup"
+    # Session, user, meetup with organizer, participation(s)
+    query_budget = 4
+
+    def get_cache_scope(self):
+        return meetup_scope(self.kwargs['pk'])
+
+    def get_validators(self):
+        """
+        Validators come from updated_at and participations_changed_at.
+        They are cached until the meetup's version is bumped, and seeded
+        from the rendered object, so revalidation runs no query. Like the
+        rendered page, they are kept for MEETUPS_PAGE_CACHE_TIMEOUT at
+        most: with a per-process cache, other workers never see the bump.
+        """
+        # Keep the key (and version) read before rendering, so a change
+        # racing with this request can never be stored as current
+        if not hasattr(self, 'validators_key'):
+            self.validators_key = page_cache_key(
+                self.get_cache_scope(), 'validators')
+        key = self.validators_key
+        row = cache.get(key)
+        if row is None:
+            meetup = getattr(self, 'object', None)
+            if meetup is None:
+                return None
+            row = (meetup.updated_at, meetup.participations_changed_at,
+                   meetup.start_datetime)
+            cache.set(key, row, settings.MEETUPS_PAGE_CACHE_TIMEOUT)
+
+        updated_at, participations_changed_at, start_datetime = row
+        changed_at = max(filter(None, (updated_at, participations_changed_at)))
+        is_past = start_datetime < timezone.now()
+        return (
+            (self.kwargs['pk'], updated_at, participations_changed_at,
+             is_past),
+            changed_at.timestamp(),
+        )
 
     def get_queryset(self):
-        # Prefetch users in participation to avoid N+1 query issues
-        return super().get_queryset().prefetch_related('participations__user')
+        return super().get_queryset().select_related('organizer')
 
-    def get_context_data(self, **kwargs):
-        """Inject current user's participation status into the template."""
+    def get_context_data(self, participation_context=None, **kwargs):
+        """Inject participation context for the current user."""
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context['user_participation'] = MeetupParticipation.objects.filter(
-                meetup=self.object, user=self.request.user
-            ).first()
+        if participation_context is None:
+            participation_context = self.get_participation_context()
+        context.update(participation_context)
+        context['is_full'] = self.object.is_full()
+        # Versions the cached public fragments of the template
+        context['cache_version'] = get_version(meetup_scope(self.object.pk))
+        context['cache_timeout'] = settings.MEETUPS_PAGE_CACHE_TIMEOUT
         return context
 
+    def get_participation_context(self):
+        user = self.request.user
+        if user.is_authenticated and user.pk == self.object.organizer_id:
+            # Organizer dashboard lists everyone, users joined in one query
+            return {'participations': list(
+                self.object.participations.select_related('user'))}
+        if user.is_authenticated:
+            return {'user_participation': MeetupParticipation.objects.filter(
+                meetup=self.object, user=user
+            ).first()}
+        return {}
+
+
+class AsyncMeetupDetailView(AsyncReadViewMixin, MeetupDetailView):
+    """Async twin of MeetupDetailView, with the same fixed query count."""
+
+    async def aget_object(self):
+        try:
+            return await self.get_queryset().aget(pk=self.kwargs['pk'])
+        except Meetup.DoesNotExist:
+            raise Http404("No meetup found matching the query")
+
+    async def aget_participation_context(self):
+        user = self.request.user
+        if user.is_authenticated and user.pk == self.object.organizer_id:
+            return {'participations': [
+                participation async for participation in
+                self.object.participations.select_related('user')
+            ]}
+        if user.is_authenticated:
+            return {'user_participation': await (
+                MeetupParticipation.objects.filter(
+                    meetup=self.object, user=user
+                ).afirst()
+            )}
+        return {}
+
+    async def aget_context_data(self):
+        self.object = await self.aget_object()
+        return self.get_context_data(
+            object=self.object,
+            participation_context=await self.aget_participation_context(),
+        )
+
 
 class MeetupFormMixin(LoginRequiredMixin):
     """
@@ -105,8 +641,10 @@ class MeetupFormMixin(LoginRequiredMixin):
 class MeetupCreateView(MeetupFormMixin, CreateView):
     """View to handle the creation of a new Meetup."""
     model = Meetup
+    query_budget = 6
     fields = ['title', 'description', 'start_datetime', 'duration_minutes',
-              'location_text', 'online_link', 'is_open', 'max_participants']
+              'location_text', 'latitude', 'longitude', 'online_link',
+              'is_open', 'max_participants']
 
     def handle_no_permission(self):
         """Add a message and redirect when a user is not authorized."""
@@ -119,8 +657,9 @@ class MeetupCreateView(MeetupFormMixin, CreateView):
 class MeetupUpdateView(MeetupFormMixin, UserPassesTestMixin, UpdateView):
     """View to handle editing an existing Meetup (Organizer only)."""
     model = Meetup
+    query_budget = 8
     fields = ['title', 'description', 'start_datetime', 'duration_minutes',
-              'location_text', 'online_link',]
+              'location_text', 'latitude', 'longitude', 'online_link',]
 
     def test_func(self):
         """Verify the logged-in user is the actual organizer."""
@@ -142,6 +681,8 @@ class MeetupDeleteView(DeleteView):
     """View to handle meetup deletion."""
     model = Meetup
     success_url = reverse_lazy('meetup_list')
+    # Participations are collected and deleted in batches, not one by one
+    query_budget = 10
 
     def get_queryset(self):
         """Ensure users can only delete meetups they organized."""
@@ -157,6 +698,8 @@ class ToggleParticipationView(LoginRequiredMixin, View):
     A view that handles joining or leaving a meetup.
     Creates or deletes MeetupParticipation records.
     """
+    # Leaving promotes from the waitlist, a lost race for a seat retries
+    query_budget = 16
 
     def handle_no_permission(self):
         """Add a message for unauthenticated users before redirecting."""
@@ -167,7 +710,9 @@ class ToggleParticipationView(LoginRequiredMixin, View):
         """Handle redirects after login to avoid 405 errors."""
         return redirect('meetup_detail', pk=pk)
 
+    @transaction.atomic
     def post(self, request, pk):
+        # Participation changes and Meetup counters commit together
         meetup = get_object_or_404(Meetup, pk=pk)
 
         # Organizer check
@@ -179,68 +724,104 @@ class ToggleParticipationView(LoginRequiredMixin, View):
             user=request.user, meetup=meetup
         ).first()
 
+        Status = MeetupParticipation.Status
         is_joining = not participation or participation.status not in [
-            MeetupParticipation.Status.GOING,
-            MeetupParticipation.Status.PENDING
+            Status.GOING, Status.PENDING, Status.WAITLISTED
         ]
 
-        if is_joining and meetup.is_full():
+        # Open meetups queue on a waitlist, closed ones have no free seats
+        # for their requests
+        if is_joining and not meetup.is_open and meetup.is_full():
             messages.error(
                 request, "This meetup has reached the participants limit.")
             return redirect('meetup_detail', pk=pk)
 
-        if participation:
-            # If user is already "Going" or "Pending", toggle means "Leave"
-            if participation.status in [MeetupParticipation.Status.GOING,
-                                        MeetupParticipation.Status.PENDING]:
-                participation.delete()
-                if participation.status is MeetupParticipation.Status.GOING:
-                    messages.info(request,
-                                  "Your attendance has been cancelled.")
-                else:
-                    messages.info(request,
-                                  "Your request has been cancelled.")
+        if not is_joining:
+            # If user is already "Going", "Pending" or on the waitlist,
+            # toggle means "Leave"; a freed seat goes to the waitlist
+            participation.delete()
+            if participation.status == Status.GOING:
+                messages.info(request,
+                              "Your attendance has been cancelled.")
+            elif participation.status == Status.WAITLISTED:
+                messages.info(request, "You've left the waitlist.")
             else:
-                # Re-joining logic for someone who was previously "Not Going"
-                participation.status = (
-                    MeetupParticipation.Status.GOING
-                    if meetup.is_open
-                    else MeetupParticipation.Status.PENDING
-                )
-                participation.save()
+                messages.info(request,
+                              "Your request has been cancelled.")
+            return redirect('meetup_detail', pk=pk)
+
+        status = Status.GOING if meetup.is_open else Status.PENDING
+        if status == Status.GOING and meetup.is_full():
+            # Wait for a seat, rather than coming back to retry
+            status = Status.WAITLISTED
+        try:
+            participation = self.save_participation(
+                participation, meetup, status)
+        except MeetupFullError:
+            # Another request took the last seat after the check above
+            status = Status.WAITLISTED
+            participation = self.save_participation(
+                participation, meetup, status)
+        if status == Status.PENDING:
+            # Queued for the organizer's digest, with this transaction
+            notify_organizer(participation)
+
+        if status == Status.GOING:
+            messages.success(
+                request, "Success! You've joined this meetup.")
+        elif status == Status.WAITLISTED:
+            messages.info(
+                request, "This meetup is full, so you are on the waitlist. "
+                         "You will get the first free seat.")
         else:
-            # Initial join/request logic
-            status = (
-                MeetupParticipation.Status.GOING
-                if meetup.is_open
-                else MeetupParticipation.Status.PENDING
-            )
-            MeetupParticipation.objects.create(
-                user=request.user, meetup=meetup, status=status)
-            if status == MeetupParticipation.Status.GOING:
-                messages.success(
-                    request, "Success! You've joined this meetup.")
-            else:
-                messages.info(
-                    request, "You've requested to join this meetup.")
+            messages.info(
+                request, "You've requested to join this meetup.")
+        self.warn_about_overlaps(meetup)
 
         return redirect('meetup_detail', pk=pk)
 
+    def save_participation(self, participation, meetup, status):
+        if participation:
+            # Re-joining logic for someone who was previously "Not Going"
+            participation.status = status
+            participation.save()
+            return participation
+        # Initial join/request logic
+        return MeetupParticipation.objects.create(
+            user=self.request.user, meetup=meetup, status=status)
+
+    def warn_about_overlaps(self, meetup):
+        """Point out meetups the user is already going to at that time."""
+        titles = list(
+            meetup.overlapping_meetups(self.request.user)
+            .order_by('start_datetime')
+            .values_list('title', flat=True)[:3]
+        )
+        if titles:
+            messages.warning(
+                self.request,
+                "Heads up: this overlaps with meetups you are going to: "
+                f"{', '.join(titles)}.")
+
 
+# Queuing the participant's email saves in a transaction of its own
+@query_budget(13)
+@primary_only
 @login_required
 def approve_participation(request, pk):
     """Function-based view for organizers to approve requests."""
     participation = get_object_or_404(MeetupParticipation, pk=pk)
-    meetup = participation.meetup
 
     # Security check: Only the organizer of the meetup can approve
     if participation.meetup.organizer == request.user:
-        if meetup.is_full():
+        try:
+            # Seat is taken with a conditional update, never overbooking
+            participation.approve()
+        except MeetupFullError:
             messages.error(
                 request,
                 "Cannot approve: Meetup has reached the participants limit.")
         else:
-            participation.approve()
             messages.success(
                 request, f"Approved {participation.user.username}'s request.")
     else:
@@ -250,6 +831,8 @@ def approve_participation(request, pk):
     return redirect('meetup_detail', pk=participation.meetup.pk)
 
 
+@query_budget(13)
+@primary_only
 @login_required
 def reject_participation(request, pk):
     """Function-based view for organizers to reject requests."""
@@ -264,3 +847,206 @@ def reject_participation(request, pk):
             request, "You are not authorized to perform this action.")
 
     return redirect('meetup_detail', pk=participation.meetup.pk)
+
+
+# Fixed however many requests are reviewed
+@query_budget(12)
+@login_required
+@require_POST
+def review_participations(request, pk):
+    """
+    Bulk approve or reject the requests selected on the organizer
+    dashboard, in one transaction with a single capacity check.
+    """
+    meetup = get_object_or_404(Meetup, pk=pk)
+    if meetup.organizer != request.user:
+        messages.error(
+            request, "You are not authorized to perform this action.")
+        return redirect('meetup_detail', pk=pk)
+
+    participation_ids = [
+        int(value) for value in request.POST.getlist('participation')
+        if value.isdigit()
+    ]
+    if not participation_ids:
+        messages.warning(request, "Select at least one request.")
+        return redirect('meetup_detail', pk=pk)
+
+    outcome = meetup.review_requests(
+        participation_ids,
+        approve=request.POST.get('action') != 'reject',
+        reject_rest=bool(request.POST.get('reject_rest')),
+    )
+    # Bulk updates bypass the model signals that drop cached pages
+    invalidate_pages(LIST_SCOPE, meetup_scope(meetup.pk))
+
+    summary = ", ".join(
+        f"{count} {label}" for label, count in (
+            ("approved", outcome['approved']),
+            ("rejected", outcome['rejected']),
+            ("left pending", outcome['left_pending']),
+            ("skipped", outcome['skipped']),
+        ) if count
+    )
+    if outcome['left_pending']:
+        messages.warning(
+            request, f"Meetup is full: {summary}.")
+    else:
+        messages.success(request, f"Requests reviewed: {summary}.")
+    return redirect('meetup_detail', pk=pk)
+
+
+class Echo:
+    """File-like object whose write() hands the value back, for csv."""
+
+    def write(self, value):
+        return value
+
+
+def csv_safe(value):
+    """Keep spreadsheet apps from evaluating a cell as a formula."""
+    value = str(value)
+    if value.startswith(("=", "+", "-", "@")):
+        return "'" + value
+    return value
+
+
+# Rows are read while the response streams, after the view returns
+@query_budget(4)
+@login_required
+def export_participations(request, pk):
+    """
+    Organizer-only CSV export of a meetup's participants, streamed row by
+    row from a chunked queryset iterator: memory use does not grow with
+    the number of participants, and the download starts right away.
+    """
+    meetup = get_object_or_404(Meetup, pk=pk)
+    if meetup.organizer != request.user:
+        messages.error(
+            request, "You are not authorized to perform this action.")
+        return redirect('meetup_detail', pk=pk)
+
+    participations = (
+        meetup.participations.select_related('user')
+        .order_by('requested_at', 'pk')
+        .iterator(chunk_size=2000)
+    )
+    writer = csv.writer(Echo())
+
+    def rows():
+        yield writer.writerow(
+            ["username", "status", "requested_at", "approved_at"])
+        for participation in participations:
+            yield writer.writerow([
+                csv_safe(participation.user.username),
+                participation.status,
+                participation.requested_at.isoformat(),
+                (participation.approved_at.isoformat()
+                 if participation.approved_at else ""),
+            ])
+
+    response = StreamingHttpResponse(
+        rows(), content_type='text/csv; charset=utf-8')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="meetup-{meetup.pk}-participants.csv"')
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+class CalendarFeedView(View):
+    """
+    Base of the streamed iCalendar feeds (see meetups.ical).
+    Calendar apps poll feeds aggressively, so responses may be cached for
+    CALENDAR_FEED_MAX_AGE seconds and carry validators derived from the
+    list cache version: a poll of an unchanged feed is answered with 304
+    Not Modified without touching the database.
+    """
+    http_method_names = ['get', 'head']
+    # The feed is queried while the response streams, after the view
+    query_budget = 0
+    feed_name = "MeetMeet"
+    # Whether responses are for the requesting client only
+    private = False
+
+    def get_events(self):
+        """Return an iterable of rendered VEVENTs, evaluated lazily."""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        max_age = settings.CALENDAR_FEED_MAX_AGE
+        # Any meetup or participation change bumps the list version, and
+        # time buckets let started meetups drop out of upcoming feeds
+        bucket = int(time.time() // max_age)
+        etag = quote_etag(hashlib.md5(repr((
+            get_version(LIST_SCOPE), request.get_full_path(), bucket,
+        )).encode()).hexdigest())
+        last_modified = int(get_changed_at(LIST_SCOPE))
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = StreamingHttpResponse(
+                stream_calendar(
+                    self.feed_name, self.get_events(), max_age // 60),
+                content_type='text/calendar; charset=utf-8',
+            )
+            response.headers['Content-Disposition'] = (
+                'inline; filename="meetmeet.ics"')
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        if self.private:
+            patch_cache_control(response, private=True, max_age=max_age)
+        else:
+            patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    def format_events(self, meetups_with_status):
+        """Render (meetup, STATUS) pairs, with URLs of this site."""
+        domain = self.request.get_host()
+        for meetup, status in meetups_with_status:
+            yield format_event(
+                meetup,
+                self.request.build_absolute_uri(meetup.get_absolute_url()),
+                domain, status,
+            )
+
+
+class UpcomingCalendarFeedView(CalendarFeedView):
+    """Feed of every meetup that has not started yet."""
+    feed_name = "MeetMeet upcoming meetups"
+
+    def get_events(self):
+        meetups = Meetup.objects.filter(
+            start_datetime__gte=timezone.now(),
+        ).order_by('start_datetime', 'id')
+        return self.format_events(
+            (meetup, "CONFIRMED")
+            for meetup in meetups.iterator(chunk_size=CHUNK_SIZE))
+
+
+class ParticipationCalendarFeedView(CalendarFeedView):
+    """
+    Personal feed of the meetups a user is going to or has requested to
+    join (as tentative events), addressed by a signed token.
+    """
+    feed_name = "MeetMeet: my meetups"
+    private = True
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        try:
+            self.user_id = user_id_from_token(kwargs['token'])
+        except (BadSignature, ValueError):
+            raise Http404("Unknown calendar feed.")
+
+    def get_events(self):
+        Status = MeetupParticipation.Status
+        participations = MeetupParticipation.objects.filter(
+            user_id=self.user_id, status__in=[Status.GOING, Status.PENDING],
+        ).select_related('meetup').order_by('pk')
+        return self.format_events(
+            (participation.meetup,
+             "CONFIRMED" if participation.status == Status.GOING
+             else "TENTATIVE")
+            for participation in participations.iterator(
+                chunk_size=CHUNK_SIZE))